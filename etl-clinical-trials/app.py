@@ -1,4 +1,7 @@
 import sqlite3
+import sys
+import threading
+from collections import Counter
 from pathlib import Path
 import pandas as pd
 import streamlit as st
@@ -18,37 +21,111 @@ st.set_page_config(
 # ======================================================
 BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "data" / "clinical_trials.db"
+SHARD_DIR = BASE_DIR / "data" / "shards"
+
+sys.path.insert(0, str(BASE_DIR / "src"))
+from db import ConnectionPool  # noqa: E402
+from queries import (STUDY_QUERY, fetch_ae_summary, incidence_query,  # noqa: E402
+                     ordinal, study_search_query, summarize_ae_rows)
+from signals import SIGNAL_COUNTS_QUERY, signal_table  # noqa: E402
+
+@st.cache_resource
+def get_pool():
+    # Shared across sessions and reruns; each query checks a connection out
+    # of a small bounded pool. Sharded loads are ATTACHed and exposed as
+    # UNION ALL views.
+    return ConnectionPool(DB_PATH, SHARD_DIR)
+
+# ======================================================
+# QUERY CACHE
+# ======================================================
+QUERY_CACHE_ENTRIES = 512
+PREWARM_TOP_STUDIES = 5
+STUDY_PAGE_SIZE = 20
+
+@st.cache_resource
+def get_cache_state():
+    # Generation the cache was last warmed for, and per-study view counts
+    return {"generation": None, "study_views": Counter(), "lock": threading.Lock()}
+
+@st.cache_data(max_entries=QUERY_CACHE_ENTRIES, show_spinner=False)
+def _cached_query(query, params, generation):
+    # The load generation is part of the key, so results from before the
+    # last load.py run are never served; max_entries evicts least recently used
+    return get_pool().query(query, params)
 
-@st.cache_data
 def run_query(query, params=None):
-    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    # Errors are raised through the cache rather than returned from it, so a
+    # failed query is retried on the next rerun instead of cached as empty
     try:
-        df = pd.read_sql_query(query, conn, params=params)
-        return df
+        return _cached_query(query, params, GENERATION)
     except Exception as e:
         st.error(f"Query Error: {e}")
         return pd.DataFrame()
-    finally:
-        conn.close()
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _cached_signal_table(generation):
+    # Recomputed once per load generation for every study and term at once
+    return signal_table(get_pool().query(SIGNAL_COUNTS_QUERY))
+
+def load_signal_table(generation):
+    # Databases loaded before the incidence cube existed have no
+    # ae_incidence_study; the error is not cached, so a reload fixes it
+    try:
+        return _cached_signal_table(generation)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return pd.DataFrame()
+
+def run_study_search(text, page):
+    # One extra row tells whether there is a next page
+    query, params = study_search_query(text, SEARCH_SCHEMAS, STUDY_PAGE_SIZE + 1, page * STUDY_PAGE_SIZE)
+    return run_query(query, params)
+
+def prewarm_cache(study_views):
+    fetch_ae_summary(run_query)
+    run_study_search("", 0)
+    for nct_id, _ in study_views.most_common(PREWARM_TOP_STUDIES):
+        run_query(STUDY_QUERY, (nct_id,))
+        fetch_ae_summary(run_query, nct_id=nct_id)
+
+# Checked on every rerun; a new load drops the old entries and re-warms
+GENERATION = get_pool().generation()
+SEARCH_SCHEMAS = get_pool().search_schemas()
+cache_state = get_cache_state()
+with cache_state["lock"]:
+    if cache_state["generation"] != GENERATION:
+        _cached_query.clear()
+        with st.spinner("Warming query cache..."):
+            # A copy, so the sessions' view counts can't change while it is read
+            prewarm_cache(Counter(cache_state["study_views"]))
+        cache_state["generation"] = GENERATION
 
 # ======================================================
 # REUSABLE CHARTING COMPONENT
 # ======================================================
 def render_ae_visualization_suite(data, context_name, height=450):
     """
-    Renders the three standard charts for any data subset.
+    Renders the three standard charts for raw AE rows already in memory.
+    Prefer render_ae_summary_charts with SQL-side aggregation where possible.
+    """
+    render_ae_summary_charts(summarize_ae_rows(data), context_name, height=height)
+
+def render_ae_summary_charts(summary, context_name, height=450):
+    """
+    Renders the three standard charts from chart-ready aggregates
+    (see queries.ae_summary_queries / fetch_ae_summary).
     Default height increased to 450 to accommodate long AE names.
     """
     st.subheader(f"📊 {context_name} Visualizations")
     col1, col2, col3 = st.columns([1.5, 1.5, 1]) # Adjusted column ratios for wider labels
     
-    if data.empty:
+    if summary["split"].empty:
         st.warning(f"No data available for {context_name}")
         return
 
     with col1:
         st.write("**Top 10 Most Frequent AEs**")
-        freq_df = data.groupby("ae_term")["num_affected"].sum().nlargest(10).reset_index()
+        freq_df = summary["frequent"]
         chart = alt.Chart(freq_df).mark_bar().encode(
             x=alt.X("num_affected:Q", title="Total Affected"),
             y=alt.Y("ae_term:N", sort="-x", title=None, axis=alt.Axis(labelLimit=300)), # Limit label truncation
@@ -59,7 +136,7 @@ def render_ae_visualization_suite(data, context_name, height=450):
 
     with col2:
         st.write("**Top 10 Deadliest (Serious) AEs**")
-        deadly_df = data[data["serious"] == 1].groupby("ae_term")["num_affected"].sum().nlargest(10).reset_index()
+        deadly_df = summary["serious"]
         if not deadly_df.empty:
             chart = alt.Chart(deadly_df).mark_bar().encode(
                 x=alt.X("num_affected:Q", title="Serious Cases"),
@@ -73,7 +150,7 @@ def render_ae_visualization_suite(data, context_name, height=450):
 
     with col3:
         st.write("**SAE vs NSAE Distribution**")
-        dist_df = data.groupby("serious")["num_affected"].sum().reset_index()
+        dist_df = summary["split"].copy()
         dist_df["label"] = dist_df["serious"].map({1: "Serious", 0: "Non-Serious"})
         chart = alt.Chart(dist_df).mark_arc(innerRadius=70, outerRadius=120).encode(
             theta="num_affected:Q",
@@ -91,32 +168,49 @@ st.title("🧪 Clinical Trial Adverse Events Dashboard")
 # ------------------------------------------------------
 st.header("🌎 1. General Level Analysis")
 with st.spinner("Loading global statistics..."):
-    global_df = run_query("SELECT ae_term, serious, num_affected FROM aes")
-if not global_df.empty:
+    # Aggregated in SQL, so the full aes table never leaves the database
+    global_summary = fetch_ae_summary(run_query)
+if not global_summary["split"].empty:
     # Explicitly using a larger height (500) for the General section
-    render_ae_visualization_suite(global_df, "Global", height=500)
+    render_ae_summary_charts(global_summary, "Global", height=500)
 
 st.divider()
 
 # 2. STUDY WIDE VISUALIZATIONS
 # ------------------------------------------------------
 st.header("🔍 2. Study-Wide Analysis")
-study_list_df = run_query("SELECT nct_id, title FROM studies ORDER BY nct_id")
-study_options = {row['nct_id']: f"{row['nct_id']} - {row['title']}" for _, row in study_list_df.iterrows()}
 
-selected_nct = st.selectbox("Search/Select a Study", options=list(study_options.keys()), format_func=lambda x: study_options[x])
+def reset_study_page():
+    st.session_state["study_page"] = 0
+
+def turn_study_page(step):
+    st.session_state["study_page"] = max(0, st.session_state.get("study_page", 0) + step)
+
+# Only one page of matches is sent to the browser, however many studies exist
+search_text = st.text_input("Search studies by NCT ID, title, condition or phase",
+                            key="study_search", on_change=reset_study_page)
+study_page = st.session_state.get("study_page", 0)
+study_list_df = run_study_search(search_text, study_page)
+has_next_page = len(study_list_df) > STUDY_PAGE_SIZE
+study_list_df = study_list_df.head(STUDY_PAGE_SIZE)
+study_options = dict(zip(study_list_df["nct_id"], study_list_df["nct_id"] + " - " + study_list_df["title"]))
+
+selected_nct = st.selectbox("Select a Study", options=list(study_options.keys()), format_func=lambda x: study_options[x])
+
+prev_col, page_col, next_col = st.columns([1, 2, 1])
+prev_col.button("◀ Previous", disabled=study_page == 0, on_click=turn_study_page, args=(-1,))
+page_col.caption(f"Page {study_page + 1}")
+next_col.button("Next ▶", disabled=not has_next_page, on_click=turn_study_page, args=(1,))
 
 if selected_nct:
-    study_query = """
-    SELECT a.ae_term, a.serious, a.num_affected, a.num_at_risk, g.group_title
-    FROM aes a
-    LEFT JOIN ae_groups g ON a.nct_id = g.nct_id AND a.group_id = g.group_id
-    WHERE a.nct_id = ?
-    """
-    study_data = run_query(study_query, (selected_nct,))
+    # cache_state is shared by every session thread
+    with cache_state["lock"]:
+        cache_state["study_views"][selected_nct] += 1
+    study_data = run_query(STUDY_QUERY, (selected_nct,))
     
     if not study_data.empty:
-        render_ae_visualization_suite(study_data, f"Study {selected_nct}", height=400)
+        study_summary = fetch_ae_summary(run_query, nct_id=selected_nct)
+        render_ae_summary_charts(study_summary, f"Study {selected_nct}", height=400)
         st.divider()
 
         # 3. GROUP WIDE VISUALIZATIONS
@@ -126,8 +220,8 @@ if selected_nct:
         selected_group = st.selectbox("Select a Specific Group (Arm)", options=unique_groups)
         
         if selected_group:
-            group_data = study_data[study_data["group_title"] == selected_group]
-            render_ae_visualization_suite(group_data, f"Group: {selected_group}", height=400)
+            group_summary = fetch_ae_summary(run_query, nct_id=selected_nct, group_title=selected_group)
+            render_ae_summary_charts(group_summary, f"Group: {selected_group}", height=400)
             st.divider()
 
             # 4. INDIVIDUAL AE METRICS
@@ -137,33 +231,84 @@ if selected_nct:
             selected_ae = st.selectbox("Search for an Individual Adverse Event (AE)", options=unique_aes)
 
             if selected_ae:
-                ae_study_subset = study_data[study_data["ae_term"] == selected_ae]
-                ae_group_subset = ae_study_subset[ae_study_subset["group_title"] == selected_group]
-
-                def calc_rate(df):
-                    aff = df["num_affected"].sum()
-                    risk = df["num_at_risk"].sum()
-                    return (aff / risk * 100) if risk > 0 else 0, aff
-
-                s_rate, s_aff = calc_rate(ae_study_subset)
-                g_rate, g_aff = calc_rate(ae_group_subset)
-
-                st.subheader(f"Incidence Comparison: '{selected_ae}'")
-                m1, m2, m3 = st.columns(3)
-                m1.metric("Study-Wide Rate", f"{s_rate:.2f}%")
-                m2.metric(f"{selected_group} Rate", f"{g_rate:.2f}%", 
-                          delta=f"{(g_rate - s_rate):+.2f}% vs Study Average", 
-                          delta_color="inverse")
-                m3.metric(f"Total Affected ({selected_group})", int(g_aff))
-
-                comp_data = pd.DataFrame({
-                    "Category": ["Entire Study", f"Group: {selected_group}"],
-                    "Incidence (%)": [s_rate, g_rate]
-                })
+                # Read from the incidence cube precomputed by load.py
+                incidence_df = run_query(*incidence_query(selected_ae, selected_nct, selected_group))
+                if incidence_df.empty:
+                    st.warning("Incidence data is unavailable. Reload the database with load.py "
+                               "to build the incidence tables.")
+                else:
+                    incidence = incidence_df.iloc[0]
+                    s_rate, g_rate = incidence["study_rate"], incidence["group_rate"]
+                    g_aff = incidence["group_affected"]
+
+                    st.subheader(f"Incidence Comparison: '{selected_ae}'")
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Study-Wide Rate", f"{s_rate:.2f}%")
+                    m2.metric(f"{selected_group} Rate", f"{g_rate:.2f}%", 
+                              delta=f"{(g_rate - s_rate):+.2f}% vs Study Average", 
+                              delta_color="inverse")
+                    m3.metric(f"Total Affected ({selected_group})", int(g_aff))
+                    if pd.notna(incidence["study_percentile"]):
+                        m4.metric("Cross-Study Percentile", ordinal(incidence["study_percentile"]),
+                                  help=f"Share of the {int(incidence['n_studies'])} studies reporting "
+                                       f"'{selected_ae}' with a study-wide rate at or below this one")
+
+                    comp_data = pd.DataFrame({
+                        "Category": ["Entire Study", f"Group: {selected_group}"],
+                        "Incidence (%)": [s_rate, g_rate]
+                    })
                 
-                comp_chart = alt.Chart(comp_data).mark_bar(size=60).encode(
-                    x=alt.X("Category:N", axis=alt.Axis(labelAngle=0)),
-                    y=alt.Y("Incidence (%):Q", title="Incidence Rate (%)"),
-                    color=alt.Color("Category:N", scale=alt.Scale(range=["#4C78A8", "#F58518"]))
-                ).properties(height=350)
-                st.altair_chart(comp_chart, use_container_width=True)
\ No newline at end of file
+                    comp_chart = alt.Chart(comp_data).mark_bar(size=60).encode(
+                        x=alt.X("Category:N", axis=alt.Axis(labelAngle=0)),
+                        y=alt.Y("Incidence (%):Q", title="Incidence Rate (%)"),
+                        color=alt.Color("Category:N", scale=alt.Scale(range=["#4C78A8", "#F58518"]))
+                    ).properties(height=350)
+                    st.altair_chart(comp_chart, use_container_width=True)
+
+        st.divider()
+
+        # 5. SAFETY SIGNAL DETECTION
+        # ------------------------------------------------------
+        st.header("🚨 5. Safety Signal Detection")
+        st.caption("Disproportionality of each AE in this study against all other studies "
+                   "(signal: PRR ≥ 2, χ² ≥ 4, at least 3 cases)")
+        with st.spinner("Computing disproportionality statistics..."):
+            signals_df = load_signal_table(GENERATION)
+
+        study_signals = signals_df[signals_df["nct_id"] == selected_nct] if not signals_df.empty else signals_df
+        if signals_df.empty:
+            st.info("No incidence data to compute signals from. Reload the database with load.py "
+                    "to compute signals.")
+        elif study_signals.empty:
+            st.info("Not enough data to compute signals for this study.")
+        else:
+            only_signals = st.checkbox("Show only flagged signals", value=True)
+            if only_signals:
+                study_signals = study_signals[study_signals["signal"]]
+
+            signal_cols = ["ae_term", "a", "prr", "prr_lower", "prr_upper",
+                           "ror", "ror_lower", "ror_upper", "chi2", "signal"]
+            st.dataframe(
+                study_signals[signal_cols].rename(columns={"ae_term": "AE", "a": "Cases"}),
+                use_container_width=True, hide_index=True
+            )
+
+            top_signals = study_signals.head(15)
+            if not top_signals.empty:
+                bars = alt.Chart(top_signals).mark_point(filled=True, size=80).encode(
+                    x=alt.X("prr:Q", title="PRR (95% CI)", scale=alt.Scale(type="log")),
+                    y=alt.Y("ae_term:N", sort="-x", title=None, axis=alt.Axis(labelLimit=300)),
+                    color=alt.value("#E15759"),
+                    tooltip=["ae_term", "a", "prr", "prr_lower", "prr_upper", "chi2"]
+                )
+                whiskers = alt.Chart(top_signals).mark_rule().encode(
+                    x="prr_lower:Q", x2="prr_upper:Q",
+                    y=alt.Y("ae_term:N", sort="-x")
+                )
+                st.altair_chart((whiskers + bars).properties(height=400), use_container_width=True)
+
+# ======================================================
+# QUERY LATENCY
+# ======================================================
+with st.sidebar.expander("⏱️ Query latency (cache misses)"):
+    st.dataframe(get_pool().latency_summary(), use_container_width=True, hide_index=True)
@@ -0,0 +1,117 @@
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from db import ConnectionPool
+from load import load_frames
+from queries import (STUDY_QUERY, fetch_ae_summary, incidence_query, study_search_query,
+                     summarize_ae_rows)
+from signals import SIGNAL_COUNTS_QUERY, signal_table
+from synthetic import SyntheticCorpus
+
+# ===========================================================================
+# Headless benchmark of the dashboard's data path
+#
+# Runs the queries and chart data prep behind each section of app.py
+# against synthetic databases of increasing size, without Streamlit or a
+# browser, and reports p50/p95 latency and peak Python memory per section.
+# The databases are built from synthetic.py's corpus.
+# ===========================================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+REPORT_DIR = PROJECT_ROOT / "data" / "benchmarks"
+
+
+# ===========================================================================
+# Sections (mirroring app.py)
+# ===========================================================================
+def dashboard_sections(pool: ConnectionPool, nct_id: str) -> dict:
+    schemas = pool.search_schemas()
+    study_data = pool.query(STUDY_QUERY, (nct_id,))
+    group_title = study_data["group_title"].dropna().iloc[0]
+    ae_term = study_data["ae_term"].iloc[0]
+
+    return {
+        "global_load": lambda: fetch_ae_summary(pool.query),
+        "study_list": lambda: pool.query(*study_search_query("", schemas, 21, 0)),
+        "study_search": lambda: pool.query(*study_search_query("pembrolizumab breast", schemas, 21, 0)),
+        "study_query": lambda: pool.query(STUDY_QUERY, (nct_id,)),
+        "study_charts": lambda: fetch_ae_summary(pool.query, nct_id=nct_id),
+        "group_filter": lambda: fetch_ae_summary(pool.query, nct_id=nct_id, group_title=group_title),
+        "chart_build": lambda: summarize_ae_rows(study_data),
+        "ae_incidence": lambda: pool.query(*incidence_query(ae_term, nct_id, group_title)),
+        "signals": lambda: signal_table(pool.query(SIGNAL_COUNTS_QUERY)),
+    }
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm the page cache and statement cache
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "peak_mib": peak / 2 ** 20,
+    }
+
+
+def run_benchmark(sizes: list, repeat: int = 20, **corpus_kwargs) -> pd.DataFrame:
+    results = []
+
+    for n_studies in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "clinical_trials.db"
+
+            corpus = SyntheticCorpus(n_studies, **corpus_kwargs)
+            start = time.perf_counter()
+            load_frames(db_path, corpus.frames())
+            print(f"[Benchmark] {n_studies} studies loaded in {time.perf_counter() - start:.1f}s")
+
+            pool = ConnectionPool(db_path, Path(tmp) / "shards")
+            sections = dashboard_sections(pool, nct_id=corpus.nct_id(n_studies // 2))
+
+            for section, fn in sections.items():
+                stats = measure(fn, repeat)
+                results.append({"studies": n_studies, "section": section, **stats})
+                print(f"[Benchmark] {n_studies:>7} {section:<13} "
+                      f"p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                      f"peak {stats['peak_mib']:7.2f} MiB")
+
+            pool.close()
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard queries on synthetic databases.")
+    parser.add_argument("--studies", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="database sizes to benchmark, in number of studies")
+    parser.add_argument("--vocabulary", type=int, default=1500, help="number of distinct AE terms")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of AE term frequency")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per section")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="JSON report path (default: data/benchmarks/dashboard_<timestamp>.json)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.studies, repeat=args.repeat,
+                           vocabulary_size=args.vocabulary, skew=args.skew)
+
+    output = args.output or REPORT_DIR / f"dashboard_{time.strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report.to_dict(orient="records"), indent=2))
+    print(f"[Benchmark] Report written to {output}")
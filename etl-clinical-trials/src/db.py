@@ -0,0 +1,417 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+# ===========================================================================
+# Paths
+# ===========================================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+DB_PATH = PROJECT_ROOT / "data" / "clinical_trials.db"
+SHARD_DIR = PROJECT_ROOT / "data" / "shards"
+SHARD_PREFIX = "clinical_trials_"
+
+# SQLite's default limit on attached databases (SQLITE_MAX_ATTACHED); the
+# load never writes more shard files than a reader can ATTACH
+MAX_SHARDS = 10
+
+# ===========================================================================
+# Schema
+# ===========================================================================
+SCHEMA = {
+    "studies": """
+    CREATE TABLE IF NOT EXISTS studies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nct_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        last_updated TIMESTAMP,
+        UNIQUE(nct_id, title)
+    );
+    """,
+    "conditions": """
+    CREATE TABLE IF NOT EXISTS conditions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nct_id TEXT NOT NULL,
+        condition TEXT NOT NULL,
+        UNIQUE(nct_id, condition)
+    );
+    """,
+    "phases": """
+    CREATE TABLE IF NOT EXISTS phases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nct_id TEXT NOT NULL,
+        phase TEXT NOT NULL,
+        UNIQUE(nct_id, phase)
+    );
+    """,
+    "aes": """
+    CREATE TABLE IF NOT EXISTS aes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nct_id TEXT NOT NULL,
+        group_id TEXT NOT NULL,
+        ae_term TEXT NOT NULL,
+        organ_system TEXT,
+        vocabulary TEXT,
+        assessment_type TEXT,
+        serious INTEGER NOT NULL CHECK (serious IN (0,1)),
+        num_affected INTEGER CHECK (num_affected >= 0),
+        num_events INTEGER CHECK (num_events >= 0),
+        num_at_risk INTEGER CHECK (num_at_risk >= 0),
+        last_updated TIMESTAMP,
+        UNIQUE (nct_id, group_id, ae_term, serious)
+    );
+    """,
+    "ae_groups": """
+    CREATE TABLE IF NOT EXISTS ae_groups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nct_id TEXT NOT NULL,
+        group_id TEXT NOT NULL,
+        group_title TEXT,
+        group_description TEXT,
+        num_death_affected INTEGER,
+        num_death_at_risk INTEGER,
+        num_serious_affected INTEGER,
+        num_serious_at_risk INTEGER,
+        num_other_affected INTEGER,
+        num_other_at_risk INTEGER,
+        UNIQUE (nct_id, group_id)
+    );
+    """,
+    # Incidence cube rebuilt by every load (see rebuild_incidence_cube):
+    # counts by (term, study, group, serious) and the per-study rollup used
+    # for cross-study percentiles
+    "ae_incidence": """
+    CREATE TABLE IF NOT EXISTS ae_incidence (
+        ae_term TEXT NOT NULL,
+        nct_id TEXT NOT NULL,
+        group_id TEXT NOT NULL,
+        group_title TEXT,
+        serious INTEGER NOT NULL,
+        num_affected INTEGER,
+        num_at_risk INTEGER,
+        PRIMARY KEY (ae_term, nct_id, group_id, serious)
+    ) WITHOUT ROWID;
+    """,
+    "ae_incidence_study": """
+    CREATE TABLE IF NOT EXISTS ae_incidence_study (
+        ae_term TEXT NOT NULL,
+        nct_id TEXT NOT NULL,
+        num_affected INTEGER,
+        num_at_risk INTEGER,
+        rate REAL NOT NULL,
+        PRIMARY KEY (ae_term, nct_id)
+    ) WITHOUT ROWID;
+    """,
+    # One row per database file, bumped by every load so readers can tell
+    # when their cached results are stale
+    "load_meta": """
+    CREATE TABLE IF NOT EXISTS load_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL,
+        loaded_at TIMESTAMP NOT NULL
+    );
+    """,
+}
+
+# Tables exposed to readers; sharded databases get one UNION ALL view each
+TABLES = tuple(SCHEMA)
+
+# Full-text index over studies. MATCH only works against the virtual table
+# itself, so sharded readers query each shard's index (see search_schemas)
+FTS_TABLE = "studies_fts"
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    nct_id, title, conditions, phases,
+    prefix='2 3 4'
+);
+"""
+
+
+def create_tables(conn: sqlite3.Connection):
+    cursor = conn.cursor()
+    for ddl in SCHEMA.values():
+        cursor.execute(ddl)
+    cursor.execute(FTS_SCHEMA)
+    conn.commit()
+
+
+def rebuild_search_index(conn: sqlite3.Connection):
+    """
+    Repopulates the study search index from studies, conditions and phases.
+    Conditions and phases are stored space-separated per study.
+    """
+    conn.execute(f"DELETE FROM {FTS_TABLE}")
+    conn.execute(f"""
+    INSERT INTO {FTS_TABLE} (nct_id, title, conditions, phases)
+    SELECT
+        s.nct_id,
+        s.title,
+        (SELECT group_concat(c.condition, ' ') FROM conditions c WHERE c.nct_id = s.nct_id),
+        (SELECT group_concat(p.phase, ' ') FROM phases p WHERE p.nct_id = s.nct_id)
+    FROM studies s
+    """)
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    conn.commit()
+
+
+def rebuild_incidence_cube(conn: sqlite3.Connection):
+    """
+    Precomputes affected / at-risk sums so incidence lookups are index
+    reads instead of scans. Rates are percentages, 0 when nobody is at risk.
+    """
+    conn.execute("DELETE FROM ae_incidence")
+    conn.execute("""
+    INSERT INTO ae_incidence (
+        ae_term, nct_id, group_id, group_title, serious, num_affected, num_at_risk
+    )
+    SELECT a.ae_term, a.nct_id, a.group_id, g.group_title, a.serious,
+           SUM(a.num_affected), SUM(a.num_at_risk)
+    FROM aes a
+    LEFT JOIN ae_groups g ON a.nct_id = g.nct_id AND a.group_id = g.group_id
+    GROUP BY a.ae_term, a.nct_id, a.group_id, a.serious
+    """)
+
+    conn.execute("DELETE FROM ae_incidence_study")
+    conn.execute("""
+    INSERT INTO ae_incidence_study (ae_term, nct_id, num_affected, num_at_risk, rate)
+    SELECT ae_term, nct_id, SUM(num_affected), SUM(num_at_risk),
+           CASE WHEN SUM(num_at_risk) > 0
+                THEN 100.0 * SUM(num_affected) / SUM(num_at_risk)
+                ELSE 0 END
+    FROM ae_incidence
+    GROUP BY ae_term, nct_id
+    """)
+    conn.commit()
+
+
+def search_schemas(conn: sqlite3.Connection) -> list:
+    """Schemas (main, or each attached shard) that carry a study search index."""
+    schemas = []
+    for _, schema, _ in conn.execute("PRAGMA database_list").fetchall():
+        if schema == "temp":
+            continue
+        found = conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?",
+            (FTS_TABLE,),
+        ).fetchone()
+        if found:
+            schemas.append(schema)
+    return schemas
+
+
+# ===========================================================================
+# Load generation
+# ===========================================================================
+def bump_generation(conn: sqlite3.Connection):
+    conn.execute("""
+    INSERT INTO load_meta (id, generation, loaded_at)
+    VALUES (1, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT(id) DO UPDATE SET
+        generation = generation + 1,
+        loaded_at = excluded.loaded_at
+    """)
+    conn.commit()
+
+
+def load_generation(conn: sqlite3.Connection) -> str:
+    """
+    Returns a key that changes whenever any database (or shard) is reloaded,
+    or shards are added or removed. Only the shards attached to conn are
+    counted, so conn must be reopened when the shard files change, as
+    ConnectionPool does. Databases loaded before load_meta existed report
+    generation 0.
+    """
+    try:
+        n_files, generation, loaded_at = conn.execute(
+            "SELECT COUNT(*), SUM(generation), MAX(loaded_at) FROM load_meta"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return "0"
+    return f"{n_files}:{generation or 0}:{loaded_at}"
+
+
+# ===========================================================================
+# Connections
+# ===========================================================================
+def connect_writer(db_path: Path) -> sqlite3.Connection:
+    """
+    Opens a database for loading. WAL journaling lets the dashboard keep
+    reading the last committed snapshot while a load is in progress.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def shard_path(key: str, shard_dir: Path = SHARD_DIR) -> Path:
+    return shard_dir / f"{SHARD_PREFIX}{key}.db"
+
+
+def shard_paths(shard_dir: Path = SHARD_DIR) -> list:
+    if not shard_dir.exists():
+        return []
+    return sorted(shard_dir.glob("*.db"))
+
+
+def connect_readonly(db_path: Path = DB_PATH, shard_dir: Path = SHARD_DIR,
+                     cached_statements: int = 128,
+                     check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Returns a read-only connection to the logical database.
+
+    If shard files exist they are ATTACHed to an in-memory connection and
+    every table is exposed as a TEMP view (UNION ALL over the shards), so
+    queries are written exactly as against the single clinical_trials.db.
+    Otherwise the single database is opened read-only.
+    """
+    shards = shard_paths(shard_dir)
+
+    if not shards:
+        return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True,
+                               cached_statements=cached_statements,
+                               check_same_thread=check_same_thread)
+
+    conn = sqlite3.connect("file::memory:", uri=True,
+                           cached_statements=cached_statements,
+                           check_same_thread=check_same_thread)
+
+    # SQLite caps the number of attached databases (10 by default)
+    if hasattr(conn, "getlimit"):
+        max_attached = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(shards) > max_attached:
+            conn.close()
+            raise ValueError(
+                f"{len(shards)} shards found but SQLite allows only "
+                f"{max_attached} attached databases; use a coarser shard key"
+            )
+
+    schemas = []
+    for i, path in enumerate(shards):
+        schema = f"shard_{i}"
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{path}?mode=ro",))
+        schemas.append(schema)
+
+    for table in TABLES:
+        union = "\nUNION ALL\n".join(f"SELECT * FROM {s}.{table}" for s in schemas)
+        conn.execute(f"CREATE TEMP VIEW {table} AS {union}")
+
+    return conn
+
+
+# ===========================================================================
+# Read connection pool
+# ===========================================================================
+class ConnectionPool:
+    """
+    A bounded pool of read-only connections, checked out for one query and
+    returned after it.
+
+    Streamlit runs every rerun on a new script thread, so connections are not
+    tied to threads: they are opened with check_same_thread=False, any thread
+    takes whichever is idle, and at most `size` are ever open. Each connection
+    keeps sqlite3's prepared-statement cache warm, memory-maps the database
+    files and uses a larger page cache. Query and connect latencies are
+    recorded so the saving over opening a connection per query can be
+    inspected.
+
+    The shard files are ATTACHed when a connection is opened, so every
+    checkout compares them with the files now in shard_dir and reopens the
+    connection when a load has added shards since.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, shard_dir: Path = SHARD_DIR, size: int = 4,
+                 mmap_bytes: int = 256 * 1024 * 1024, cache_kib: int = 64 * 1024,
+                 cached_statements: int = 256, max_timings: int = 5000):
+        self.db_path = db_path
+        self.shard_dir = shard_dir
+        self.size = size
+        self.mmap_bytes = mmap_bytes
+        self.cache_kib = cache_kib
+        self.cached_statements = cached_statements
+
+        # A slot is held for as long as a connection is checked out, so
+        # checked-out plus idle connections never exceed size
+        self._slots = threading.BoundedSemaphore(size)
+        # (connection, shard files it has attached), most recently returned
+        # first, so a light load reuses warm caches
+        self._idle = queue.LifoQueue()
+        self.timings = deque(maxlen=max_timings)
+
+    def _open(self) -> sqlite3.Connection:
+        start = time.perf_counter()
+        conn = connect_readonly(self.db_path, self.shard_dir, self.cached_statements,
+                                check_same_thread=False)
+
+        # Pragmas are per schema, so apply them to every attached shard too
+        for _, schema, _ in conn.execute("PRAGMA database_list").fetchall():
+            if schema == "temp":
+                continue
+            conn.execute(f"PRAGMA {schema}.mmap_size={self.mmap_bytes}")
+            conn.execute(f"PRAGMA {schema}.cache_size={-self.cache_kib}")
+
+        self._record("connect", time.perf_counter() - start)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the duration of the with block."""
+        with self._slots:
+            shards = shard_paths(self.shard_dir)
+            try:
+                conn, attached = self._idle.get_nowait()
+                if attached != shards:
+                    conn.close()
+                    conn = self._open()
+            except queue.Empty:
+                conn = self._open()
+            try:
+                yield conn
+            finally:
+                self._idle.put((conn, shards))
+
+    def query(self, query: str, params=None) -> pd.DataFrame:
+        with self.connection() as conn:
+            start = time.perf_counter()
+            df = pd.read_sql_query(query, conn, params=params)
+        self._record(" ".join(query.split())[:80], time.perf_counter() - start)
+        return df
+
+    def generation(self) -> str:
+        with self.connection() as conn:
+            return load_generation(conn)
+
+    def search_schemas(self) -> list:
+        with self.connection() as conn:
+            return search_schemas(conn)
+
+    def _record(self, label: str, seconds: float):
+        self.timings.append((label, seconds * 1000))
+
+    def latency_summary(self) -> pd.DataFrame:
+        if not self.timings:
+            return pd.DataFrame(columns=["query", "calls", "p50_ms", "p95_ms", "total_ms"])
+
+        df = pd.DataFrame(list(self.timings), columns=["query", "ms"])
+        summary = df.groupby("query")["ms"].agg(
+            calls="count",
+            p50_ms="median",
+            p95_ms=lambda ms: ms.quantile(0.95),
+            total_ms="sum",
+        )
+        return summary.sort_values("total_ms", ascending=False).reset_index()
+
+    def close(self):
+        """Closes the idle connections; call once no query is running."""
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                break
@@ -2,6 +2,9 @@ from pathlib import Path
 from datetime import datetime, timezone
 import requests
 import json
+import os
+
+from instrumentation import PipelineRecorder
 
 
 
@@ -13,10 +16,14 @@ RAW_STUDIES_DIR.mkdir(parents=True, exist_ok=True)
 RAW_AE_DIR = PROJECT_ROOT / "data" / "raw" / "adverse_events"
 RAW_AE_DIR.mkdir(parents=True, exist_ok=True)
 
+recorder = PipelineRecorder("extract")
+
+# Point at src/synthetic.py --serve to extract offline
+API_URL = os.environ.get("CTGOV_API_URL", "https://clinicaltrials.gov/api/v2/studies")
 
 
 def fetch_studies(condition: str):
-    url = "https://clinicaltrials.gov/api/v2/studies"
+    url = API_URL
     params = {
         "query.cond": condition,
         "aggFilters" : "results:with,status:com",
@@ -43,7 +50,7 @@ def fetch_studies(condition: str):
 
 
 def fetch_ae_data(nct_id: str):
-    url = "https://clinicaltrials.gov/api/v2/studies"
+    url = API_URL
     
     params = {
         "filter.ids": nct_id,
@@ -96,11 +103,22 @@ def store_ae_data(nct_id: str):
 
 def main(condition: str = "Oncology"):
     timestamp = datetime.now(timezone.utc).isoformat()[:10]
-    studies = store_study_data(condition=condition)
-    if studies:
-        for study in studies:
-            nct_id = study["protocolSection"]["identificationModule"]["nctId"]
-            store_ae_data(nct_id=nct_id)
+    with recorder.step("fetch_studies") as step:
+        studies = store_study_data(condition=condition)
+        step.rows_out = len(studies or [])
+        step.wrote(RAW_STUDIES_DIR / f"studies_{timestamp}.json")
+
+    with recorder.step("fetch_adverse_events", rows_in=len(studies or [])) as step:
+        n_written = 0
+        if studies:
+            for study in studies:
+                nct_id = study["protocolSection"]["identificationModule"]["nctId"]
+                store_ae_data(nct_id=nct_id)
+                ae_path = RAW_AE_DIR / f"{nct_id}.json"
+                if ae_path.exists():
+                    n_written += 1
+                    step.wrote(ae_path)
+        step.rows_out = n_written
             
     file_path = RAW_AE_DIR / "last_updated.txt"
     content_to_write = f"{timestamp}"
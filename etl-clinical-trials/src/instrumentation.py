@@ -0,0 +1,208 @@
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# ===========================================================================
+# Pipeline instrumentation
+#
+# Each stage script records wall time, CPU time, rows in/out, bytes
+# read/written and memory per step. Records from every
+# stage process of one run are appended to data/reports/run_<id>.jsonl,
+# from which a JSON run report (and optionally a Chrome trace, viewable in
+# chrome://tracing or Perfetto) is rebuilt after each stage.
+#
+# Stages share a run when started with the same PIPELINE_RUN_ID; set
+# PIPELINE_TRACE=1 to also write the Chrome trace.
+#
+# Memory comes from ru_maxrss, the process's high-water mark since it
+# started, so it cannot attribute usage to a step. Each step records that
+# mark at its end (process_peak_rss_mib) and by how much the step raised it
+# (peak_rss_growth_mib); a step that stays below an earlier step's peak
+# shows no growth even if it allocated heavily.
+# ===========================================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+REPORT_DIR = PROJECT_ROOT / "data" / "reports"
+
+
+def peak_rss_mib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _write_atomic(path: Path, text: str):
+    # Stages finishing together rebuild the same reports; a per-process tmp
+    # file means readers only ever see a complete report
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _file_size(path) -> int:
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+class StageRecord:
+    """Measurements of one step; filled in by the stage while it runs."""
+
+    def __init__(self, stage: str, step: str, rows_in: int = None):
+        self.stage = stage
+        self.step = step
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def read(self, *paths):
+        self.bytes_read += sum(_file_size(p) for p in paths)
+
+    def wrote(self, *paths):
+        self.bytes_written += sum(_file_size(p) for p in paths)
+
+
+class PipelineRecorder:
+
+    def __init__(self, stage: str, run_id: str = None, report_dir: Path = REPORT_DIR, trace: bool = None):
+        self.stage = stage
+        self.run_id = run_id or os.environ.get("PIPELINE_RUN_ID") or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.report_dir = report_dir
+        self.trace = trace if trace is not None else os.environ.get("PIPELINE_TRACE") == "1"
+        self.records = []
+        self._finished = False
+
+        # Also runs when the stage dies with an exception, so failures are reported
+        atexit.register(self.finish)
+
+    @contextmanager
+    def step(self, step: str, rows_in: int = None):
+        record = StageRecord(self.stage, step, rows_in)
+        started_at = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        rss_start = peak_rss_mib()
+        status = "ok"
+        try:
+            yield record
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            rss_end = peak_rss_mib()
+            self.records.append({
+                "run_id": self.run_id,
+                "stage": self.stage,
+                "step": step,
+                "status": status,
+                "pid": os.getpid(),
+                "started_at": started_at,
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": time.process_time() - cpu_start,
+                "rows_in": record.rows_in,
+                "rows_out": record.rows_out,
+                "bytes_read": record.bytes_read,
+                "bytes_written": record.bytes_written,
+                "process_peak_rss_mib": rss_end,
+                "peak_rss_growth_mib": None if rss_end is None else rss_end - rss_start,
+            })
+
+    def finish(self):
+        """Appends this stage's records to the run log and rebuilds the reports."""
+        if self._finished or not self.records:
+            return
+        self._finished = True
+
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.report_dir / f"run_{self.run_id}.jsonl"
+
+        lines = "".join(json.dumps(r) + "\n" for r in self.records)
+        # One append per stage, so concurrently finishing stages don't interleave
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+        for r in self.records:
+            rows = ""
+            if r["rows_out"] is not None:
+                rows = f", {r['rows_out']} rows" if r["rows_in"] is None else f", {r['rows_in']} → {r['rows_out']} rows"
+            print(f"[{r['stage']}] {r['step']}: {r['wall_s']:.2f}s wall, {r['cpu_s']:.2f}s CPU{rows}")
+
+        write_run_report(self.run_id, self.report_dir, trace=self.trace)
+
+
+def read_run_log(run_id: str, report_dir: Path = REPORT_DIR) -> list:
+    log_path = report_dir / f"run_{run_id}.jsonl"
+    if not log_path.exists():
+        return []
+    with open(log_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_run_report(run_id: str, report_dir: Path = REPORT_DIR, trace: bool = False) -> Path:
+    records = read_run_log(run_id, report_dir)
+
+    stages = {}
+    for r in records:
+        summary = stages.setdefault(r["stage"], {
+            "wall_s": 0.0, "cpu_s": 0.0, "bytes_read": 0, "bytes_written": 0,
+            "peak_rss_mib": None, "status": "ok",
+        })
+        summary["wall_s"] += r["wall_s"]
+        summary["cpu_s"] += r["cpu_s"]
+        summary["bytes_read"] += r["bytes_read"]
+        summary["bytes_written"] += r["bytes_written"]
+        # Each stage is one process, so its peak is the highest mark of its steps
+        if r["process_peak_rss_mib"] is not None:
+            summary["peak_rss_mib"] = max(summary["peak_rss_mib"] or 0, r["process_peak_rss_mib"])
+        if r["status"] != "ok":
+            summary["status"] = r["status"]
+
+    start = min((r["started_at"] for r in records), default=None)
+    end = max((r["started_at"] + r["wall_s"] for r in records), default=None)
+
+    report = {
+        "run_id": run_id,
+        "elapsed_s": None if start is None else end - start,
+        "stages": stages,
+        "steps": records,
+    }
+    report_path = report_dir / f"run_{run_id}.json"
+    _write_atomic(report_path, json.dumps(report, indent=2))
+
+    if trace:
+        # One trace process per stage process, named after the stage
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": stage}}
+            for pid, stage in {(r["pid"], r["stage"]) for r in records}
+        ]
+        events += [
+            {
+                "name": r["step"],
+                "cat": r["stage"],
+                "ph": "X",
+                "ts": (r["started_at"] - start) * 1e6,
+                "dur": r["wall_s"] * 1e6,
+                "pid": r["pid"],
+                "tid": 0,
+                "args": {k: r[k] for k in ("cpu_s", "rows_in", "rows_out", "bytes_read",
+                                           "bytes_written", "process_peak_rss_mib",
+                                           "peak_rss_growth_mib", "status")},
+            }
+            for r in records
+        ]
+        _write_atomic(report_dir / f"run_{run_id}.trace.json", json.dumps({"traceEvents": events}))
+
+    return report_path
@@ -1,203 +1,231 @@
+import argparse
+import re
 import sqlite3
-import pandas as pd
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import pandas as pd
+
+from db import (DB_PATH, MAX_SHARDS, SHARD_DIR, SHARD_PREFIX, bump_generation, connect_writer,
+                create_tables, rebuild_incidence_cube, rebuild_search_index, shard_path, shard_paths)
+from instrumentation import PipelineRecorder
+
 # ===========================================================================
 # Paths
 # ===========================================================================
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
 VALIDATED_DATA_DIR = PROJECT_ROOT / "data" / "validated"
-DB_PATH = PROJECT_ROOT / "data" / "clinical_trials.db"
 
 # ===========================================================================
-# Load validated CSVs
-# ===========================================================================
-studies_df = pd.read_csv(VALIDATED_DATA_DIR / "validated_studies.csv")
-conditions_df = pd.read_csv(VALIDATED_DATA_DIR / "validated_conditions.csv")
-phases_df = pd.read_csv(VALIDATED_DATA_DIR / "validated_phases.csv")
-ae_df = pd.read_csv(VALIDATED_DATA_DIR / "validated_ae.csv")
-ae_groups_df = pd.read_csv(VALIDATED_DATA_DIR / "validated_ae_groups.csv")
+# Insert statements (in load order: conditions/phases/studies, then AE
+# groups before the AE events that reference them)
+# ===========================================================================
+INSERT_QUERIES = {
+    "conditions": """
+    INSERT OR IGNORE INTO conditions (
+        nct_id, condition
+    )
+    VALUES (?, ?)
+    """,
+    "phases": """
+    INSERT OR IGNORE INTO phases (
+        nct_id, phase
+    )
+    VALUES (?, ?)
+    """,
+    "studies": """
+    INSERT OR IGNORE INTO studies (
+        nct_id, title, last_updated
+    )
+    VALUES (?, ?, ?)
+    """,
+    "ae_groups": """
+    INSERT OR IGNORE INTO ae_groups (
+        nct_id, group_id, group_title, group_description,
+        num_death_affected, num_death_at_risk,
+        num_serious_affected, num_serious_at_risk,
+        num_other_affected, num_other_at_risk
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "aes": """
+    INSERT OR IGNORE INTO aes (
+        nct_id, group_id, ae_term, organ_system,
+        vocabulary, assessment_type, serious,
+        num_affected, num_events, num_at_risk, last_updated
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+SHARD_KEYS = ("condition", "month")
+
+recorder = PipelineRecorder("load")
 
-# ===========================================================================
-# Connect to SQLite
-# ===========================================================================
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
 
 # ===========================================================================
-# Create Tables
+# Load validated CSVs
 # ===========================================================================
+def read_validated() -> dict:
+    return {
+        "studies": pd.read_csv(VALIDATED_DATA_DIR / "validated_studies.csv"),
+        "conditions": pd.read_csv(VALIDATED_DATA_DIR / "validated_conditions.csv"),
+        "phases": pd.read_csv(VALIDATED_DATA_DIR / "validated_phases.csv"),
+        "aes": pd.read_csv(VALIDATED_DATA_DIR / "validated_ae.csv"),
+        "ae_groups": pd.read_csv(VALIDATED_DATA_DIR / "validated_ae_groups.csv"),
+    }
 
-# studies table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS studies (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nct_id TEXT NOT NULL,
-    title TEXT NOT NULL,
-    last_updated TIMESTAMP,
-    UNIQUE(nct_id, title)
-);
-""")
-
-
-# conditions table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS conditions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nct_id TEXT NOT NULL,
-    condition TEXT NOT NULL,
-    UNIQUE(nct_id, condition)
-);
-""")
-
-# phases table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS phases (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nct_id TEXT NOT NULL,
-    phase TEXT NOT NULL,
-    UNIQUE(nct_id, phase)
-);
-""")
-
-# AE table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS aes (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nct_id TEXT NOT NULL,
-    group_id TEXT NOT NULL,
-    ae_term TEXT NOT NULL,
-    organ_system TEXT,
-    vocabulary TEXT,
-    assessment_type TEXT,
-    serious INTEGER NOT NULL CHECK (serious IN (0,1)),
-    num_affected INTEGER CHECK (num_affected >= 0),
-    num_events INTEGER CHECK (num_events >= 0),
-    num_at_risk INTEGER CHECK (num_at_risk >= 0),
-    last_updated TIMESTAMP,
-    UNIQUE (nct_id, group_id, ae_term, serious)
-);
-""")
-
-# AE groups table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS ae_groups (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nct_id TEXT NOT NULL,
-    group_id TEXT NOT NULL,
-    group_title TEXT,
-    group_description TEXT,
-    num_death_affected INTEGER,
-    num_death_at_risk INTEGER,
-    num_serious_affected INTEGER,
-    num_serious_at_risk INTEGER,
-    num_other_affected INTEGER,
-    num_other_at_risk INTEGER,
-    UNIQUE (nct_id, group_id)
-);
-""")
-
-conn.commit()
 
 # ===========================================================================
-# Incremental Load: CONDITIONS FIRST (FK dependency)
+# Incremental load into one database file
 # ===========================================================================
-insert_groups_query = """
-INSERT OR IGNORE INTO conditions (
-    nct_id, condition
-)
-VALUES (?, ?)
-"""
+def load_frames(db_path: Path, frames: dict) -> dict:
+    conn = connect_writer(db_path)
+    create_tables(conn)
+    cursor = conn.cursor()
 
-before_groups = conn.total_changes
-cursor.executemany(insert_groups_query, conditions_df.values.tolist())
-conn.commit()
-after_groups = conn.total_changes
+    inserted = {}
+    for table, query in INSERT_QUERIES.items():
+        before = conn.total_changes
+        cursor.executemany(query, frames[table].values.tolist())
+        conn.commit()
+        inserted[table] = conn.total_changes - before
 
-print(f"New AE groups inserted: {after_groups - before_groups}")
+    rebuild_search_index(conn)
+    rebuild_incidence_cube(conn)
+
+    # Tells the dashboard its cached query results are stale
+    bump_generation(conn)
+
+    conn.close()
+    return inserted
 
 
 # ===========================================================================
-# Incremental Load: PHASES FIRST (FK dependency)
+# Sharding
 # ===========================================================================
-insert_groups_query = """
-INSERT OR IGNORE INTO phases (
-    nct_id, phase
-)
-VALUES (?, ?)
-"""
+def _slug(value) -> str:
+    slug = re.sub(r"[^0-9a-z]+", "_", str(value).lower()).strip("_")
+    return slug or "unknown"
 
-before_groups = conn.total_changes
-cursor.executemany(insert_groups_query, phases_df.values.tolist())
-conn.commit()
-after_groups = conn.total_changes
 
-print(f"New AE groups inserted: {after_groups - before_groups}")
+def condition_bucket(condition) -> str:
+    """
+    Hash bucket of a condition. There are far more conditions than SQLite
+    can attach, so conditions share MAX_SHARDS files; crc32 keeps the
+    bucket stable across processes and runs.
+    """
+    return f"condition_{zlib.crc32(_slug(condition).encode()) % MAX_SHARDS}"
+
 
+def placed_studies(shard_dir: Path = SHARD_DIR) -> dict:
+    """{nct_id: shard key} for the studies already in shard_dir's files."""
+    placed = {}
+    for path in shard_paths(shard_dir):
+        key = path.stem[len(SHARD_PREFIX):]
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for (nct_id,) in conn.execute("SELECT DISTINCT nct_id FROM studies"):
+                placed.setdefault(nct_id, key)
+        except sqlite3.OperationalError:
+            pass  # created but never loaded
+        finally:
+            conn.close()
+    return placed
 
-# ===========================================================================
-# Incremental Load: STUDIES
-# ===========================================================================
-insert_groups_query = """
-INSERT OR IGNORE INTO studies (
-    nct_id, title, last_updated
-)
-VALUES (?, ?, ?)
-"""
 
-before_groups = conn.total_changes
-cursor.executemany(insert_groups_query, studies_df.values.tolist())
-conn.commit()
-after_groups = conn.total_changes
+def assign_shards(frames: dict, shard_by: str, placed: dict = None) -> dict:
+    """
+    Maps every study to exactly one shard key and splits all tables by it,
+    so no row appears in two shards and the UNION ALL views stay exact.
 
-print(f"New AE groups inserted: {after_groups - before_groups}")
+    condition: a study goes to the hash bucket of its first listed condition.
+    month:     a study goes to the shard of its last_updated month.
 
+    Studies in placed ({nct_id: shard key}, see placed_studies) keep the
+    shard an earlier load put them in, even if their key has changed since,
+    so reloads never copy a study into a second shard.
+    """
+    studies = frames["studies"]
 
+    if shard_by == "condition":
+        first_condition = frames["conditions"].drop_duplicates("nct_id").set_index("nct_id")["condition"]
+        keys = studies["nct_id"].map(first_condition).fillna("unknown").map(condition_bucket)
+    elif shard_by == "month":
+        keys = pd.to_datetime(studies["last_updated"], errors="coerce").dt.strftime("%Y-%m").map(_slug)
+    else:
+        raise ValueError(f"Unknown shard key '{shard_by}', expected one of {SHARD_KEYS}")
 
+    study_shard = {**dict(zip(studies["nct_id"], keys)), **(placed or {})}
 
-# ===========================================================================
-# Incremental Load: AE GROUPS FIRST (FK dependency)
-# ===========================================================================
-insert_groups_query = """
-INSERT OR IGNORE INTO ae_groups (
-    nct_id, group_id, group_title, group_description,
-    num_death_affected, num_death_at_risk,
-    num_serious_affected, num_serious_at_risk,
-    num_other_affected, num_other_at_risk
-)
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-"""
-
-before_groups = conn.total_changes
-cursor.executemany(insert_groups_query, ae_groups_df.values.tolist())
-conn.commit()
-after_groups = conn.total_changes
-
-print(f"New AE groups inserted: {after_groups - before_groups}")
+    shards = {}
+    for table, df in frames.items():
+        table_keys = df["nct_id"].map(study_shard).fillna("unknown")
+        for key, part in df.groupby(table_keys, sort=True):
+            shards.setdefault(key, {})[table] = part
 
-# ===========================================================================
-# Incremental Load: AE EVENTS
-# ===========================================================================
-insert_ae_query = """
-INSERT OR IGNORE INTO aes (
-    nct_id, group_id, ae_term, organ_system,
-    vocabulary, assessment_type, serious,
-    num_affected, num_events, num_at_risk, last_updated
-)
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-"""
-
-before_ae = conn.total_changes
-cursor.executemany(insert_ae_query, ae_df.values.tolist())
-conn.commit()
-after_ae = conn.total_changes
-
-print(f"New AE rows inserted: {after_ae - before_ae}")
+    # Every shard gets every table, even if empty, so the views line up
+    for shard_frames in shards.values():
+        for table, df in frames.items():
+            shard_frames.setdefault(table, df.iloc[0:0])
 
-# ===========================================================================
-# Close connection
-# ===========================================================================
-conn.close()
+    return shards
+
+
+def load_sharded(frames: dict, shard_by: str, shard_dir: Path = SHARD_DIR, workers: int = None) -> dict:
+    shards = assign_shards(frames, shard_by, placed_studies(shard_dir))
 
-print("Incremental load complete.")
\ No newline at end of file
+    # Refuse before writing anything: readers could not attach the result
+    files = {path.name for path in shard_paths(shard_dir)} | {shard_path(key, shard_dir).name for key in shards}
+    if len(files) > MAX_SHARDS:
+        raise ValueError(
+            f"Loading by {shard_by} would leave {len(files)} shard files in {shard_dir}, but readers "
+            f"can attach at most {MAX_SHARDS}; use --shard-by condition or clear out old shards"
+        )
+
+    # Each shard is its own file, so the writers never contend for a lock
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            key: pool.submit(load_frames, shard_path(key, shard_dir), shard_frames)
+            for key, shard_frames in shards.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+
+# ===========================================================================
+# Entry point
+# ===========================================================================
+def main(shard_by: str = None, workers: int = None):
+    with recorder.step("read_validated") as step:
+        frames = read_validated()
+        step.read(VALIDATED_DATA_DIR)
+        step.rows_out = sum(len(df) for df in frames.values())
+
+    with recorder.step("load_sqlite", rows_in=sum(len(df) for df in frames.values())) as step:
+        if shard_by is None:
+            results = {DB_PATH.name: load_frames(DB_PATH, frames)}
+            step.wrote(DB_PATH)
+        else:
+            results = load_sharded(frames, shard_by, workers=workers)
+            step.wrote(SHARD_DIR)
+        step.rows_out = sum(n for inserted in results.values() for n in inserted.values())
+
+    for db_name, inserted in results.items():
+        for table, n_new in inserted.items():
+            print(f"[{db_name}] New {table} rows inserted: {n_new}")
+
+    print("Incremental load complete.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load validated CSVs into SQLite.")
+    parser.add_argument("--shard-by", choices=SHARD_KEYS, default=None,
+                        help="split the database by condition (hashed into at most 10 files) "
+                             "or by month under data/shards/")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of parallel shard writer processes")
+    args = parser.parse_args()
+
+    main(shard_by=args.shard_by, workers=args.workers)
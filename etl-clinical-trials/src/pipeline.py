@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ===========================================================================
+# Paths
+# ===========================================================================
+SRC_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SRC_DIR.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+RAW_STUDIES_DIR = DATA_DIR / "raw" / "studies"
+RAW_AE_DIR = DATA_DIR / "raw" / "adverse_events"
+PROCESSED_DATA_DIR = DATA_DIR / "processed"
+VALIDATED_DATA_DIR = DATA_DIR / "validated"
+DB_PATH = DATA_DIR / "clinical_trials.db"
+SHARD_DIR = DATA_DIR / "shards"
+
+STATE_PATH = DATA_DIR / ".pipeline_state.json"
+
+# ===========================================================================
+# Stage graph
+#
+# Each stage is one of the existing scripts, run in its own process. The
+# studies branch and the AE branch only meet at load, so they run side by
+# side. A stage is skipped when the content of its inputs and its script
+# are unchanged since its last successful run and its outputs still exist;
+# after a failure, rerunning resumes from the failed stage. A sharded load
+# writes SHARD_DIR instead of its listed output (see stage_outputs).
+# ===========================================================================
+STAGES = {
+    "extract": {
+        "script": "extract.py",
+        "deps": [],
+        "inputs": None,  # the API: always runs when selected
+        "outputs": [RAW_STUDIES_DIR, RAW_AE_DIR],
+    },
+    "transform_studies": {
+        "script": "transform_studies.py",
+        "deps": ["extract"],
+        "inputs": [RAW_STUDIES_DIR],
+        "outputs": [PROCESSED_DATA_DIR / name for name in ("studies.csv", "conditions.csv", "phases.csv")],
+    },
+    "transform_ae": {
+        "script": "transform_ae.py",
+        "deps": ["extract"],
+        "inputs": [RAW_AE_DIR],
+        "outputs": [PROCESSED_DATA_DIR / name for name in ("ae.csv", "ae_groups.csv")],
+    },
+    "validate_studies": {
+        "script": "validate_studies.py",
+        "deps": ["transform_studies"],
+        "inputs": [PROCESSED_DATA_DIR / name for name in ("studies.csv", "conditions.csv", "phases.csv")],
+        "outputs": [VALIDATED_DATA_DIR / name for name in
+                    ("validated_studies.csv", "validated_conditions.csv", "validated_phases.csv")],
+    },
+    "validate_aes": {
+        "script": "validate_aes.py",
+        "deps": ["transform_ae"],
+        "inputs": [PROCESSED_DATA_DIR / name for name in ("ae.csv", "ae_groups.csv")],
+        "outputs": [VALIDATED_DATA_DIR / name for name in ("validated_ae.csv", "validated_ae_groups.csv")],
+    },
+    "load": {
+        "script": "load.py",
+        "deps": ["validate_studies", "validate_aes"],
+        "inputs": [VALIDATED_DATA_DIR / name for name in
+                   ("validated_studies.csv", "validated_conditions.csv", "validated_phases.csv",
+                    "validated_ae.csv", "validated_ae_groups.csv")],
+        "outputs": [DB_PATH],
+    },
+}
+
+
+# ===========================================================================
+# Fingerprints and state
+# ===========================================================================
+def _files(path: Path) -> list:
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.is_file())
+    return [path] if path.exists() else []
+
+
+def fingerprint(stage: str, extra_args: list = ()) -> str:
+    """Content hash of the stage's script, arguments and input files."""
+    spec = STAGES[stage]
+    digest = hashlib.sha256()
+    digest.update((SRC_DIR / spec["script"]).read_bytes())
+    digest.update(json.dumps(list(extra_args)).encode())
+
+    for path in spec["inputs"]:
+        for file in _files(path):
+            digest.update(str(file.relative_to(PROJECT_ROOT)).encode())
+            with open(file, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_state(state_path: Path = STATE_PATH) -> dict:
+    if not state_path.exists():
+        return {}
+    return json.loads(state_path.read_text())
+
+
+def write_state(state: dict, state_path: Path = STATE_PATH):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    tmp.replace(state_path)
+
+
+def stage_outputs(stage: str, extra_args: list = ()) -> list:
+    if stage == "load" and "--shard-by" in extra_args:
+        return [SHARD_DIR]
+    return STAGES[stage]["outputs"]
+
+
+def is_up_to_date(stage: str, state: dict, current: str, extra_args: list = ()) -> bool:
+    spec = STAGES[stage]
+    if spec["inputs"] is None:
+        return False
+    outputs_exist = all(_files(path) for path in stage_outputs(stage, extra_args))
+    return outputs_exist and state.get(stage, {}).get("fingerprint") == current
+
+
+# ===========================================================================
+# Runner
+# ===========================================================================
+def run_stage(stage: str, extra_args: list, env: dict) -> int:
+    cmd = [sys.executable, str(SRC_DIR / STAGES[stage]["script"]), *extra_args]
+    return subprocess.run(cmd, cwd=PROJECT_ROOT, env=env).returncode
+
+
+def run_pipeline(stages: list = None, jobs: int = 2, force: bool = False, stage_args: dict = None) -> bool:
+    """
+    Runs the selected stages (default: everything but extract) in dependency
+    order, independent stages in parallel. Returns True if all succeeded.
+    """
+    if jobs < 1:
+        raise ValueError(f"jobs must be at least 1, got {jobs}")
+    selected = stages or [s for s in STAGES if s != "extract"]
+    stage_args = stage_args or {}
+
+    for path in (PROCESSED_DATA_DIR, VALIDATED_DATA_DIR):
+        path.mkdir(parents=True, exist_ok=True)
+
+    run_id = os.environ.get("PIPELINE_RUN_ID") or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    env = {**os.environ, "PIPELINE_RUN_ID": run_id}
+
+    state = read_state()
+    done, failed, blocked, running = set(), set(), set(), {}
+    pending = list(selected)
+
+    def deps_of(stage):
+        # Dependencies outside the selection are taken as already satisfied
+        return [d for d in STAGES[stage]["deps"] if d in selected]
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for stage in list(pending):
+                deps = deps_of(stage)
+                if any(d in failed or d in blocked for d in deps):
+                    print(f"[Pipeline] {stage} not run: upstream stage failed")
+                    pending.remove(stage)
+                    blocked.add(stage)
+                    continue
+                if not all(d in done for d in deps) or len(running) >= jobs:
+                    continue
+
+                pending.remove(stage)
+                extra_args = stage_args.get(stage, [])
+                current = fingerprint(stage, extra_args) if STAGES[stage]["inputs"] is not None else None
+
+                if not force and is_up_to_date(stage, state, current, extra_args):
+                    print(f"[Pipeline] {stage} skipped: inputs unchanged")
+                    done.add(stage)
+                    continue
+
+                print(f"[Pipeline] {stage} started")
+                future = pool.submit(run_stage, stage, extra_args, env)
+                running[future] = (stage, current, time.perf_counter())
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, current, start = running.pop(future)
+                elapsed = time.perf_counter() - start
+
+                if future.result() == 0:
+                    print(f"[Pipeline] {stage} finished in {elapsed:.1f}s")
+                    done.add(stage)
+                    if current is not None:
+                        state[stage] = {"fingerprint": current,
+                                        "finished_at": datetime.now(timezone.utc).isoformat()}
+                        write_state(state)
+                else:
+                    print(f"[Pipeline] {stage} FAILED after {elapsed:.1f}s")
+                    failed.add(stage)
+                    state.pop(stage, None)
+                    write_state(state)
+
+    print(f"[Pipeline] Run {run_id}: {len(done)} stages ok, {len(failed)} failed, {len(blocked)} not run")
+    return not failed and not blocked
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ETL stages as a dependency graph.")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=None,
+                        help="stages to run (default: all except extract)")
+    parser.add_argument("--extract", action="store_true", help="also fetch fresh data from the API first")
+    parser.add_argument("--jobs", type=positive_int, default=2, help="maximum stages running at once")
+    parser.add_argument("--force", action="store_true", help="rerun stages even if inputs are unchanged")
+    parser.add_argument("--shard-by", choices=("condition", "month"), default=None,
+                        help="passed through to load.py")
+    args = parser.parse_args()
+
+    stages = args.stages
+    if args.extract:
+        stages = ["extract"] + (stages or [s for s in STAGES if s != "extract"])
+
+    stage_args = {"load": ["--shard-by", args.shard_by]} if args.shard_by else {}
+
+    ok = run_pipeline(stages, jobs=args.jobs, force=args.force, stage_args=stage_args)
+    sys.exit(0 if ok else 1)
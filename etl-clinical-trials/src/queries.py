@@ -0,0 +1,194 @@
+import re
+
+import pandas as pd
+
+from db import FTS_TABLE
+
+# ===========================================================================
+# Study rows
+# ===========================================================================
+STUDY_QUERY = """
+SELECT a.ae_term, a.serious, a.num_affected, a.num_at_risk, g.group_title
+FROM aes a
+LEFT JOIN ae_groups g ON a.nct_id = g.nct_id AND a.group_id = g.group_id
+WHERE a.nct_id = ?
+"""
+
+# ===========================================================================
+# AE chart aggregations
+#
+# The dashboard draws the same three charts at global, study and group
+# level: top 10 AEs by affected count, top 10 serious AEs, and the
+# serious / non-serious split. These builders push the aggregation into
+# SQL so only the chart-ready rows leave the database.
+# ===========================================================================
+TOP_N = 10
+
+AE_SUMMARIES = ("frequent", "serious", "split")
+
+
+def ae_summary_queries(nct_id: str = None, group_title: str = None, top_n: int = TOP_N) -> dict:
+    """
+    Returns {summary name: (sql, params)} for the three chart aggregations,
+    optionally restricted to one study and one of its groups (arms).
+    """
+    # ae_groups is only joined when filtering by group title
+    source = "FROM aes a"
+    if group_title is not None:
+        source += "\nJOIN ae_groups g ON a.nct_id = g.nct_id AND a.group_id = g.group_id"
+
+    filters, params = [], []
+    if nct_id is not None:
+        filters.append("a.nct_id = ?")
+        params.append(nct_id)
+    if group_title is not None:
+        filters.append("g.group_title = ?")
+        params.append(group_title)
+
+    def where(*extra):
+        clauses = filters + list(extra)
+        return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    top_terms = """
+    SELECT a.ae_term, SUM(a.num_affected) AS num_affected
+    {source}
+    {where}
+    GROUP BY a.ae_term
+    ORDER BY num_affected DESC, a.ae_term
+    LIMIT {top_n}
+    """
+
+    return {
+        "frequent": (
+            top_terms.format(source=source, where=where(), top_n=int(top_n)),
+            tuple(params),
+        ),
+        "serious": (
+            top_terms.format(source=source, where=where("a.serious = 1"), top_n=int(top_n)),
+            tuple(params),
+        ),
+        "split": (
+            f"""
+            SELECT a.serious, SUM(a.num_affected) AS num_affected
+            {source}
+            {where()}
+            GROUP BY a.serious
+            ORDER BY a.serious
+            """,
+            tuple(params),
+        ),
+    }
+
+
+def fetch_ae_summary(run_query, nct_id: str = None, group_title: str = None, top_n: int = TOP_N) -> dict:
+    """
+    Runs the summary queries through run_query(sql, params) -> DataFrame,
+    so callers choose the connection and caching.
+    """
+    return {
+        name: run_query(sql, params or None)
+        for name, (sql, params) in ae_summary_queries(nct_id, group_title, top_n).items()
+    }
+
+
+def summarize_ae_rows(data: pd.DataFrame, top_n: int = TOP_N) -> dict:
+    """
+    In-process equivalent of ae_summary_queries for rows already loaded
+    (columns ae_term, serious, num_affected).
+    """
+    return {
+        "frequent": data.groupby("ae_term")["num_affected"].sum().nlargest(top_n).reset_index(),
+        "serious": data[data["serious"] == 1].groupby("ae_term")["num_affected"].sum().nlargest(top_n).reset_index(),
+        "split": data.groupby("serious")["num_affected"].sum().reset_index(),
+    }
+
+
+# ===========================================================================
+# Study search
+# ===========================================================================
+def _fts_prefix_query(text: str) -> str:
+    # Every word must match as a prefix; quoting keeps user input from being
+    # parsed as FTS5 query syntax
+    tokens = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def study_search_query(text: str, schemas: list, limit: int, offset: int = 0) -> tuple:
+    """
+    Returns (sql, params) for one page of studies matching text across
+    NCT ID, title, condition and phase, best matches first. An empty search
+    pages through all studies by NCT ID.
+    """
+    match = _fts_prefix_query(text or "")
+
+    if not match or not schemas:
+        return (
+            "SELECT nct_id, title FROM studies ORDER BY nct_id LIMIT ? OFFSET ?",
+            (int(limit), int(offset)),
+        )
+
+    union = "\nUNION ALL\n".join(
+        f"SELECT nct_id, title, rank FROM {schema}.{FTS_TABLE} WHERE {FTS_TABLE} MATCH ?"
+        for schema in schemas
+    )
+    sql = f"""
+    SELECT nct_id, title
+    FROM ({union})
+    ORDER BY rank, nct_id
+    LIMIT ? OFFSET ?
+    """
+    return sql, tuple([match] * len(schemas)) + (int(limit), int(offset))
+
+
+# ===========================================================================
+# Individual AE incidence
+# ===========================================================================
+INCIDENCE_QUERY = """
+WITH study AS (
+    SELECT num_affected, rate
+    FROM ae_incidence_study
+    WHERE ae_term = :ae_term AND nct_id = :nct_id
+),
+grp AS (
+    SELECT SUM(num_affected) AS num_affected, SUM(num_at_risk) AS num_at_risk
+    FROM ae_incidence
+    WHERE ae_term = :ae_term AND nct_id = :nct_id AND group_title = :group_title
+),
+peers AS (
+    SELECT COUNT(*) AS n_studies,
+           SUM(rate <= (SELECT rate FROM study)) AS n_at_or_below
+    FROM ae_incidence_study
+    WHERE ae_term = :ae_term
+)
+SELECT
+    COALESCE((SELECT rate FROM study), 0) AS study_rate,
+    COALESCE((SELECT num_affected FROM study), 0) AS study_affected,
+    CASE WHEN grp.num_at_risk > 0
+         THEN 100.0 * grp.num_affected / grp.num_at_risk
+         ELSE 0 END AS group_rate,
+    COALESCE(grp.num_affected, 0) AS group_affected,
+    peers.n_studies,
+    CASE WHEN peers.n_studies > 0
+         THEN 100.0 * peers.n_at_or_below / peers.n_studies
+         END AS study_percentile
+FROM grp, peers
+"""
+
+
+def incidence_query(ae_term: str, nct_id: str, group_title: str) -> tuple:
+    """
+    Returns (sql, params) for one row of study-wide and group-level
+    incidence (%) of ae_term, plus the percentile of the study's rate among
+    all studies reporting the term. Reads only the precomputed cube.
+    """
+    return INCIDENCE_QUERY, {"ae_term": ae_term, "nct_id": nct_id, "group_title": group_title}
+
+
+def ordinal(value: float) -> str:
+    """value rounded to a whole number with its English suffix: 1st, 2nd, 11th, 23rd"""
+    n = int(round(value))
+    if 10 <= n % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# ===========================================================================
+# Disproportionality analysis
+#
+# For every (study, term) the 2x2 contingency table counts participants
+# affected, using the per-study rollup of the incidence cube:
+#
+#                      term      other terms
+#   this study          a             b
+#   other studies       c             d
+#
+# All tables are built and evaluated at once with NumPy array arithmetic.
+# ===========================================================================
+SIGNAL_COUNTS_QUERY = """
+SELECT nct_id, ae_term, num_affected
+FROM ae_incidence_study
+WHERE num_affected > 0
+"""
+
+Z_95 = 1.959963984540054
+
+# Evans et al. screening criteria
+MIN_CASES = 3
+MIN_PRR = 2.0
+MIN_CHI2 = 4.0
+
+
+def contingency_tables(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the a, b, c, d cells to per-(nct_id, ae_term) affected counts.
+    """
+    df = counts[["nct_id", "ae_term", "num_affected"]].copy()
+
+    a = df["num_affected"].to_numpy(dtype=float)
+    study_total = df.groupby("nct_id")["num_affected"].transform("sum").to_numpy(dtype=float)
+    term_total = df.groupby("ae_term")["num_affected"].transform("sum").to_numpy(dtype=float)
+    grand_total = a.sum()
+
+    df["a"] = a
+    df["b"] = study_total - a
+    df["c"] = term_total - a
+    df["d"] = grand_total - study_total - term_total + a
+    return df
+
+
+def disproportionality(tables: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes PRR and ROR with 95% confidence intervals and the Yates
+    chi-squared statistic for every contingency table.
+
+    Tables with an empty cell get the Haldane-Anscombe correction (0.5 added
+    to each cell) for the ratios; chi-squared always uses the raw counts.
+    """
+    df = tables.copy()
+    a, b, c, d = (df[cell].to_numpy(dtype=float) for cell in "abcd")
+
+    corrected = (a == 0) | (b == 0) | (c == 0) | (d == 0)
+    ca, cb, cc, cd = (np.where(corrected, x + 0.5, x) for x in (a, b, c, d))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prr = (ca / (ca + cb)) / (cc / (cc + cd))
+        se_log_prr = np.sqrt(1 / ca - 1 / (ca + cb) + 1 / cc - 1 / (cc + cd))
+
+        ror = (ca * cd) / (cb * cc)
+        se_log_ror = np.sqrt(1 / ca + 1 / cb + 1 / cc + 1 / cd)
+
+        n = a + b + c + d
+        yates = np.maximum(np.abs(a * d - b * c) - n / 2, 0)
+        chi2 = n * yates ** 2 / ((a + b) * (c + d) * (a + c) * (b + d))
+
+    df["prr"] = prr
+    df["prr_lower"] = np.exp(np.log(prr) - Z_95 * se_log_prr)
+    df["prr_upper"] = np.exp(np.log(prr) + Z_95 * se_log_prr)
+    df["ror"] = ror
+    df["ror_lower"] = np.exp(np.log(ror) - Z_95 * se_log_ror)
+    df["ror_upper"] = np.exp(np.log(ror) + Z_95 * se_log_ror)
+    df["chi2"] = chi2
+    df["signal"] = (a >= MIN_CASES) & (prr >= MIN_PRR) & (np.nan_to_num(chi2) >= MIN_CHI2)
+    return df
+
+
+def signal_table(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Disproportionality statistics for every (study, term) in counts
+    (columns nct_id, ae_term, num_affected), strongest signals first.
+    """
+    if counts.empty:
+        return pd.DataFrame()
+
+    df = disproportionality(contingency_tables(counts))
+    return df.sort_values(["signal", "prr"], ascending=False).reset_index(drop=True)
@@ -0,0 +1,345 @@
+import argparse
+import json
+import random
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# ===========================================================================
+# Synthetic clinical-trial corpus
+#
+# Emits raw study JSON and adverseEventsModule payloads in exactly the
+# layout extract.py writes (data/raw/studies, data/raw/adverse_events), so
+# every downstream stage can be benchmarked offline at any scale. Each
+# study is generated from its own seeded RNG, so the same corpus can be
+# written to disk or served lazily from a fake /api/v2/studies endpoint.
+# ===========================================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+RAW_STUDIES_DIR = PROJECT_ROOT / "data" / "raw" / "studies"
+RAW_AE_DIR = PROJECT_ROOT / "data" / "raw" / "adverse_events"
+
+CONDITIONS = [
+    "Breast Cancer", "Non-small Cell Lung Cancer", "Prostate Cancer", "Colorectal Cancer",
+    "Melanoma", "Multiple Myeloma", "Acute Myeloid Leukemia", "Lymphoma",
+    "Pancreatic Cancer", "Ovarian Cancer", "Hepatocellular Carcinoma", "Glioblastoma",
+]
+PHASES = ["EARLY_PHASE1", "PHASE1", "PHASE2", "PHASE3", "PHASE4"]
+INTERVENTIONS = ["Pembrolizumab", "Nivolumab", "Carboplatin", "Paclitaxel", "Docetaxel",
+                 "Bevacizumab", "Cisplatin", "Gemcitabine", "Placebo", "Radiotherapy"]
+
+# Common terms first: with Zipf-like weights these dominate across studies,
+# and the generated long tail stands in for rare terms
+COMMON_TERMS = [
+    ("Nausea", "Gastrointestinal disorders"), ("Fatigue", "General disorders"),
+    ("Diarrhoea", "Gastrointestinal disorders"), ("Anaemia", "Blood and lymphatic system disorders"),
+    ("Neutropenia", "Blood and lymphatic system disorders"), ("Vomiting", "Gastrointestinal disorders"),
+    ("Decreased appetite", "Metabolism and nutrition disorders"), ("Constipation", "Gastrointestinal disorders"),
+    ("Alopecia", "Skin and subcutaneous tissue disorders"), ("Pyrexia", "General disorders"),
+    ("Rash", "Skin and subcutaneous tissue disorders"), ("Cough", "Respiratory, thoracic and mediastinal disorders"),
+    ("Dyspnoea", "Respiratory, thoracic and mediastinal disorders"), ("Headache", "Nervous system disorders"),
+    ("Peripheral sensory neuropathy", "Nervous system disorders"), ("Thrombocytopenia", "Blood and lymphatic system disorders"),
+    ("Pneumonia", "Infections and infestations"), ("Sepsis", "Infections and infestations"),
+    ("Febrile neutropenia", "Blood and lymphatic system disorders"), ("Pulmonary embolism", "Vascular disorders"),
+]
+ORGAN_SYSTEMS = sorted({organ for _, organ in COMMON_TERMS})
+
+# Columns of the validated CSVs, in the order load.py inserts them
+FRAME_COLUMNS = {
+    "studies": ["nct_id", "title", "last_updated"],
+    "conditions": ["nct_id", "condition"],
+    "phases": ["nct_id", "phase"],
+    "ae_groups": ["nct_id", "group_id", "group_title", "group_description",
+                  "num_death_affected", "num_death_at_risk", "num_serious_affected",
+                  "num_serious_at_risk", "num_other_affected", "num_other_at_risk"],
+    "aes": ["nct_id", "group_id", "ae_term", "organ_system", "vocabulary", "assessment_type",
+            "serious", "num_affected", "num_events", "num_at_risk", "last_updated"],
+}
+
+
+class SyntheticCorpus:
+    """
+    Deterministic corpus of n_studies studies.
+
+    skew is the Zipf exponent of AE term frequency across studies; higher
+    values concentrate reports on the common terms.
+    """
+
+    def __init__(self, n_studies: int = 1000, vocabulary_size: int = 1500, skew: float = 1.1,
+                 groups: tuple = (2, 4), serious_terms: tuple = (3, 20), other_terms: tuple = (10, 60),
+                 seed: int = 0):
+        self.n_studies = n_studies
+        self.groups = groups
+        self.serious_terms = serious_terms
+        self.other_terms = other_terms
+        self.seed = seed
+
+        self.vocabulary = list(COMMON_TERMS) + [
+            (f"Adverse event {i}", ORGAN_SYSTEMS[i % len(ORGAN_SYSTEMS)])
+            for i in range(max(vocabulary_size - len(COMMON_TERMS), 0))
+        ]
+        weights = [1 / rank ** skew for rank in range(1, len(self.vocabulary) + 1)]
+        total = sum(weights)
+        self.cum_weights = []
+        running = 0.0
+        for w in weights:
+            running += w / total
+            self.cum_weights.append(running)
+
+    def nct_id(self, i: int) -> str:
+        return f"NCT{90000000 + i:08d}"
+
+    def _rng(self, i: int, stream: int) -> random.Random:
+        return random.Random((self.seed * 1_000_003 + i) * 7 + stream)
+
+    def _sample_terms(self, rng: random.Random, k: int) -> list:
+        picked = {}
+        while len(picked) < min(k, len(self.vocabulary)):
+            idx = rng.choices(range(len(self.vocabulary)), cum_weights=self.cum_weights)[0]
+            picked.setdefault(idx, self.vocabulary[idx])
+        return list(picked.values())
+
+    # -----------------------------------------------------------------------
+    # Study records (as returned by /api/v2/studies)
+    # -----------------------------------------------------------------------
+    def study(self, i: int) -> dict:
+        rng = self._rng(i, 0)
+        conditions = rng.sample(CONDITIONS, k=rng.randint(1, 3))
+        phases = rng.sample(PHASES, k=rng.choice([0, 1, 1, 1, 2]))
+        interventions = rng.sample(INTERVENTIONS, k=rng.randint(1, 3))
+
+        design = {"phases": sorted(phases)} if phases else {}
+        return {
+            "protocolSection": {
+                "identificationModule": {
+                    "nctId": self.nct_id(i),
+                    "briefTitle": f"{' and '.join(interventions)} in Patients With {conditions[0]}",
+                },
+                "conditionsModule": {"conditions": conditions, "keywords": ["Oncology", "Cancer"]},
+                "designModule": design,
+                "armsInterventionsModule": {
+                    "interventions": [{"type": "DRUG", "name": name} for name in interventions]
+                },
+            }
+        }
+
+    def studies(self):
+        for i in range(self.n_studies):
+            yield self.study(i)
+
+    # -----------------------------------------------------------------------
+    # adverseEventsModule payloads
+    # -----------------------------------------------------------------------
+    def adverse_events(self, i: int) -> dict:
+        rng = self._rng(i, 1)
+
+        n_groups = rng.randint(*self.groups)
+        # Arm sizes are log-normal: most arms are small, a few are very large
+        at_risk = [max(5, int(rng.lognormvariate(4.3, 0.8))) for _ in range(n_groups)]
+        group_ids = [f"EG{g:03d}" for g in range(n_groups)]
+
+        def events(k, rate_scale):
+            rows = []
+            for term, organ in self._sample_terms(rng, k):
+                base_rate = rng.betavariate(0.6, 8) * rate_scale
+                stats = []
+                for group_id, n_risk in zip(group_ids, at_risk):
+                    affected = min(n_risk, int(n_risk * base_rate * rng.uniform(0.5, 1.5)))
+                    stats.append({
+                        "groupId": group_id,
+                        "numEvents": affected + int(affected * rng.uniform(0, 0.6)),
+                        "numAffected": affected,
+                        "numAtRisk": n_risk,
+                    })
+                rows.append({
+                    "term": term,
+                    "organSystem": organ,
+                    "sourceVocabulary": "MedDRA 26.0",
+                    "assessmentType": rng.choice(["SYSTEMATIC_ASSESSMENT", "NON_SYSTEMATIC_ASSESSMENT"]),
+                    "stats": stats,
+                })
+            return rows
+
+        serious_events = events(rng.randint(*self.serious_terms), 0.3)
+        other_events = events(rng.randint(*self.other_terms), 1.0)
+
+        def affected_in(rows, group_id):
+            return max((s["numAffected"] for r in rows for s in r["stats"] if s["groupId"] == group_id), default=0)
+
+        event_groups = []
+        for g, (group_id, n_risk) in enumerate(zip(group_ids, at_risk)):
+            event_groups.append({
+                "id": group_id,
+                "title": "Placebo" if g == n_groups - 1 and n_groups > 2 else f"Arm {chr(65 + g)}",
+                "description": f"Synthetic arm {g + 1} of {n_groups}",
+                "deathsNumAffected": int(n_risk * rng.uniform(0, 0.05)),
+                "deathsNumAtRisk": n_risk,
+                "seriousNumAffected": affected_in(serious_events, group_id),
+                "seriousNumAtRisk": n_risk,
+                "otherNumAffected": affected_in(other_events, group_id),
+                "otherNumAtRisk": n_risk,
+            })
+
+        return {
+            "frequencyThreshold": "5",
+            "timeFrame": "Up to 24 months",
+            "eventGroups": event_groups,
+            "seriousEvents": serious_events,
+            "otherEvents": other_events,
+        }
+
+    # -----------------------------------------------------------------------
+    # Validated frames (as read by load.py)
+    # -----------------------------------------------------------------------
+    def frames(self, last_updated: str = None) -> dict:
+        """
+        The corpus as the validated-CSV frames load.py reads, with the raw
+        fields mapped as transform_studies.py and transform_ae.py map them,
+        so databases can be built without running the file stages.
+        """
+        last_updated = last_updated or datetime.now(timezone.utc).isoformat()[:10]
+        rows = {table: [] for table in FRAME_COLUMNS}
+
+        for i in range(self.n_studies):
+            protocol = self.study(i)["protocolSection"]
+            nct_id = protocol["identificationModule"]["nctId"]
+            rows["studies"].append((nct_id, protocol["identificationModule"]["briefTitle"], last_updated))
+            rows["conditions"] += [(nct_id, c) for c in protocol["conditionsModule"]["conditions"]]
+            rows["phases"] += [(nct_id, p) for p in protocol["designModule"].get("phases", [])]
+
+            module = self.adverse_events(i)
+            for group in module["eventGroups"]:
+                rows["ae_groups"].append((
+                    nct_id, group["id"], group["title"], group["description"],
+                    group["deathsNumAffected"], group["deathsNumAtRisk"],
+                    group["seriousNumAffected"], group["seriousNumAtRisk"],
+                    group["otherNumAffected"], group["otherNumAtRisk"],
+                ))
+            for serious, events in ((1, module["seriousEvents"]), (0, module["otherEvents"])):
+                for event in events:
+                    for stat in event["stats"]:
+                        rows["aes"].append((
+                            nct_id, stat["groupId"], event["term"], event["organSystem"],
+                            event["sourceVocabulary"], event["assessmentType"], serious,
+                            stat["numAffected"], stat["numEvents"], stat["numAtRisk"], last_updated,
+                        ))
+
+        return {table: pd.DataFrame(rows[table], columns=columns) for table, columns in FRAME_COLUMNS.items()}
+
+
+# ===========================================================================
+# Write in the extract.py layout
+# ===========================================================================
+def write_corpus(corpus: SyntheticCorpus, studies_dir: Path = RAW_STUDIES_DIR, ae_dir: Path = RAW_AE_DIR):
+    studies_dir.mkdir(parents=True, exist_ok=True)
+    ae_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now(timezone.utc).isoformat()[:10]
+    with open(studies_dir / f"studies_{timestamp}.json", "w", encoding="utf-8") as f:
+        json.dump(list(corpus.studies()), f, indent=2)
+
+    for i in range(corpus.n_studies):
+        with open(ae_dir / f"{corpus.nct_id(i)}.json", "w", encoding="utf-8") as f:
+            json.dump(corpus.adverse_events(i), f, indent=2)
+
+    (ae_dir / "last_updated.txt").write_text(timestamp)
+    print(f"[Synthetic] Wrote {corpus.n_studies} studies to {studies_dir} and {ae_dir}")
+
+
+# ===========================================================================
+# Fake /api/v2/studies server
+# ===========================================================================
+def make_handler(corpus: SyntheticCorpus):
+    index = {corpus.nct_id(i): i for i in range(corpus.n_studies)}
+
+    class StudiesHandler(BaseHTTPRequestHandler):
+        """
+        Supports what extract.py sends: query.cond, filter.ids, fields,
+        pageSize and pageToken. Other filters are accepted and ignored.
+        """
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/api/v2/studies":
+                self.send_error(404)
+                return
+
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            page_size = min(int(params.get("pageSize", 10)), 1000)
+            offset = int(params.get("pageToken", 0))
+
+            if "filter.ids" in params:
+                ids = [i for i in params["filter.ids"].split(",") if i in index]
+                matches = [index[i] for i in ids]
+            else:
+                # The real API also matches broader terms; keywords stand in for that
+                condition = params.get("query.cond", "").lower()
+                matches = []
+                for i in range(corpus.n_studies):
+                    module = corpus.study(i)["protocolSection"]["conditionsModule"]
+                    terms = module["conditions"] + module["keywords"]
+                    if not condition or any(condition in term.lower() for term in terms):
+                        matches.append(i)
+
+            page = matches[offset:offset + page_size]
+            with_results = "resultsSection" in params.get("fields", "") or "adverseEventsModule" in params.get("fields", "")
+
+            studies = []
+            for i in page:
+                study = corpus.study(i)
+                if with_results:
+                    study = {
+                        "protocolSection": {"identificationModule": study["protocolSection"]["identificationModule"]},
+                        "resultsSection": {"adverseEventsModule": corpus.adverse_events(i)},
+                    }
+                studies.append(study)
+
+            body = {"studies": studies}
+            if offset + page_size < len(matches):
+                body["nextPageToken"] = str(offset + page_size)
+
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StudiesHandler
+
+
+def serve(corpus: SyntheticCorpus, host: str = "127.0.0.1", port: int = 8765):
+    server = ThreadingHTTPServer((host, port), make_handler(corpus))
+    print(f"[Synthetic] Serving {corpus.n_studies} studies at http://{host}:{port}/api/v2/studies")
+    print(f"[Synthetic] Run extraction against it with CTGOV_API_URL=http://{host}:{port}/api/v2/studies")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic ClinicalTrials.gov corpus.")
+    parser.add_argument("--studies", type=int, default=1000, help="number of studies")
+    parser.add_argument("--vocabulary", type=int, default=1500, help="number of distinct AE terms")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of AE term frequency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-write", action="store_true", help="do not write data/raw files")
+    parser.add_argument("--serve", action="store_true", help="serve the corpus from a fake /api/v2/studies")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.studies, vocabulary_size=args.vocabulary, skew=args.skew, seed=args.seed)
+
+    if not args.no_write:
+        write_corpus(corpus)
+    if args.serve:
+        serve(corpus, port=args.port)
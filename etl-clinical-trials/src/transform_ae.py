@@ -2,6 +2,8 @@ import pandas as pd
 import json
 from pathlib import Path
 
+from instrumentation import PipelineRecorder
+
 # ===========================================================================
 # Project paths
 # ===========================================================================
@@ -14,17 +16,23 @@ PROCESSED_DATA_DIR = PROJECT_ROOT / "data" / "processed"
 RAW_AE_DIR.mkdir(parents=True, exist_ok=True)
 PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+recorder = PipelineRecorder("transform_ae")
+
 # ===========================================================================
 # Load AE JSON files
 # ===========================================================================
 ae_files = sorted(RAW_AE_DIR.glob("*.json"))
 all_aes = []
 
-for file in ae_files:
-    nct_id = file.stem
-    with open(file, "r", encoding="utf-8") as f:
-        ae_raw_data = json.load(f)
-        all_aes.append((nct_id, ae_raw_data))
+with recorder.step("read_raw") as step:
+    for file in ae_files:
+        nct_id = file.stem
+        with open(file, "r", encoding="utf-8") as f:
+            ae_raw_data = json.load(f)
+            all_aes.append((nct_id, ae_raw_data))
+
+    step.read(*ae_files)
+    step.rows_out = len(all_aes)
 
 # Load last updated timestamp
 last_updated_path = RAW_AE_DIR / "last_updated.txt"
@@ -67,50 +75,55 @@ def process_events(event_list, nct_id, serious_flag, last_updated):
 # ===========================================================================
 # Transform AE data
 # ===========================================================================
-processed_events_data = []
-processed_ae_groups_data = []
-
-for nct_id, ae_data in all_aes:
-
-    serious_events = ae_data.get("seriousEvents", [])
-    other_events = ae_data.get("otherEvents", [])
-    ae_groups = ae_data.get("eventGroups", [])
-
-    # ---- AE EVENTS (term-level, group-aware) ----
-    processed_events_data.extend(
-        process_events(serious_events, nct_id, 1, last_updated_date)
-    )
-
-    processed_events_data.extend(
-        process_events(other_events, nct_id, 0, last_updated_date)
-    )
-
-    # ---- AE GROUPS (arm-level metadata) ----
-    for group in ae_groups:
-        processed_ae_groups_data.append({
-            "nct_id": nct_id,
-            "group_id": group.get("id"),
-            "group_title": group.get("title"),
-            "group_description": group.get("description"),
-            "num_death_affected": group.get("deathsNumAffected"),
-            "num_death_at_risk": group.get("deathsNumAtRisk"),
-            "num_serious_affected": group.get("seriousNumAffected"),
-            "num_serious_at_risk": group.get("seriousNumAtRisk"),
-            "num_other_affected": group.get("otherNumAffected"),
-            "num_other_at_risk": group.get("otherNumAtRisk"),
-        })
+with recorder.step("build_frames", rows_in=len(all_aes)) as step:
+    processed_events_data = []
+    processed_ae_groups_data = []
 
-# ===========================================================================
-# Create DataFrames
-# ===========================================================================
-ae_df = pd.DataFrame(processed_events_data)
-ae_groups_df = pd.DataFrame(processed_ae_groups_data)
+    for nct_id, ae_data in all_aes:
+
+        serious_events = ae_data.get("seriousEvents", [])
+        other_events = ae_data.get("otherEvents", [])
+        ae_groups = ae_data.get("eventGroups", [])
+
+        # ---- AE EVENTS (term-level, group-aware) ----
+        processed_events_data.extend(
+            process_events(serious_events, nct_id, 1, last_updated_date)
+        )
+
+        processed_events_data.extend(
+            process_events(other_events, nct_id, 0, last_updated_date)
+        )
+
+        # ---- AE GROUPS (arm-level metadata) ----
+        for group in ae_groups:
+            processed_ae_groups_data.append({
+                "nct_id": nct_id,
+                "group_id": group.get("id"),
+                "group_title": group.get("title"),
+                "group_description": group.get("description"),
+                "num_death_affected": group.get("deathsNumAffected"),
+                "num_death_at_risk": group.get("deathsNumAtRisk"),
+                "num_serious_affected": group.get("seriousNumAffected"),
+                "num_serious_at_risk": group.get("seriousNumAtRisk"),
+                "num_other_affected": group.get("otherNumAffected"),
+                "num_other_at_risk": group.get("otherNumAtRisk"),
+            })
+
+    # ---- Create DataFrames ----
+    ae_df = pd.DataFrame(processed_events_data)
+    ae_groups_df = pd.DataFrame(processed_ae_groups_data)
+
+    step.rows_out = len(ae_df) + len(ae_groups_df)
 
 # ===========================================================================
 # Write outputs
 # ===========================================================================
-ae_df.to_csv(PROCESSED_DATA_DIR / "ae.csv", index=False)
-ae_groups_df.to_csv(PROCESSED_DATA_DIR / "ae_groups.csv", index=False)
+with recorder.step("write_processed", rows_in=len(ae_df) + len(ae_groups_df)) as step:
+    ae_df.to_csv(PROCESSED_DATA_DIR / "ae.csv", index=False)
+    ae_groups_df.to_csv(PROCESSED_DATA_DIR / "ae_groups.csv", index=False)
+
+    step.rows_out = step.rows_in
+    step.wrote(PROCESSED_DATA_DIR / "ae.csv", PROCESSED_DATA_DIR / "ae_groups.csv")
 
 # ===========================================================================
 # Verification
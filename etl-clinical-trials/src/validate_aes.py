@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
+from instrumentation import PipelineRecorder
+
 # ===========================================================================
     # Root definition and raw data extraction
 # ===========================================================================
@@ -10,8 +12,14 @@ VALIDATED_DATA_DIR = PROJECT_ROOT / "data" / "validated"
 
 
 
-ae_df = pd.read_csv(PROCESSED_DATA_DIR / "ae.csv")
-ae_grous_df = pd.read_csv(PROCESSED_DATA_DIR / "ae_groups.csv")
+recorder = PipelineRecorder("validate_aes")
+
+with recorder.step("read_processed") as step:
+    ae_df = pd.read_csv(PROCESSED_DATA_DIR / "ae.csv")
+    ae_grous_df = pd.read_csv(PROCESSED_DATA_DIR / "ae_groups.csv")
+
+    step.read(PROCESSED_DATA_DIR / "ae.csv", PROCESSED_DATA_DIR / "ae_groups.csv")
+    step.rows_out = len(ae_df) + len(ae_grous_df)
 
 def validate_ae(df: pd.DataFrame, eliminate_nulls: bool = True, eliminate_dups: bool = True) -> pd.DataFrame:
 
@@ -135,10 +143,19 @@ def validate_ae_groups(df: pd.DataFrame, eliminate_nulls: bool = True, eliminate
 
 
 def validate_files():
-    validated_ae = validate_ae(ae_df)
-    validated_ae_groups = validate_ae_groups(ae_grous_df)
+    with recorder.step("validate_ae", rows_in=len(ae_df)) as step:
+        validated_ae = validate_ae(ae_df)
+        step.rows_out = len(validated_ae)
+
+    with recorder.step("validate_ae_groups", rows_in=len(ae_grous_df)) as step:
+        validated_ae_groups = validate_ae_groups(ae_grous_df)
+        step.rows_out = len(validated_ae_groups)
     
-    validated_ae.to_csv(VALIDATED_DATA_DIR / "validated_ae.csv", index=False)
-    validated_ae_groups.to_csv(VALIDATED_DATA_DIR / "validated_ae_groups.csv", index=False)
+    with recorder.step("write_validated") as step:
+        validated_ae.to_csv(VALIDATED_DATA_DIR / "validated_ae.csv", index=False)
+        validated_ae_groups.to_csv(VALIDATED_DATA_DIR / "validated_ae_groups.csv", index=False)
+
+        step.rows_out = len(validated_ae) + len(validated_ae_groups)
+        step.wrote(VALIDATED_DATA_DIR / "validated_ae.csv", VALIDATED_DATA_DIR / "validated_ae_groups.csv")
     
 validate_files()
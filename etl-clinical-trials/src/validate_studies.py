@@ -1,6 +1,8 @@
 import pandas as pd
 from pathlib import Path
 
+from instrumentation import PipelineRecorder
+
 # ===========================================================================
     # Root definition and raw data extraction
 # ===========================================================================
@@ -9,9 +11,15 @@ PROCESSED_DATA_DIR = PROJECT_ROOT / "data" / "processed"
 VALIDATED_DATA_DIR = PROJECT_ROOT / "data" / "validated"
 
 
-studies_df = pd.read_csv(PROCESSED_DATA_DIR / "studies.csv")
-conditions_df = pd.read_csv(PROCESSED_DATA_DIR / "conditions.csv")
-phases_df = pd.read_csv(PROCESSED_DATA_DIR / "phases.csv")
+recorder = PipelineRecorder("validate_studies")
+
+with recorder.step("read_processed") as step:
+    studies_df = pd.read_csv(PROCESSED_DATA_DIR / "studies.csv")
+    conditions_df = pd.read_csv(PROCESSED_DATA_DIR / "conditions.csv")
+    phases_df = pd.read_csv(PROCESSED_DATA_DIR / "phases.csv")
+
+    step.read(*(PROCESSED_DATA_DIR / name for name in ("studies.csv", "conditions.csv", "phases.csv")))
+    step.rows_out = len(studies_df) + len(conditions_df) + len(phases_df)
 
 
 
@@ -38,7 +46,7 @@ def validate_studies(df: pd.DataFrame, eliminate_nulls: bool = True, eliminate_d
     n_dups = dup_mask.sum()
 
     if n_dups > 0:
-        print(f"[AE] {n_dups} duplicate AE rows found")
+        print(f"[Studies] {n_dups} duplicate study rows found")
 
         if eliminate_dups:
             df = df.loc[~dup_mask]
@@ -76,7 +84,7 @@ def validate_conditions(df: pd.DataFrame, eliminate_nulls: bool = True, eliminat
     n_dups = dup_mask.sum()
 
     if n_dups > 0:
-        print(f"[Conditions] {n_dups} duplicate AE rows found")
+        print(f"[Conditions] {n_dups} duplicate condition rows found")
 
         if eliminate_dups:
             df = df.loc[~dup_mask]
@@ -86,7 +94,7 @@ def validate_conditions(df: pd.DataFrame, eliminate_nulls: bool = True, eliminat
     # -------------------------------------------------------------------
     df.reset_index(drop=True, inplace=True)
 
-    print(f"[Studies] Validation complete → {len(df)} rows remaining")
+    print(f"[Conditions] Validation complete → {len(df)} rows remaining")
 
     return df
 
@@ -132,12 +140,25 @@ def validate_phases(df: pd.DataFrame, eliminate_nulls: bool = True, eliminate_du
 
 
 def validate_files():
-    validated_studies_df = validate_studies(studies_df)
-    validated_conditions_df = validate_conditions(conditions_df)
-    validated_phases_df = validate_phases(phases_df)
+    with recorder.step("validate_studies", rows_in=len(studies_df)) as step:
+        validated_studies_df = validate_studies(studies_df)
+        step.rows_out = len(validated_studies_df)
+
+    with recorder.step("validate_conditions", rows_in=len(conditions_df)) as step:
+        validated_conditions_df = validate_conditions(conditions_df)
+        step.rows_out = len(validated_conditions_df)
+
+    with recorder.step("validate_phases", rows_in=len(phases_df)) as step:
+        validated_phases_df = validate_phases(phases_df)
+        step.rows_out = len(validated_phases_df)
     
-    validated_studies_df.to_csv(VALIDATED_DATA_DIR / "validated_studies.csv", index= False)
-    validated_conditions_df.to_csv(VALIDATED_DATA_DIR / "validated_conditions.csv", index= False)
-    validated_phases_df.to_csv(VALIDATED_DATA_DIR / "validated_phases.csv", index= False)
+    with recorder.step("write_validated") as step:
+        validated_studies_df.to_csv(VALIDATED_DATA_DIR / "validated_studies.csv", index= False)
+        validated_conditions_df.to_csv(VALIDATED_DATA_DIR / "validated_conditions.csv", index= False)
+        validated_phases_df.to_csv(VALIDATED_DATA_DIR / "validated_phases.csv", index= False)
+
+        step.rows_out = len(validated_studies_df) + len(validated_conditions_df) + len(validated_phases_df)
+        step.wrote(*(VALIDATED_DATA_DIR / name for name in
+                     ("validated_studies.csv", "validated_conditions.csv", "validated_phases.csv")))
     
 validate_files()
\ No newline at end of file
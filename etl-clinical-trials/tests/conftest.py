@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# The stages import each other as top-level modules, as when run from src/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+def make_frames(n_studies: int = 6, conditions: list = ("Melanoma", "Lymphoma", "Glioblastoma"),
+                last_updated: str = "2024-01-15") -> dict:
+    """Validated-CSV shaped frames: two groups and two AE terms per study."""
+    nct_ids = [f"NCT{i:08d}" for i in range(n_studies)]
+    rows = [(nct_id, f"EG00{g}", term, serious)
+            for nct_id in nct_ids for g in range(2) for term, serious in (("Nausea", 0), ("Sepsis", 1))]
+
+    return {
+        "studies": pd.DataFrame({"nct_id": nct_ids, "title": [f"Study {i}" for i in range(n_studies)],
+                                 "last_updated": last_updated}),
+        "conditions": pd.DataFrame({"nct_id": nct_ids,
+                                    "condition": [conditions[i % len(conditions)] for i in range(n_studies)]}),
+        "phases": pd.DataFrame({"nct_id": nct_ids, "phase": "PHASE2"}),
+        "ae_groups": pd.DataFrame({
+            "nct_id": [n for n in nct_ids for _ in range(2)],
+            "group_id": ["EG000", "EG001"] * n_studies,
+            "group_title": ["Arm A", "Placebo"] * n_studies,
+            "group_description": "Synthetic arm",
+            "num_death_affected": 0, "num_death_at_risk": 50,
+            "num_serious_affected": 1, "num_serious_at_risk": 50,
+            "num_other_affected": 5, "num_other_at_risk": 50,
+        }),
+        "aes": pd.DataFrame({
+            "nct_id": [r[0] for r in rows],
+            "group_id": [r[1] for r in rows],
+            "ae_term": [r[2] for r in rows],
+            "organ_system": "General disorders",
+            "vocabulary": "MedDRA",
+            "assessment_type": "SYSTEMATIC_ASSESSMENT",
+            "serious": [r[3] for r in rows],
+            "num_affected": 5,
+            "num_events": 6,
+            "num_at_risk": 50,
+            "last_updated": last_updated,
+        }),
+    }
+
+
+@pytest.fixture
+def frames():
+    return make_frames()
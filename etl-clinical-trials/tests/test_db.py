@@ -0,0 +1,71 @@
+import os
+import threading
+
+import pytest
+
+from conftest import make_frames
+from db import ConnectionPool
+from load import load_frames, load_sharded
+
+
+@pytest.fixture
+def db_path(tmp_path, frames):
+    path = tmp_path / "clinical_trials.db"
+    load_frames(path, frames)
+    return path
+
+
+def connect_calls(pool: ConnectionPool) -> int:
+    return sum(1 for label, _ in pool.timings if label == "connect")
+
+
+def test_pool_reuses_connections_across_short_lived_threads(tmp_path, db_path):
+    # Streamlit serves every rerun from a new script thread
+    pool = ConnectionPool(db_path, tmp_path / "shards", size=2)
+    fds_before = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+
+    for _ in range(200):
+        thread = threading.Thread(target=pool.generation)
+        thread.start()
+        thread.join()
+
+    assert connect_calls(pool) == 1
+    if fds_before is not None:
+        assert len(os.listdir("/proc/self/fd")) - fds_before < 10
+    pool.close()
+
+
+def test_pool_never_opens_more_than_size_connections(tmp_path, db_path):
+    pool = ConnectionPool(db_path, tmp_path / "shards", size=3)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        for _ in range(20):
+            results.append(len(pool.query("SELECT nct_id FROM studies")))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [6] * 160
+    assert 1 <= connect_calls(pool) <= 3
+    pool.close()
+
+
+def test_pool_attaches_shards_added_after_it_opened(tmp_path):
+    shard_dir = tmp_path / "shards"
+    load_sharded(make_frames(n_studies=4, last_updated="2024-01-15"), "month", shard_dir, workers=1)
+    pool = ConnectionPool(tmp_path / "missing.db", shard_dir, size=1)
+    generation = pool.generation()
+    assert len(pool.query("SELECT nct_id FROM studies")) == 4
+
+    load_sharded(make_frames(n_studies=6, last_updated="2024-02-15"), "month", shard_dir, workers=1)
+
+    assert pool.generation() != generation
+    assert len(pool.query("SELECT nct_id FROM studies")) == 6
+    assert len(pool.search_schemas()) == 2
+    pool.close()
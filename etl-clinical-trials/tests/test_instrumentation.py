@@ -0,0 +1,31 @@
+import json
+
+from instrumentation import PipelineRecorder, read_run_log, write_run_report
+
+
+def test_steps_report_process_peak_and_growth(tmp_path):
+    recorder = PipelineRecorder("load", run_id="test", report_dir=tmp_path, trace=True)
+    with recorder.step("small"):
+        pass
+    with recorder.step("large"):
+        block = bytearray(64 * 2 ** 20)
+        block[::4096] = b"x" * len(block[::4096])
+    recorder.finish()
+
+    small, large = read_run_log("test", tmp_path)
+    assert large["process_peak_rss_mib"] >= small["process_peak_rss_mib"]
+    assert large["peak_rss_growth_mib"] > 32
+
+    report = json.loads((tmp_path / "run_test.json").read_text())
+    assert report["stages"]["load"]["peak_rss_mib"] == large["process_peak_rss_mib"]
+
+
+def test_reports_are_replaced_without_leftover_tmp_files(tmp_path):
+    recorder = PipelineRecorder("load", run_id="test", report_dir=tmp_path)
+    with recorder.step("only"):
+        pass
+    recorder.finish()
+    write_run_report("test", tmp_path, trace=True)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run_test.json", "run_test.jsonl", "run_test.trace.json"]
+    assert json.loads((tmp_path / "run_test.trace.json").read_text())["traceEvents"]
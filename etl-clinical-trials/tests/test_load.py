@@ -0,0 +1,85 @@
+import pytest
+
+from conftest import make_frames
+from db import MAX_SHARDS, connect_readonly, shard_paths
+from load import assign_shards, load_sharded
+
+
+def view_counts(tmp_path) -> dict:
+    conn = connect_readonly(tmp_path / "missing.db", tmp_path / "shards")
+    try:
+        return {
+            table: conn.execute(f"SELECT COUNT(*), COUNT(DISTINCT nct_id) FROM {table}").fetchone()
+            for table in ("studies", "conditions", "aes", "ae_groups", "ae_incidence")
+        }
+    finally:
+        conn.close()
+
+
+def test_assign_shards_puts_every_row_in_one_shard(frames):
+    shards = assign_shards(frames, "month")
+
+    assert list(shards) == ["2024_01"]
+    for table, df in frames.items():
+        assert sum(len(parts[table]) for parts in shards.values()) == len(df)
+
+
+def test_assign_shards_keeps_placed_studies(frames):
+    placed = {"NCT00000000": "2023_12"}
+    shards = assign_shards(frames, "month", placed)
+
+    assert set(shards["2023_12"]["studies"]["nct_id"]) == {"NCT00000000"}
+    assert set(shards["2023_12"]["aes"]["nct_id"]) == {"NCT00000000"}
+    assert "NCT00000000" not in set(shards["2024_01"]["studies"]["nct_id"])
+
+
+def test_condition_shards_stay_within_attach_limit():
+    conditions = [f"Condition {i}" for i in range(3 * MAX_SHARDS)]
+    shards = assign_shards(make_frames(n_studies=60, conditions=conditions), "condition")
+
+    assert len(shards) <= MAX_SHARDS
+    assert all(key.startswith("condition_") for key in shards)
+
+
+def test_reload_with_changed_month_keeps_view_counts(tmp_path):
+    shard_dir = tmp_path / "shards"
+    load_sharded(make_frames(last_updated="2024-01-15"), "month", shard_dir, workers=1)
+    before = view_counts(tmp_path)
+
+    # A later extract stamps every study with a new snapshot date
+    load_sharded(make_frames(last_updated="2024-02-15"), "month", shard_dir, workers=1)
+
+    assert [path.name for path in shard_paths(shard_dir)] == ["clinical_trials_2024_01.db"]
+    assert view_counts(tmp_path) == before
+    assert before["studies"] == (6, 6)
+
+
+def test_new_studies_go_to_their_own_month(tmp_path):
+    shard_dir = tmp_path / "shards"
+    load_sharded(make_frames(n_studies=4, last_updated="2024-01-15"), "month", shard_dir, workers=1)
+    load_sharded(make_frames(n_studies=6, last_updated="2024-02-15"), "month", shard_dir, workers=1)
+
+    assert len(shard_paths(shard_dir)) == 2
+    assert view_counts(tmp_path)["studies"] == (6, 6)
+
+
+def test_condition_load_opens_in_dashboard(tmp_path):
+    conditions = [f"Condition {i}" for i in range(12)]
+    load_sharded(make_frames(n_studies=24, conditions=conditions), "condition", tmp_path / "shards", workers=2)
+
+    assert len(shard_paths(tmp_path / "shards")) <= MAX_SHARDS
+    assert view_counts(tmp_path)["studies"] == (24, 24)
+
+
+def test_load_refuses_more_shards_than_readers_can_attach(tmp_path):
+    shard_dir = tmp_path / "shards"
+    for month in range(1, MAX_SHARDS + 1):
+        frames = make_frames(n_studies=1, last_updated=f"2024-{month:02d}-01")
+        frames = {table: df.assign(nct_id=f"NCT{month:08d}") for table, df in frames.items()}
+        load_sharded(frames, "month", shard_dir, workers=1)
+
+    frames = {table: df.assign(nct_id="NCT99999999") for table, df in make_frames(1, last_updated="2025-01-01").items()}
+    with pytest.raises(ValueError, match="at most"):
+        load_sharded(frames, "month", shard_dir, workers=1)
+    assert len(shard_paths(shard_dir)) == MAX_SHARDS
+    assert view_counts(tmp_path)["studies"] == (MAX_SHARDS, MAX_SHARDS)
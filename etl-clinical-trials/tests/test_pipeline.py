@@ -0,0 +1,104 @@
+import argparse
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+import pipeline
+
+
+@pytest.fixture
+def load_stage(tmp_path, monkeypatch):
+    """The load stage alone, on tmp inputs and outputs, with a fake runner that writes the outputs."""
+    validated = tmp_path / "validated"
+    validated.mkdir()
+    (validated / "validated_studies.csv").write_text("nct_id\nNCT00000000\n")
+    db_path = tmp_path / "clinical_trials.db"
+    shard_dir = tmp_path / "shards"
+
+    monkeypatch.setattr(pipeline, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(pipeline, "PROCESSED_DATA_DIR", tmp_path / "processed")
+    monkeypatch.setattr(pipeline, "VALIDATED_DATA_DIR", validated)
+    monkeypatch.setattr(pipeline, "SHARD_DIR", shard_dir)
+    monkeypatch.setitem(pipeline.STAGES, "load", {**pipeline.STAGES["load"], "inputs": [validated],
+                                                  "outputs": [db_path]})
+
+    state = {}
+    monkeypatch.setattr(pipeline, "read_state", lambda: state)
+    monkeypatch.setattr(pipeline, "write_state", lambda state: None)
+
+    runs = []
+
+    def run_stage(stage, extra_args, env):
+        runs.append(list(extra_args))
+        output = shard_dir / "clinical_trials_2024_01.db" if extra_args else db_path
+        output.parent.mkdir(exist_ok=True)
+        output.write_bytes(b"")
+        return 0
+
+    monkeypatch.setattr(pipeline, "run_stage", run_stage)
+    return SimpleNamespace(runs=runs, db_path=db_path, shard_dir=shard_dir, validated=validated)
+
+
+def run_load(shard_by: str = None) -> bool:
+    stage_args = {"load": ["--shard-by", shard_by]} if shard_by else {}
+    return pipeline.run_pipeline(["load"], stage_args=stage_args)
+
+
+def test_load_skipped_when_inputs_unchanged(load_stage):
+    assert run_load() and run_load()
+    assert len(load_stage.runs) == 1
+
+
+def test_load_reruns_when_database_deleted(load_stage):
+    run_load()
+    load_stage.db_path.unlink()
+    run_load()
+    assert len(load_stage.runs) == 2
+    assert load_stage.db_path.exists()
+
+
+def test_load_reruns_when_inputs_change(load_stage):
+    run_load()
+    (load_stage.validated / "validated_studies.csv").write_text("nct_id\nNCT00000001\n")
+    run_load()
+    assert len(load_stage.runs) == 2
+
+
+def test_sharded_load_checks_shard_dir(load_stage):
+    run_load("month")
+    run_load("month")
+    assert load_stage.runs == [["--shard-by", "month"]]
+    assert not load_stage.db_path.exists()
+
+    shutil.rmtree(load_stage.shard_dir)
+    run_load("month")
+    assert len(load_stage.runs) == 2
+
+
+def test_changing_shard_key_reruns_load(load_stage):
+    run_load("month")
+    run_load("condition")
+    assert len(load_stage.runs) == 2
+
+
+def test_stage_outputs():
+    assert pipeline.stage_outputs("load") == [pipeline.DB_PATH]
+    assert pipeline.stage_outputs("load", ["--shard-by", "condition"]) == [pipeline.SHARD_DIR]
+    assert pipeline.stage_outputs("validate_aes", ["--shard-by", "condition"]) == pipeline.STAGES["validate_aes"]["outputs"]
+
+
+@pytest.mark.parametrize("jobs", [0, -1])
+def test_rejects_jobs_below_one(load_stage, jobs):
+    with pytest.raises(ValueError):
+        pipeline.run_pipeline(["load"], jobs=jobs)
+    assert load_stage.runs == []
+
+
+def test_jobs_argument_must_be_positive():
+    assert pipeline.positive_int("3") == 3
+    for value in ("0", "-2"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            pipeline.positive_int(value)
+    with pytest.raises(ValueError):
+        pipeline.positive_int("two")
@@ -0,0 +1,74 @@
+import pytest
+
+from conftest import make_frames
+from db import connect_readonly, search_schemas
+from load import load_frames, load_sharded
+from queries import _fts_prefix_query, ordinal, study_search_query
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1, "1st"), (2, "2nd"), (3, "3rd"), (4, "4th"), (0, "0th"),
+    (11, "11th"), (12, "12th"), (13, "13th"), (21, "21st"), (22, "22nd"),
+    (71, "71st"), (100, "100th"), (101, "101st"), (111, "111th"), (112, "112th"),
+    (70.6, "71st"), (2.4, "2nd"),
+])
+def test_ordinal(value, expected):
+    assert ordinal(value) == expected
+
+
+# ===========================================================================
+# Study search
+# ===========================================================================
+@pytest.mark.parametrize("text, expected", [
+    ("Melanoma", '"melanoma"*'),
+    ("  phase2   mel ", '"phase2"* "mel"*'),
+    ('mel* OR "x" NOT (lym', '"mel"* "or"* "x"* "not"* "lym"*'),
+    ("NCT00000001", '"nct00000001"*'),
+    ("", ""),
+    ("*()-", ""),
+])
+def test_fts_prefix_query_quotes_every_token(text, expected):
+    assert _fts_prefix_query(text) == expected
+
+
+@pytest.mark.parametrize("text, schemas", [("", ["main"]), ("()", ["main"]), ("melanoma", [])])
+def test_study_search_without_match_pages_by_nct_id(text, schemas):
+    sql, params = study_search_query(text, schemas, limit=20, offset=40)
+    assert "MATCH" not in sql and "ORDER BY nct_id" in sql
+    assert params == (20, 40)
+
+
+def test_study_search_matches_every_schema():
+    sql, params = study_search_query("mel", ["shard_0", "shard_1"], limit=10)
+    assert sql.count("MATCH ?") == 2
+    assert "shard_0.studies_fts" in sql and "shard_1.studies_fts" in sql
+    assert params == ('"mel"*', '"mel"*', 10, 0)
+
+
+def search(conn, text: str, limit: int = 100) -> list:
+    return [nct_id for nct_id, _ in conn.execute(*study_search_query(text, search_schemas(conn), limit))]
+
+
+def test_study_search_on_single_database(tmp_path):
+    db_path = tmp_path / "clinical_trials.db"
+    load_frames(db_path, make_frames(6))
+    conn = connect_readonly(db_path, tmp_path / "shards")
+    try:
+        assert search(conn, "mela") == ["NCT00000000", "NCT00000003"]
+        assert search(conn, "lymphoma phase2") == ["NCT00000001", "NCT00000004"]
+        assert search(conn, 'melanoma OR "lymphoma"') == []
+        assert search(conn, "") == [f"NCT{i:08d}" for i in range(6)]
+        assert search(conn, "", limit=2) == ["NCT00000000", "NCT00000001"]
+    finally:
+        conn.close()
+
+
+def test_study_search_across_shards(tmp_path):
+    load_sharded(make_frames(6), "condition", tmp_path / "shards", workers=1)
+    conn = connect_readonly(tmp_path / "missing.db", tmp_path / "shards")
+    try:
+        assert len(search_schemas(conn)) > 1
+        assert sorted(search(conn, "glio")) == ["NCT00000002", "NCT00000005"]
+        assert sorted(search(conn, "study")) == [f"NCT{i:08d}" for i in range(6)]
+    finally:
+        conn.close()
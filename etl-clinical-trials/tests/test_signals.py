@@ -0,0 +1,70 @@
+import math
+
+import pandas as pd
+import pytest
+
+from signals import Z_95, contingency_tables, signal_table
+
+
+def counts(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["nct_id", "ae_term", "num_affected"])
+
+
+def row(df: pd.DataFrame, nct_id: str, ae_term: str) -> pd.Series:
+    return df[(df["nct_id"] == nct_id) & (df["ae_term"] == ae_term)].iloc[0]
+
+
+def test_contingency_cells():
+    tables = contingency_tables(counts([("S1", "T1", 10), ("S1", "T2", 20), ("S2", "T1", 5), ("S2", "T2", 65)]))
+    cells = row(tables, "S1", "T1")[list("abcd")].tolist()
+    assert cells == [10, 20, 5, 65]
+    assert (tables[list("abcd")].sum(axis=1) == 100).all()
+
+
+def test_prr_ror_and_yates_chi2():
+    # a=10, b=20, c=5, d=65
+    result = row(signal_table(counts([("S1", "T1", 10), ("S1", "T2", 20),
+                                      ("S2", "T1", 5), ("S2", "T2", 65)])), "S1", "T1")
+
+    prr = (10 / 30) / (5 / 70)
+    se_log_prr = math.sqrt(1 / 10 - 1 / 30 + 1 / 5 - 1 / 70)
+    assert result["prr"] == pytest.approx(prr)
+    assert result["prr_lower"] == pytest.approx(prr * math.exp(-Z_95 * se_log_prr))
+    assert result["prr_upper"] == pytest.approx(prr * math.exp(Z_95 * se_log_prr))
+
+    ror = 10 * 65 / (20 * 5)
+    se_log_ror = math.sqrt(1 / 10 + 1 / 20 + 1 / 5 + 1 / 65)
+    assert result["ror"] == pytest.approx(ror)
+    assert result["ror_lower"] == pytest.approx(ror * math.exp(-Z_95 * se_log_ror))
+    assert result["ror_upper"] == pytest.approx(ror * math.exp(Z_95 * se_log_ror))
+
+    # (|ad - bc| - n/2)^2 n / ((a+b)(c+d)(a+c)(b+d))
+    assert result["chi2"] == pytest.approx(100 * (550 - 50) ** 2 / (30 * 70 * 15 * 85))
+    assert result["signal"]
+
+
+def test_haldane_correction_for_empty_cells():
+    # a=4, b=0, c=0, d=6: the ratios add 0.5 to every cell, chi-squared does not
+    result = row(signal_table(counts([("S1", "T1", 4), ("S2", "T2", 6)])), "S1", "T1")
+
+    assert result["prr"] == pytest.approx((4.5 / 5) / (0.5 / 7))
+    assert result["ror"] == pytest.approx(4.5 * 6.5 / (0.5 * 0.5))
+    assert result["chi2"] == pytest.approx(10 * (24 - 5) ** 2 / (4 * 6 * 4 * 6))
+    assert math.isfinite(result["prr_lower"]) and math.isfinite(result["ror_upper"])
+
+
+def test_screening_needs_three_cases():
+    # Disproportionate, but a=2 is below MIN_CASES
+    result = row(signal_table(counts([("S1", "T1", 2), ("S1", "T2", 1),
+                                      ("S2", "T1", 1), ("S2", "T2", 200)])), "S1", "T1")
+    assert result["prr"] > 2 and not result["signal"]
+
+
+def test_strongest_signals_first():
+    table = signal_table(counts([("S1", "T1", 10), ("S1", "T2", 20), ("S2", "T1", 5), ("S2", "T2", 65)]))
+    assert table["signal"].is_monotonic_decreasing
+    assert table.loc[0, ["nct_id", "ae_term"]].tolist() == ["S1", "T1"]
+
+
+def test_empty_counts():
+    assert signal_table(counts([])).empty
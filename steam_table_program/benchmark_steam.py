@@ -0,0 +1,411 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from parallel_evaluation import OUTPUT_KEYS, ParallelEvaluator
+from property_tables import RELATIVE_ERROR, TABLE_PROPERTIES, PropertyTables
+from steam_table_generator import (DERIVATIVE_KEYS, REGIONS, Region1, Region2, Region3, Region4, PowerTable,
+                                   classify_region, flash, properties, P_TRIPLE)
+from verify_if97 import verify
+
+# ===========================================================================
+# Benchmark of the steam property evaluation
+#
+# Times the vectorized γ evaluation against the original per-coefficient
+# generator sums and checks that both agree to within a few units in the
+# last place (ULP). The IAPWS-IF97 verification values are checked first
+# and the benchmark stops if any is off, so a speedup can't hide a loss of
+# accuracy. Run from this directory: python benchmark_steam.py
+# ===========================================================================
+
+
+def reference_gamma_region1(pi, tau, coefficients):
+    """The original Region1.gamma(): one generator pass per derivative."""
+    gamma = sum(n * (7.1 - pi)**I * (tau - 1.222)**J
+                for n, I, J in coefficients)
+
+    d_gamma_d_pi = sum(-n * I *(7.1 - pi) ** (I - 1) * (tau - 1.222) ** J
+                       for n, I, J in coefficients)
+
+    d2_gamma_d_tau = sum(n * (7.1 - pi) ** I * J * (tau - 1.222) ** (J - 1)
+                       for n, I, J in coefficients)
+
+    d2_gamma_d_pi2 = sum(n * I * (I - 1) * (7.1 - pi) ** (I - 2) * (tau - 1.222) ** J
+                       for n, I, J in coefficients)
+
+    d2_gamma_d_tau2 = sum(n * (7.1 - pi) ** I * J * (J-1) * (tau - 1.222) **(J - 2)
+                          for n, I, J in coefficients)
+
+    return {
+            "gamma" : gamma,
+            "d_pi" : d_gamma_d_pi,
+            "d_tau" : d2_gamma_d_tau,
+            "dpi2" : d2_gamma_d_pi2,
+            "dtau2" : d2_gamma_d_tau2
+            }
+
+
+def region1_states(n_points: int, seed: int = 0):
+    """Random (T, p) states in Region 1: 273.15-623.15 K, p_sat(T)-100 MPa."""
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(273.15, 623.15, n_points)
+    p = rng.uniform(Region4.calc_P_sat(T), 100.0)
+    return T, p
+
+
+def region2_states(n_points: int, seed: int = 0):
+    """Random (T, p) states in the low-pressure part of Region 2: 273.15-623.15 K, 0-p_sat(T)."""
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(273.15, 623.15, n_points)
+    p = rng.uniform(0, 1, n_points) * Region4.calc_P_sat(T)
+    return T, p
+
+
+def region3_states(n_points: int, seed: int = 0):
+    """Random (T, p) states covering Region 3: 623.15 K-T_B23(p), p_B23(T)-100 MPa."""
+    rng = np.random.default_rng(seed)
+    T = np.empty(0)
+    p = np.empty(0)
+    while T.size < n_points:
+        T_try = rng.uniform(623.15, 863.15, 2 * n_points)
+        p_try = rng.uniform(16.5, 100.0, 2 * n_points)
+        inside = classify_region(T_try, p_try) == 3
+        T, p = np.concatenate([T, T_try[inside]]), np.concatenate([p, p_try[inside]])
+    return T[:n_points], p[:n_points]
+
+
+def ulp_difference(a, b, scale=None):
+    """
+    Distance between a and b in units in the last place of scale (default b).
+    The γ sums alternate in sign and can cancel to near zero, where any change
+    of summation order moves many ULPs of the result; measuring against the
+    sum of the absolute terms gives the error relative to what the sum can
+    resolve.
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    scale = np.abs(b) if scale is None else np.maximum(np.abs(b), scale)
+    return np.abs(a - b) / np.spacing(scale)
+
+
+def region1_term_magnitudes(pi, tau):
+    """Sum of |term| for γ and each derivative, keyed like Region1.gamma_terms."""
+    x = (7.1 - pi)[:, None]
+    y = (tau - 1.222)[:, None]
+    n, I, J = Region1.n, Region1.I, Region1.J
+    terms = np.abs(n * x ** I * y ** J)
+    x, y = np.abs(x[:, 0]), np.abs(y[:, 0])
+    return {
+            "gamma" : terms.sum(axis=1),
+            "d_pi" : terms @ np.abs(I) / x,
+            "d_tau" : terms @ np.abs(J) / y,
+            "dpi2" : terms @ np.abs(I * (I - 1)) / x ** 2,
+            "dtau2" : terms @ np.abs(J * (J - 1)) / y ** 2
+            }
+
+
+def benchmark_region1_gamma(n_points: int = 2000, repeat: int = 5):
+    coefficients = list(zip(Region1.n.tolist(), Region1.I.tolist(), Region1.J.tolist()))
+
+    T, p = region1_states(n_points)
+    pi, tau = p / 16.53, 1386 / T
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        reference = [reference_gamma_region1(pi_i, tau_i, coefficients) for pi_i, tau_i in zip(pi, tau)]
+    reference_s = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scalar = [Region1(T_i, p_i).gamma() for T_i, p_i in zip(T, p)]
+    scalar_s = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        batch = Region1.gamma_terms(pi, tau)
+    batch_s = (time.perf_counter() - start) / repeat
+
+    print(f"[Region1] {n_points} states")
+    print(f"[Region1] reference  {reference_s * 1e6 / n_points:9.2f} µs/state")
+    print(f"[Region1] scalar     {scalar_s * 1e6 / n_points:9.2f} µs/state  ({reference_s / scalar_s:6.1f}x)")
+    print(f"[Region1] batch      {batch_s * 1e6 / n_points:9.2f} µs/state  ({reference_s / batch_s:6.1f}x)")
+
+    # Bit-level agreement: the sums are reassociated, so not every result is
+    # bit-identical; the rest should differ by a few ULP of the term magnitudes
+    magnitudes = region1_term_magnitudes(pi, tau)
+    for key in reference[0]:
+        expected = np.array([r[key] for r in reference])
+        ulps = ulp_difference(batch[key], expected, magnitudes[key])
+        scalar_ulps = ulp_difference([s[key] for s in scalar], expected, magnitudes[key])
+        print(f"[Region1] {key:<6} identical {np.mean(batch[key] == expected):6.1%}  "
+              f"max {ulps.max():4.1f} ULP  p99 {np.percentile(ulps, 99):4.1f} ULP  "
+              f"(scalar max {scalar_ulps.max():.1f} ULP)")
+
+
+def benchmark_batch_properties(n_points: int = 1_000_000, repeat: int = 3):
+    for region, states in ((Region1, region1_states), (Region2, region2_states)):
+        T, p = states(n_points)
+        region.batch_properties(T[:10], p[:10])  # warm up
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            region.batch_properties(T, p)
+        elapsed = (time.perf_counter() - start) / repeat
+
+        print(f"[{region.__name__}] batch_properties  {n_points} states in {elapsed:.3f}s "
+              f"({n_points / elapsed / 1e6:.2f} M states/s)")
+
+
+def benchmark_region3(n_points: int = 1_000_000, repeat: int = 3):
+    """Density solve and properties over the whole Region 3 domain."""
+    T, p = region3_states(n_points)
+    Region3.density_guess_table()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rho, iterations = Region3.solve_density(T, p, return_iterations=True)
+    solve_s = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Region3.batch_properties(T, p)
+    batch_s = (time.perf_counter() - start) / repeat
+
+    p_check, _ = Region3.pressure(rho, T)
+    counts = np.bincount(iterations)
+    print(f"[Region3] solve_density     {n_points} states in {solve_s:.3f}s, "
+          f"max |p(rho) / p - 1| = {np.max(np.abs(p_check / p - 1)):.1e}")
+    print(f"[Region3] Newton iterations  mean {iterations.mean():.2f}, max {iterations.max()}, "
+          + ", ".join(f"{k}: {c}" for k, c in enumerate(counts) if c))
+    print(f"[Region3] batch_properties  {n_points} states in {batch_s:.3f}s "
+          f"({n_points / batch_s / 1e6:.2f} M states/s)")
+
+
+def benchmark_mixed_grid(n_points: int = 1_000_000, repeat: int = 3):
+    """properties() over a (T, p) grid spanning Regions 1-3, classification included."""
+    side = int(n_points ** 0.5)
+    T, p = np.meshgrid(np.linspace(273.15, 1073.15, side), np.linspace(0.001, 100, side))
+    properties(T[:2, :2], p[:2, :2])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = properties(T, p)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    counts = np.bincount(out['Region'].ravel(), minlength=4)
+    print(f"[properties] {T.size} mixed states in {elapsed:.3f}s "
+          f"(Region 1: {counts[1]}, Region 2: {counts[2]}, Region 3: {counts[3]})")
+
+
+def benchmark_derivatives(n_points: int = 1_000_000, repeat: int = 3):
+    """batch_derivatives() against central finite differences of batch_properties()."""
+    for region, states in ((Region1, region1_states), (Region2, region2_states), (Region3, region3_states)):
+        T, p = states(n_points)
+        dT, dp = 1e-3, 1e-6 * p
+        region.batch_derivatives(T[:10], p[:10])
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            analytic = region.batch_derivatives(T, p)
+        analytic_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            region.batch_properties(T, p)
+            shifted = [region.batch_properties(T + dT, p), region.batch_properties(T - dT, p),
+                       region.batch_properties(T, p + dp), region.batch_properties(T, p - dp)]
+        difference_s = (time.perf_counter() - start) / repeat
+
+        # Median rather than max: the differences lose digits to rounding
+        deviation = {}
+        for key in DERIVATIVE_KEYS:
+            prop, wrt = key[1], key[-1]
+            plus, minus = shifted[:2] if wrt == 'T' else shifted[2:]
+            numeric = (plus[prop] - minus[prop]) / (2 * (dT if wrt == 'T' else dp))
+            deviation[key] = np.median(np.abs(analytic[key] / numeric - 1))
+        print(f"[{region.__name__}] batch_derivatives  {n_points} states in {analytic_s:.3f}s, "
+              f"finite differences {difference_s:.3f}s ({difference_s / analytic_s:.1f}x), "
+              f"median |rel diff| <= {max(deviation.values()):.0e}")
+
+
+def benchmark_flash(n_points: int = 1_000_000, repeat: int = 3):
+    """flash(p, h) and flash(p, s) round trips from forward-evaluated Region 1 and 2 states."""
+    for region, states in ((Region1, region1_states), (Region2, region2_states)):
+        T, p = states(n_points)
+        forward = region.batch_properties(T, p)
+        for key in ('h', 's'):
+            value = forward[key.upper()]
+            # The backward equations are only fitted down to the triple-point pressure
+            fitted = p >= P_TRIPLE
+            backward = getattr(region, 'T_p' + key)(p[fitted], value[fitted])
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                out = flash(p, **{key: value})
+            elapsed = (time.perf_counter() - start) / repeat
+
+            print(f"[{region.__name__}] flash(p, {key})  {n_points} states in {elapsed:.3f}s, "
+                  f"backward max |dT| = {np.max(np.abs(backward - T[fitted])) * 1e3:.1f} mK, "
+                  f"refined max |T / T0 - 1| = {np.max(np.abs(out['T'] / T - 1)):.1e}")
+
+
+def benchmark_property_tables(n_points: int = 1_000_000, repeat: int = 3):
+    """Table lookup against properties() at random (T, p), log-uniform in p."""
+    rng = np.random.default_rng(0)
+    T = rng.uniform(273.15, 1073.15, n_points)
+    p = 10 ** rng.uniform(-5, 2, n_points)
+
+    start = time.perf_counter()
+    tables = PropertyTables()
+    print(f"[tables] opened in {time.perf_counter() - start:.3f}s")
+    tables.lookup(T[:10], p[:10])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        table = tables.lookup(T, p)
+    table_s = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        exact = properties(T, p)
+    exact_s = (time.perf_counter() - start) / repeat
+
+    covered = table['Region'] > 0
+    print(f"[tables] lookup      {n_points} states in {table_s:.3f}s ({exact_s / table_s:.1f}x properties()), "
+          f"{covered.mean():.1%} covered, regions agree: {np.all(table['Region'][covered] == exact['Region'][covered])}")
+
+    # Errors per table against the bounds measured when the tables were built
+    segment = np.where(table['Region'] == 1, 0, np.searchsorted([623.15, 863.15], T) + 1)
+    for number, phase in enumerate(tables.error_bounds):
+        mask = covered & (segment == number)
+        ratios = []
+        for key in TABLE_PROPERTIES:
+            error = np.abs(table[key][mask] - exact[key][mask])
+            if RELATIVE_ERROR[key]:
+                error = error / np.abs(exact[key][mask])
+            ratios.append(f"{key} {error.max():.1e}/{tables.error_bounds[phase][key]:.1e}")
+        print(f"[tables] {phase:<11} max error / bound: " + ", ".join(ratios))
+
+
+def benchmark_power_tables(n_points: int = 1_000_000, repeat: int = 3):
+    """Each region's power tables against a generic pow per (state, term), and the operation counts of properties()."""
+    T, p = region1_states(n_points)
+    T2, p2 = region2_states(n_points)
+    T3, p3 = region3_states(n_points)
+    rho3 = Region3.solve_density(T3, p3)
+    cases = (("Region1", "x_powers", Region1.I, 7.1 - p / 16.53),
+             ("Region1", "y_powers", Region1.J, 1386 / T - 1.222),
+             ("Region2", "ig_powers", Region2.J0, 540 / T2),
+             ("Region2", "pi_powers", Region2.Ir, p2),
+             ("Region2", "y_powers", Region2.Jr, 540 / T2 - 0.5),
+             ("Region3", "delta_powers", Region3.I, rho3 / Region3.rho_crit),
+             ("Region3", "tau_powers", Region3.J, Region3.T_crit / T3))
+    regions = {"Region1": Region1, "Region2": Region2, "Region3": Region3}
+
+    for name, attribute, exponents, base in cases:
+        table = getattr(regions[name], attribute)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            generic = base[:, None] ** exponents
+        generic_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            shared = table.powers(base)
+        table_s = (time.perf_counter() - start) / repeat
+
+        print(f"[PowerTable] {name}.{attribute:<12} {exponents.size:2d} pow -> {table.multiplications:2d} mul per state, "
+              f"{generic_s / table_s:4.1f}x faster, max |rel diff| {np.max(np.abs(shared / generic.T - 1)):.1e}")
+
+    # properties() over a mixed grid: every gamma / phi term shares its powers
+    side = int(n_points ** 0.5)
+    T, p = np.meshgrid(np.linspace(273.15, 1073.15, side), np.linspace(0.001, 100, side))
+    PowerTable.counts.clear()
+    PowerTable.count_operations = True
+    try:
+        properties(T, p)
+    finally:
+        PowerTable.count_operations = False
+    counts = PowerTable.counts
+    print(f"[PowerTable] properties() {T.size} states: {counts['pow_calls_replaced']} pow calls replaced by "
+          f"{counts['multiplications']} multiplications "
+          f"({counts['multiplications'] / counts['pow_calls_replaced']:.2f} per pow)")
+
+
+def benchmark_throughput(n_points: int = 1_000_000, n_scalar: int = 2000, workers: int = None, repeat: int = 3):
+    """Points per second of the scalar, batch and parallel paths on the same random Region 1-3 states."""
+    rng = np.random.default_rng(0)
+    T = rng.uniform(273.15, 1073.15, n_points)
+    p = 10 ** rng.uniform(-3, 2, n_points)
+    region = classify_region(T, p)
+
+    start = time.perf_counter()
+    for T_i, p_i, number in zip(T[:n_scalar], p[:n_scalar], region[:n_scalar]):
+        REGIONS[number](T_i, p_i).properties()
+    scalar_s = time.perf_counter() - start
+
+    properties(T[:10], p[:10])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        properties(T, p)
+    batch_s = (time.perf_counter() - start) / repeat
+
+    with ParallelEvaluator(workers) as evaluator:
+        evaluator.properties(T[:10], p[:10])  # start the workers
+        start = time.perf_counter()
+        for _ in range(repeat):
+            evaluator.properties(T, p)
+        parallel_s = (time.perf_counter() - start) / repeat
+
+    print(f"[throughput] scalar    {n_scalar / scalar_s / 1e3:10.1f} k points/s")
+    print(f"[throughput] batch     {n_points / batch_s / 1e3:10.1f} k points/s")
+    print(f"[throughput] parallel  {n_points / parallel_s / 1e3:10.1f} k points/s ({evaluator.workers} workers)")
+
+
+def benchmark_parallel(n_points: int = 1_000_000, max_workers: int = None, repeat: int = 3):
+    """ParallelEvaluator on a mixed (T, p) grid, scaling from 1 to max_workers processes."""
+    side = int(n_points ** 0.5)
+    T, p = np.meshgrid(np.linspace(273.15, 1073.15, side), np.linspace(0.001, 100, side))
+    serial = properties(T, p)
+
+    baseline = None
+    for workers in range(1, (max_workers or os.cpu_count() or 1) + 1):
+        with ParallelEvaluator(workers) as evaluator:
+            evaluator.properties(T[:2, :2], p[:2, :2])  # start the workers
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                out = evaluator.properties(T, p)
+            elapsed = (time.perf_counter() - start) / repeat
+
+        baseline = baseline or elapsed
+        # Shards are reduced in different block lengths, so results match
+        # properties() to rounding rather than bit for bit
+        deviation = max(np.nanmax(np.abs(out[key] / serial[key] - 1)) for key in OUTPUT_KEYS if key != 'Region')
+        print(f"[parallel] {workers:2d} workers  {T.size} states in {elapsed:.3f}s "
+              f"(speedup {baseline / elapsed:4.2f}x, max |rel diff| {deviation:.1e}, "
+              f"regions equal: {np.array_equal(out['Region'], serial['Region'])})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the steam property evaluation.")
+    parser.add_argument("--points", type=int, default=2000, help="number of random states")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per implementation")
+    parser.add_argument("--grid", type=int, default=1_000_000, help="states per batch_properties call")
+    parser.add_argument("--workers", type=int, default=None, help="most processes in the scaling benchmark")
+    args = parser.parse_args()
+
+    if verify():
+        sys.exit("IAPWS-IF97 verification failed, not benchmarking")
+    benchmark_throughput(args.grid, workers=args.workers)
+    benchmark_region1_gamma(args.points, args.repeat)
+    benchmark_power_tables(args.grid)
+    benchmark_batch_properties(args.grid)
+    benchmark_region3(args.grid)
+    benchmark_derivatives(args.grid)
+    benchmark_mixed_grid(args.grid)
+    benchmark_flash(args.grid)
+    benchmark_property_tables(args.grid)
+    benchmark_parallel(args.grid, args.workers)
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from steam_table_generator import properties
+
+# ===========================================================================
+# Multiprocess property evaluation
+#
+# Splits the states into contiguous shards evaluated by properties() in a
+# process pool. Inputs and outputs live in shared memory blocks that the
+# workers attach to by name, so only block names and shard bounds are
+# pickled, and each worker writes its results straight into its own slice
+# of the output, which keeps them in input order.
+# ===========================================================================
+
+OUTPUT_KEYS = ('V', 'H', 'S', 'U', 'Cp', 'Cv', 'W', 'Region')
+
+
+def evaluate_shard(input_name: str, output_name: str, n_points: int, start: int, stop: int) -> int:
+    """Evaluate states start:stop of the shared input block into the shared output block"""
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    try:
+        inputs = np.ndarray((2, n_points), dtype=float, buffer=input_block.buf)
+        outputs = np.ndarray((len(OUTPUT_KEYS), n_points), dtype=float, buffer=output_block.buf)
+        props = properties(inputs[0, start:stop], inputs[1, start:stop])
+        for row, key in enumerate(OUTPUT_KEYS):
+            outputs[row, start:stop] = props[key]
+        del inputs, outputs  # release the buffers before closing the blocks
+    finally:
+        input_block.close()
+        output_block.close()
+    return stop - start
+
+
+class ParallelEvaluator:
+    """
+    Process pool for properties() over large arrays. Use as a context
+    manager to keep the workers alive across calls:
+
+        with ParallelEvaluator(workers=8) as evaluator:
+            out = evaluator.properties(T, p)
+    """
+
+    # Shards per worker: more than one evens out the cost differences
+    # between regions (Region 3 states need a density solve)
+    SHARDS_PER_WORKER = 4
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def properties(self, T, p) -> dict:
+        """Same results as properties(T, p), evaluated in shards across the pool"""
+        T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+        shape, n_points = T.shape, T.size
+        if self.workers == 1 or n_points == 0:
+            return properties(T, p)
+
+        input_block = shared_memory.SharedMemory(create=True, size=max(2 * n_points * 8, 1))
+        output_block = shared_memory.SharedMemory(create=True, size=max(len(OUTPUT_KEYS) * n_points * 8, 1))
+        try:
+            inputs = np.ndarray((2, n_points), dtype=float, buffer=input_block.buf)
+            inputs[0], inputs[1] = T.ravel(), p.ravel()
+
+            pool = self.pool or ProcessPoolExecutor(max_workers=self.workers)
+            try:
+                bounds = np.linspace(0, n_points, self.workers * self.SHARDS_PER_WORKER + 1).astype(int)
+                futures = [pool.submit(evaluate_shard, input_block.name, output_block.name, n_points, start, stop)
+                           for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+                for future in futures:
+                    future.result()
+            finally:
+                if pool is not self.pool:
+                    pool.shutdown()
+
+            outputs = np.ndarray((len(OUTPUT_KEYS), n_points), dtype=float, buffer=output_block.buf)
+            out = {key: outputs[row].reshape(shape).copy() for row, key in enumerate(OUTPUT_KEYS)}
+            out['Region'] = out['Region'].astype(np.int8)
+            del inputs, outputs
+        finally:
+            input_block.close()
+            input_block.unlink()
+            output_block.close()
+            output_block.unlink()
+        return out
+
+
+def parallel_properties(T, p, workers: int = None) -> dict:
+    """properties(T, p) evaluated across workers processes (default: all cores)"""
+    with ParallelEvaluator(workers) as evaluator:
+        return evaluator.properties(T, p)
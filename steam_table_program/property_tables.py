@@ -0,0 +1,274 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from steam_table_generator import (CACHE_DIR, CACHE_KEY, COEFFICIENT_FILES, DATA_DIR, Region1, Region2,
+                                   Region4, SteamRegion)
+
+# ===========================================================================
+# Interpolated property tables
+#
+# Precomputed Region 1 and Region 2 property grids for fast scattered
+# lookups. The tables are split along the phase and region boundaries and use
+# boundary-fitted coordinates, so the saturation line is a grid line and no
+# cell straddles it:
+#
+#   liquid       T in [273.15, 623.15] K,  xi = (p - p_sat(T)) / (100 - p_sat(T))
+#   vapour       T in [273.15, 623.15] K,  xi = g(p) / g(p_sat(T))
+#   vapour_B23   T in [623.15, 863.15] K,  xi = g(p) / g(p_B23(T))
+#   vapour_high  T in [863.15, 1073.15] K, xi = g(p) / g(100)
+#
+# with g(p) = ln(p / P_MIN) + (p - P_MIN) / p_scale, logarithmic at low
+# pressure, where ln V is linear in ln p, and linear at high pressure, where
+# the properties change fastest near saturation; p_scale is chosen per table
+# to split its nodes roughly evenly between the two. Within a cell the
+# properties are bicubic Hermite patches through the node values and their
+# finite-difference slopes (V is interpolated as ln V), so a lookup reads
+# four nodes whatever the table size. The tables are float32 .npy files
+# opened as memory maps, rebuilt when missing or older than the coefficient
+# CSVs; single precision halves the memory traffic of a lookup and costs
+# far less than the interpolation error. Like the coefficient cache they
+# are kept in the user's cache directory (TABLE_DIR), not next to the module.
+# ===========================================================================
+TABLE_DIR = CACHE_DIR / f"property_tables_{CACHE_KEY}"
+
+TABLE_PROPERTIES = ('V', 'H', 'S', 'U', 'Cp', 'Cv', 'W')
+
+# Errors are relative for the properties that stay well away from zero and
+# absolute (in kJ kg-1 or kJ kg-1 K-1) for H, S and U, which cross zero
+# near the triple point
+RELATIVE_ERROR = {'V': True, 'H': False, 'S': False, 'U': False, 'Cp': True, 'Cv': True, 'W': True}
+
+# Factor on the largest error found at the sample points of each cell; an 8 x 8
+# sampling finds errors up to 1.2 times those of the 4 x 4 one used here
+ERROR_MARGIN = 1.5
+
+P_MIN = 1e-5  # MPa, lowest pressure in the vapour tables
+TABLE_DTYPE = np.float32
+
+TABLE_SPECS = {
+    "liquid": {"region": 1, "T_min": 273.15, "T_max": 623.15, "n_T": 351, "n_xi": 121},
+    "vapour": {"region": 2, "T_min": 273.15, "T_max": 623.15, "n_T": 351, "n_xi": 121, "p_scale": 0.5},
+    "vapour_B23": {"region": 2, "T_min": 623.15, "T_max": 863.15, "n_T": 241, "n_xi": 241, "p_scale": 5.0},
+    "vapour_high": {"region": 2, "T_min": 863.15, "T_max": 1073.15, "n_T": 211, "n_xi": 121, "p_scale": 5.0},
+}
+REGION_CLASSES = {1: Region1, 2: Region2}
+
+
+def boundary_pressures(T):
+    """Return (p_sat(T), p_max(T)) [MPa]: the liquid lower bound and the vapour upper bound."""
+    T = np.asarray(T, dtype=float)
+    p_sat = Region4.calc_P_sat(np.clip(T, 273.15, 623.15))
+    p_B23 = SteamRegion.calc_P_B23(np.clip(T, 623.15, 863.15))
+    p_max = np.where(T <= 623.15, p_sat, np.where(T <= 863.15, p_B23, 100.0))
+    return p_sat, p_max
+
+
+def vapour_coordinate(p, p_scale: float):
+    return np.log(p / P_MIN) + (p - P_MIN) / p_scale
+
+
+def from_xi(phase: str, T, xi):
+    p_sat, p_max = boundary_pressures(T)
+    spec = TABLE_SPECS[phase]
+    if spec["region"] == 1:
+        return p_sat + xi * (100 - p_sat)
+    # Newton on q = ln p; g is convex in q, so starting from the purely
+    # logarithmic solution, which lies above the root, converges monotonically
+    target = xi * vapour_coordinate(p_max, spec["p_scale"])
+    q = np.log(P_MIN) + target
+    for _ in range(50):
+        g = vapour_coordinate(np.exp(q), spec["p_scale"]) - target
+        step = g / (1 + np.exp(q) / spec["p_scale"])
+        q = q - step
+        if np.all(np.abs(step) < 1e-15):
+            break
+    return np.minimum(np.exp(q), p_max)
+
+
+def grid_coordinates(phase: str, T, xi):
+    """Fractional node indices (x, y) of (T, xi) in a table"""
+    spec = TABLE_SPECS[phase]
+    x = (T - spec["T_min"]) / (spec["T_max"] - spec["T_min"]) * (spec["n_T"] - 1)
+    y = xi * (spec["n_xi"] - 1)
+    return x, y
+
+
+def tabulated_values(props: dict) -> np.ndarray:
+    """Stack properties along the last axis, V as ln V"""
+    return np.stack([np.log(props[k]) if k == 'V' else props[k] for k in TABLE_PROPERTIES], axis=-1)
+
+
+def hermite_patch(table: np.ndarray, x, y) -> np.ndarray:
+    """
+    Bicubic Hermite interpolation at fractional node indices (x, y).
+
+    table has shape (n_T, n_xi, 4, n_properties), holding f, df/dx, df/dy
+    and d2f/dxdy at each node in node-index units. Returns
+    (len(x), n_properties).
+    """
+    n_T, n_xi, _, n_props = table.shape
+    flat = table.reshape(n_T * n_xi, 4 * n_props)
+    i = np.clip(np.floor(x).astype(np.intp), 0, n_T - 2)
+    j = np.clip(np.floor(y).astype(np.intp), 0, n_xi - 2)
+    t, u = x - i, y - j
+
+    # Value (h0) and slope (h1) basis functions for the near (0) and far (1) node
+    h0 = ((1 + 2 * t) * (1 - t) ** 2, t ** 2 * (3 - 2 * t))
+    h1 = (t * (1 - t) ** 2, -t ** 2 * (1 - t))
+    k0 = ((1 + 2 * u) * (1 - u) ** 2, u ** 2 * (3 - 2 * u))
+    k1 = (u * (1 - u) ** 2, -u ** 2 * (1 - u))
+
+    # One (16,) weight row and (16, n_properties) block of node data per
+    # point, combined in a single batched matrix product
+    weights = np.empty((x.size, 4, 4), dtype=table.dtype)
+    for corner, (a, b) in enumerate(((0, 0), (0, 1), (1, 0), (1, 1))):
+        weights[:, corner, 0] = h0[a] * k0[b]
+        weights[:, corner, 1] = h1[a] * k0[b]
+        weights[:, corner, 2] = h0[a] * k1[b]
+        weights[:, corner, 3] = h1[a] * k1[b]
+    corners = (i * n_xi + j)[:, None] + np.array([0, 1, n_xi, n_xi + 1])
+    nodes = np.take(flat, corners.ravel(), axis=0).reshape(x.size, 16, n_props)
+    return (weights.reshape(x.size, 1, 16) @ nodes)[:, 0]
+
+
+def build_table(phase: str, path: Path) -> None:
+    """Evaluate the region equations on the phase grid and write the table to path."""
+    spec = TABLE_SPECS[phase]
+    T = np.linspace(spec["T_min"], spec["T_max"], spec["n_T"])
+    xi = np.linspace(0, 1, spec["n_xi"])
+    T_grid, xi_grid = np.meshgrid(T, xi, indexing='ij')
+    region = REGION_CLASSES[spec["region"]]
+    values = tabulated_values(region.batch_properties(T_grid, from_xi(phase, T_grid, xi_grid)))
+
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    table = np.lib.format.open_memmap(tmp, mode='w+', dtype=TABLE_DTYPE,
+                                      shape=(spec["n_T"], spec["n_xi"], 4, len(TABLE_PROPERTIES)))
+    table[:, :, 0] = values
+    table[:, :, 1] = np.gradient(values, axis=0, edge_order=2)
+    table[:, :, 2] = np.gradient(values, axis=1, edge_order=2)
+    table[:, :, 3] = np.gradient(np.gradient(values, axis=0, edge_order=2), axis=1, edge_order=2)
+    table.flush()
+    del table
+    os.replace(tmp, path)
+
+
+def interpolation_error(phase: str, table: np.ndarray, T, xi) -> dict:
+    """Max error of the table against the region equations at (T, xi), per property"""
+    exact = REGION_CLASSES[TABLE_SPECS[phase]["region"]].batch_properties(T, from_xi(phase, T, xi))
+    x, y = grid_coordinates(phase, T, xi)
+    interpolated = hermite_patch(table, x.ravel(), y.ravel())
+    errors = {}
+    for column, key in enumerate(TABLE_PROPERTIES):
+        value = interpolated[:, column]
+        if key == 'V':
+            value = np.exp(value)
+        expected = exact[key].ravel()
+        error = np.abs(value - expected)
+        if RELATIVE_ERROR[key]:
+            error = error / np.abs(expected)
+        errors[key] = float(error.max())
+    return errors
+
+
+def measure_error_bounds(phase: str, table: np.ndarray) -> dict:
+    """
+    Max interpolation error of a table over a 4 x 4 set of points inside
+    every cell, widened by ERROR_MARGIN for peaks between the samples. The
+    bound is measured, not proven; benchmark_steam.py checks it on random
+    states.
+    """
+    spec = TABLE_SPECS[phase]
+    dT = (spec["T_max"] - spec["T_min"]) / (spec["n_T"] - 1)
+    T_nodes = np.linspace(spec["T_min"], spec["T_max"], spec["n_T"])[:-1]
+    xi_nodes = np.linspace(0, 1, spec["n_xi"])[:-1]
+    fractions = (0.125, 0.375, 0.625, 0.875)
+
+    bounds = dict.fromkeys(TABLE_PROPERTIES, 0.0)
+    for ft in fractions:
+        T_grid, xi_grid = np.meshgrid(T_nodes + ft * dT, xi_nodes, indexing='ij')
+        for fu in fractions:
+            errors = interpolation_error(phase, table, T_grid, xi_grid + fu / (spec["n_xi"] - 1))
+            for key, error in errors.items():
+                bounds[key] = max(bounds[key], ERROR_MARGIN * error)
+    return bounds
+
+
+class PropertyTables:
+    """
+    Table-based lookup of V, H, S, U, Cp, Cv, W in Regions 1 and 2.
+
+    Covers Region 1 and Region 2 from 273.15 K and P_MIN; states elsewhere,
+    including Region 3, come back as NaN with Region 0. error_bounds holds
+    the measured maximum error of each table against the IF97 equations.
+    The tables are read from, or built into, directory (default TABLE_DIR).
+    """
+
+    def __init__(self, directory: Path = TABLE_DIR, rebuild: bool = False):
+        self.directory = Path(directory)
+        metadata_path = self.directory / "property_tables.json"
+        paths = {phase: self.directory / f"property_table_{phase}.npy" for phase in TABLE_SPECS}
+
+        newest_source = max((DATA_DIR / filename).stat().st_mtime for filename in COEFFICIENT_FILES.values())
+        metadata = None
+        if not rebuild and metadata_path.exists() and all(
+                path.exists() and path.stat().st_mtime >= newest_source for path in paths.values()):
+            with open(metadata_path, mode='r', encoding='utf-8') as file:
+                metadata = json.load(file)
+            if metadata.get("specs") != TABLE_SPECS or metadata.get("p_min") != P_MIN:
+                metadata = None
+
+        if metadata is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            metadata = {"specs": TABLE_SPECS, "p_min": P_MIN, "error_bounds": {}}
+            for phase, path in paths.items():
+                build_table(phase, path)
+                metadata["error_bounds"][phase] = measure_error_bounds(phase, np.load(path, mmap_mode='r'))
+            tmp = metadata_path.with_name(f"{metadata_path.stem}.{os.getpid()}.tmp.json")
+            with open(tmp, mode='w', encoding='utf-8') as file:
+                json.dump(metadata, file, indent=2)
+            os.replace(tmp, metadata_path)
+
+        # Plain ndarray views of the memory maps: fancy indexing on np.memmap
+        # itself goes through a much slower Python-level __getitem__
+        self.tables = {phase: np.asarray(np.load(path, mmap_mode='r')) for phase, path in paths.items()}
+        self.error_bounds = metadata["error_bounds"]
+
+    def lookup(self, T, p):
+        """Return dict of V, H, S, U, Cp, Cv, W and Region arrays for arrays of T [K] and p [MPa]"""
+        T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+        shape = T.shape
+        T, p = T.ravel(), p.ravel()
+
+        p_sat, p_max = boundary_pressures(T)
+        in_range = (273.15 <= T) & (T <= 1073.15)
+        liquid = in_range & (T <= 623.15) & (p_sat <= p) & (p <= 100)
+        vapour = in_range & ~liquid & (P_MIN <= p) & (p <= p_max)
+
+        # Table for each state: liquid, or the vapour table of its T segment
+        table_index = np.full(T.size, -1)
+        table_index[liquid] = 0
+        table_index[vapour] = np.searchsorted([623.15, 863.15], T[vapour], side='left') + 1
+
+        out = np.full((T.size, len(TABLE_PROPERTIES)), np.nan)
+        region = np.zeros(T.size, dtype=np.int8)
+        for number, phase in enumerate(TABLE_SPECS):
+            index = np.flatnonzero(table_index == number)
+            region[index] = TABLE_SPECS[phase]["region"]
+            for start in range(0, index.size, SteamRegion.CHUNK_SIZE):
+                block = index[start:start + SteamRegion.CHUNK_SIZE]
+                spec = TABLE_SPECS[phase]
+                if spec["region"] == 1:
+                    xi = (p[block] - p_sat[block]) / (100 - p_sat[block])
+                else:
+                    xi = (vapour_coordinate(p[block], spec["p_scale"])
+                          / vapour_coordinate(p_max[block], spec["p_scale"]))
+                x, y = grid_coordinates(phase, T[block], xi)
+                out[block] = hermite_patch(self.tables[phase], x, y)
+
+        result = {key: out[:, column].reshape(shape) for column, key in enumerate(TABLE_PROPERTIES)}
+        result['V'] = np.exp(result['V'])
+        result['Region'] = region.reshape(shape)
+        return result
@@ -1,76 +1,111 @@
-from steam_table_generator import Region1, Region2, Region3, Region4
+from steam_table_generator import Region1, Region2, Region4
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-def generate_saturated_steam_table(T_range = None, P_range = None) -> pd.DataFrame:
-    data = []
+# ===========================================================================
+# Saturated steam tables
+#
+# Saturated liquid (Region 1) and vapour (Region 2) properties along the
+# saturation line, evaluated for the whole T or p range in one batch per
+# phase. The saturation line lies in Regions 1 and 2 from 273.15 K to
+# 623.15 K; above that it runs through Region 3 and is not covered here.
+# ===========================================================================
+
+T_SAT_MIN = 273.15  # K
+T_SAT_MAX = 623.15  # K
+PHASES = ("Liq", "Vap", "Evap")
+SATURATED_PROPERTIES = ("V", "H", "S", "U", "Cp", "Cv", "W")
+# Changes on evaporation (latent heat is H_Evap); Cp, Cv and W have no
+# meaningful vapour-minus-liquid difference
+LATENT_PROPERTIES = ("V", "H", "S", "U")
+
+
+def saturated_properties(T_range=None, P_range=None) -> dict:
+    """
+    Wide dict of arrays for the saturation states at T_range [K] or
+    P_range [MPa]: Temperature, Pressure, then <property>_Liq and
+    <property>_Vap for V, H, S, U, Cp, Cv, W and <property>_Evap for the
+    changes on evaporation of V, H, S, U.
+    """
     if T_range is not None and P_range is not None:
-        raise KeyError
-    
+        raise KeyError("Pass either T_range or P_range, not both")
+
     if T_range is not None:
-        for T in T_range:
-            region = Region4(T)
-            if not region.in_region():
-                raise ValueError ("Temperature {T} is out of the region, please select another one".format(T))
-            
-            P_sat = Region4(T).calc_P_sat(T)    
-            sat_liquid = Region1(T, P_sat).properties()
-            sat_vapour = Region2(T, P_sat).properties()
-            
-            for prop_name in sat_liquid.keys():
-                data.append({
-                "Temperature" : T,
-                "Pressure": P_sat,
-                "Property": prop_name,
-                "Phase": "Liq",
-                "Value": sat_liquid[prop_name]
-                })
-                data.append({
-                    "Temperature" : T,
-                    "Pressure": P_sat,
-                    "Property": prop_name,
-                    "Phase": "Vap",
-                    "Value": sat_vapour[prop_name]
-                })
-        
-    if P_range is not None:
-        for P in P_range:
-            region = Region4(P)
-            if not region.in_region():
-                raise ValueError ("Pressure {P} is out of the region, please select another one".format(P))
-            
-            T_sat = Region4(P).calc_T_sat(P)    
-            props = region.properties()
-            data.append({
-                "T": T_sat,
-                "P": P,
-                "V": props["V"],
-                "H": props["H"],
-                "S": props["S"],
-                "U": props["U"]
-            })
-
-    
-    df = pd.DataFrame(data)
-    return df
-
-
-
-T_range = np.linspace(300, 600, 50)  # in Kelvin
-P_range = np.linspace(0.1, 30, 50)   # in MPa
-
-steam_table = generate_saturated_steam_table(T_range 
-                                             #, P_range
-                                             )
-
-
-print(steam_table.head())
-
-g = sns.FacetGrid(steam_table, col="Phase", sharey=False)  # One plot per phase
-g.map(sns.lineplot, "Pressure", "Value")
-g.set_titles("{col_name} Phase")
-g.set_axis_labels("Pressure (MPa)", "Enthalpy")
-g.fig.suptitle("Enthalpy vs Pressure (Liquid & Vapor)", y=1.05)
-plt.show()
\ No newline at end of file
+        T = np.atleast_1d(np.asarray(T_range, dtype=float))
+        outside = (T < T_SAT_MIN) | (T > T_SAT_MAX)
+        if outside.any():
+            raise ValueError("Temperature {T} is out of the region, please select another one"
+                             .format(T=T[outside][0]))
+        P = Region4.P_sat(T)
+    else:
+        P = np.atleast_1d(np.asarray(P_range, dtype=float))
+        outside = (P < Region4.P_sat(T_SAT_MIN)) | (P > Region4.P_sat(T_SAT_MAX))
+        if outside.any():
+            raise ValueError("Pressure {P} is out of the region, please select another one"
+                             .format(P=P[outside][0]))
+        T = Region4.T_sat(P)
+
+    liquid = Region1.batch_properties(T, P)
+    vapour = Region2.batch_properties(T, P)
+
+    columns = {"Temperature": T, "Pressure": P}
+    for prop in SATURATED_PROPERTIES:
+        columns[f"{prop}_Liq"] = liquid[prop]
+        columns[f"{prop}_Vap"] = vapour[prop]
+    for prop in LATENT_PROPERTIES:
+        columns[f"{prop}_Evap"] = vapour[prop] - liquid[prop]
+    return columns
+
+
+def generate_saturated_steam_table(T_range=None, P_range=None, layout: str = "long") -> pd.DataFrame:
+    """
+    Saturated steam table for T_range [K] or P_range [MPa].
+
+    layout="wide" gives one row per saturation state with the columns of
+    saturated_properties(). layout="long" gives one row per state, property
+    and phase (Liq, Vap, or Evap for the changes on evaporation) with
+    columns Temperature, Pressure, Property, Phase and Value.
+    """
+    if T_range is None and P_range is None:
+        return pd.DataFrame()
+    columns = saturated_properties(T_range, P_range)
+    if layout == "wide":
+        return pd.DataFrame(columns)
+    if layout != "long":
+        raise ValueError("layout must be 'long' or 'wide', not {!r}".format(layout))
+
+    # Rows ordered by state, then property, then phase
+    pairs = [(prop, phase) for prop in SATURATED_PROPERTIES for phase in PHASES
+             if f"{prop}_{phase}" in columns]
+    n_states, n_pairs = columns["Temperature"].size, len(pairs)
+    values = np.column_stack([columns[f"{prop}_{phase}"] for prop, phase in pairs])
+    prop_codes = np.array([SATURATED_PROPERTIES.index(prop) for prop, _ in pairs])
+    phase_codes = np.array([PHASES.index(phase) for _, phase in pairs])
+
+    return pd.DataFrame({
+        "Temperature": np.repeat(columns["Temperature"], n_pairs),
+        "Pressure": np.repeat(columns["Pressure"], n_pairs),
+        "Property": pd.Categorical.from_codes(np.tile(prop_codes, n_states), SATURATED_PROPERTIES),
+        "Phase": pd.Categorical.from_codes(np.tile(phase_codes, n_states), PHASES),
+        "Value": values.ravel(),
+    })
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    T_range = np.linspace(300, 600, 50)  # in Kelvin
+    P_range = np.linspace(0.1, 15, 50)   # in MPa
+
+    steam_table = generate_saturated_steam_table(T_range)
+    print(steam_table.head())
+    print(generate_saturated_steam_table(P_range=P_range, layout="wide").head())
+
+    enthalpy = steam_table[(steam_table["Property"] == "H") & (steam_table["Phase"] != "Evap")]
+    g = sns.FacetGrid(enthalpy, col="Phase", sharey=False)  # One plot per phase
+    g.map(sns.lineplot, "Pressure", "Value")
+    g.set_titles("{col_name} Phase")
+    g.set_axis_labels("Pressure (MPa)", "Enthalpy")
+    g.fig.suptitle("Enthalpy vs Pressure (Liquid & Vapor)", y=1.05)
+    plt.show()
@@ -0,0 +1,178 @@
+import argparse
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from steam_table_generator import SteamRegion, properties
+
+# ===========================================================================
+# Steam table export
+#
+# Streams a T x p grid through the batch property evaluator in chunks of
+# rows and writes each chunk as soon as it is ready, so memory stays
+# constant however large the grid is. Chunks are evaluated, and encoded for
+# the output format, in a process pool with a bounded number in flight, and
+# written in grid order. Rows are ordered by T, then p; states outside
+# Regions 1-3 are written with Region 0 and NaN properties.
+# ===========================================================================
+
+EXPORT_DTYPE = np.dtype([("T", "f8"), ("P", "f8"), ("Region", "i1"),
+                         ("V", "f8"), ("H", "f8"), ("S", "f8"), ("U", "f8"),
+                         ("Cp", "f8"), ("Cv", "f8"), ("W", "f8")])
+
+EXPORT_FORMATS = (".csv", ".parquet", ".npy")
+
+
+def evaluate_chunk(T_values: np.ndarray, p_values: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Rows start:stop of the T_values x p_values grid as an EXPORT_DTYPE array"""
+    index = np.arange(start, stop)
+    T = T_values[index // p_values.size]
+    p = p_values[index % p_values.size]
+    props = properties(T, p)
+
+    rows = np.empty(index.size, dtype=EXPORT_DTYPE)
+    rows["T"], rows["P"] = T, p
+    for name in EXPORT_DTYPE.names[2:]:
+        rows[name] = props[name]
+    return rows
+
+
+def export_chunk(writer: type, T_values: np.ndarray, p_values: np.ndarray, start: int, stop: int):
+    """Evaluate rows start:stop and encode them for writer; runs in the worker processes"""
+    return writer.encode(evaluate_chunk(T_values, p_values, start, stop))
+
+
+class CsvWriter:
+    """Text is formatted in the workers, which is most of the cost of CSV export"""
+
+    FMT = ["%.10g", "%.10g", "%d"] + ["%.10g"] * (len(EXPORT_DTYPE.names) - 3)
+
+    def __init__(self, path: Path, n_rows: int):
+        self.file = open(path, mode='w', encoding='utf-8', newline='')
+        self.file.write(",".join(EXPORT_DTYPE.names) + "\n")
+
+    @classmethod
+    def encode(cls, rows: np.ndarray) -> str:
+        text = io.StringIO()
+        np.savetxt(text, rows, fmt=cls.FMT, delimiter=",")
+        return text.getvalue()
+
+    def write(self, text: str):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+
+
+class NpyWriter:
+    """Structured .npy file, preallocated and filled in place through a memory map"""
+
+    def __init__(self, path: Path, n_rows: int):
+        self.table = np.lib.format.open_memmap(path, mode='w+', dtype=EXPORT_DTYPE, shape=(n_rows,))
+        self.position = 0
+
+    @classmethod
+    def encode(cls, rows: np.ndarray) -> np.ndarray:
+        return rows
+
+    def write(self, rows: np.ndarray):
+        self.table[self.position:self.position + rows.size] = rows
+        self.position += rows.size
+
+    def close(self):
+        self.table.flush()
+        del self.table
+
+
+class ParquetWriter:
+    """One row group per chunk; needs the optional pyarrow dependency"""
+
+    def __init__(self, path: Path, n_rows: int):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from error
+        self.pa = pa
+        self.schema = pa.schema([(name, pa.from_numpy_dtype(EXPORT_DTYPE[name])) for name in EXPORT_DTYPE.names])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    @classmethod
+    def encode(cls, rows: np.ndarray) -> np.ndarray:
+        return rows
+
+    def write(self, rows: np.ndarray):
+        columns = [self.pa.array(rows[name]) for name in EXPORT_DTYPE.names]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {".csv": CsvWriter, ".parquet": ParquetWriter, ".npy": NpyWriter}
+
+
+def export_table(path, T_values, p_values, chunk_size: int = SteamRegion.CHUNK_SIZE,
+                 workers: int = None) -> int:
+    """
+    Write properties on the T_values [K] x p_values [MPa] grid to path as
+    CSV, Parquet or .npy, chosen by the file suffix. workers processes
+    evaluate chunks of chunk_size rows in parallel (default: all cores;
+    1 evaluates in this process). Returns the number of rows written.
+    """
+    path = Path(path)
+    if path.suffix not in WRITERS:
+        raise ValueError("Unsupported export format {!r}, use one of {}".format(path.suffix, EXPORT_FORMATS))
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1, not {}".format(chunk_size))
+    T_values = np.ravel(np.asarray(T_values, dtype=float))
+    p_values = np.ravel(np.asarray(p_values, dtype=float))
+    n_rows = T_values.size * p_values.size
+    bounds = [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    writer_class = WRITERS[path.suffix]
+    writer = writer_class(path, n_rows)
+    try:
+        if workers == 1:
+            for start, stop in bounds:
+                writer.write(export_chunk(writer_class, T_values, p_values, start, stop))
+        else:
+            # At most two chunks per worker in flight; results are written in
+            # submission order, so the file is in grid order
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for start, stop in bounds:
+                    pending.append(pool.submit(export_chunk, writer_class, T_values, p_values, start, stop))
+                    if len(pending) >= 2 * workers:
+                        writer.write(pending.popleft().result())
+                while pending:
+                    writer.write(pending.popleft().result())
+    finally:
+        writer.close()
+    return n_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a T x p steam property table.")
+    parser.add_argument("path", help="output file: .csv, .parquet or .npy")
+    parser.add_argument("--T", nargs=3, type=float, default=(273.15, 1073.15, 801), metavar=("MIN", "MAX", "N"),
+                        help="temperature grid in K")
+    parser.add_argument("--p", nargs=3, type=float, default=(0.01, 100, 1000), metavar=("MIN", "MAX", "N"),
+                        help="pressure grid in MPa")
+    parser.add_argument("--chunk", type=int, default=SteamRegion.CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    T_values = np.linspace(args.T[0], args.T[1], int(args.T[2]))
+    p_values = np.linspace(args.p[0], args.p[1], int(args.p[2]))
+
+    start = time.perf_counter()
+    n_rows = export_table(args.path, T_values, p_values, args.chunk, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"[export] {n_rows} rows to {args.path} in {elapsed:.2f}s ({n_rows / elapsed / 1e3:.0f}k rows/s)")
@@ -1,294 +1,830 @@
 import csv
+import hashlib
+import os
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
 import numpy as np
 
+# ===========================================================================
+# Coefficient tables
+#
+# The IF97 coefficient CSVs next to this module are read once at import,
+# resolved relative to the module so it can be imported from anywhere, and
+# kept as read-only NumPy arrays on the region classes. The parsed tables
+# are cached in a binary .npy file, rebuilt whenever a CSV is newer, so
+# worker processes start without re-parsing the CSVs. The cache lives in
+# the user's cache directory, never next to the module, so read-only
+# installs work and the source tree stays clean; it is named after the
+# module's directory so separate checkouts don't share it.
+# ===========================================================================
+DATA_DIR = Path(__file__).resolve().parent
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "steam_table_program"
+# Suffix of the cache files built from this checkout's CSVs
+CACHE_KEY = hashlib.sha1(str(DATA_DIR).encode()).hexdigest()[:12]
+COEFFICIENT_CACHE = CACHE_DIR / f"coefficients_{CACHE_KEY}.npy"
+
+COEFFICIENT_FILES = {
+    "region1": "region1_constants.csv",
+    "region2_ideal_gas": "region2_constants_ideal_gas.csv",
+    "region2_residuals": "region2_constants_residuals.csv",
+    "region3": "region3_constants.csv",
+    # Backward equations T(p, h) and T(p, s)
+    "region1_T_ph": "region1_backward_T_ph.csv",
+    "region1_T_ps": "region1_backward_T_ps.csv",
+    "region2a_T_ph": "region2a_backward_T_ph.csv",
+    "region2b_T_ph": "region2b_backward_T_ph.csv",
+    "region2c_T_ph": "region2c_backward_T_ph.csv",
+    "region2a_T_ps": "region2a_backward_T_ps.csv",
+    "region2b_T_ps": "region2b_backward_T_ps.csv",
+    "region2c_T_ps": "region2c_backward_T_ps.csv",
+}
+
+# One row per coefficient; tables without an I column get I = 0. Exponents
+# are stored as floats since the Region 2a T(p, s) equation has fractional I
+COEFFICIENT_DTYPE = np.dtype([("table", "U24"), ("n", "f8"), ("I", "f8"), ("J", "f8")])
+
+
+def read_coefficient_csvs() -> np.ndarray:
+    rows = []
+    for table, filename in COEFFICIENT_FILES.items():
+        with open(DATA_DIR / filename, mode='r', encoding='utf-8-sig') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                rows.append((table, float(row['n']), float(row.get('I') or 0), float(row['J'])))
+    return np.array(rows, dtype=COEFFICIENT_DTYPE)
+
+
+def load_coefficient_tables(cache: Path = COEFFICIENT_CACHE) -> dict:
+    """Return {table: {"n", "I", "J": read-only arrays}}, from the cache when it is current."""
+    sources = [DATA_DIR / filename for filename in COEFFICIENT_FILES.values()]
+    newest_source = max(path.stat().st_mtime for path in sources)
+
+    records = None
+    if cache.exists() and cache.stat().st_mtime >= newest_source:
+        try:
+            records = np.load(cache)
+        except (OSError, ValueError):
+            records = None  # corrupt cache: fall back to the CSVs
+
+    if (records is None or records.dtype != COEFFICIENT_DTYPE
+            or set(records["table"]) != set(COEFFICIENT_FILES)):
+        records = read_coefficient_csvs()
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache.with_name(f"{cache.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp, records)
+            tmp.replace(cache)
+        except OSError:
+            pass  # no writable cache directory: keep working from the CSVs
+
+    tables = {}
+    for table in COEFFICIENT_FILES:
+        rows = records[records["table"] == table]
+        tables[table] = {}
+        for column in ("n", "I", "J"):
+            values = np.ascontiguousarray(rows[column])
+            if column != "n" and np.all(values == np.round(values)):
+                values = values.astype(int)
+            values.setflags(write=False)
+            tables[table][column] = values
+    return tables
+
+
+COEFFICIENTS = load_coefficient_tables()
+
+
+def backward_sum(table: dict, x, y):
+    """sum(n * x**I * y**J) for arrays x, y: the form of the IF97 backward equations"""
+    x = np.asarray(x, dtype=float)[..., None]
+    y = np.asarray(y, dtype=float)[..., None]
+    return (table["n"] * x ** table["I"] * y ** table["J"]).sum(axis=-1)
+
+
+class PowerTable:
+    """
+    Integer powers base**e for a fixed set of exponents, built by repeated
+    multiplication instead of a generic pow per term.
+
+    The distinct exponent magnitudes of each sign are sorted, and each power
+    is the previous one times base**gap. The gap powers are products of a
+    short chain of squares base, base**2, base**4, ... Negative exponents
+    use the same scheme on 1 / base. powers() returns the powers
+    exponent-major, with shape (n_exponents, ...) in the order the exponents
+    were given, so every term and term sum works on contiguous rows. For a
+    single state each row is a one-element array operation, so one pow per
+    exponent is cheaper there and is used instead.
+
+    multiplications is the cost per state. With count_operations set,
+    class-level counts accumulate the states evaluated, multiplications
+    done and pow calls replaced across all tables; it is off by default,
+    as the shared Counter costs time on every call and is not safe to
+    update from several threads.
+    """
+    count_operations = False
+    counts = Counter()
+
+    def __init__(self, exponents):
+        exponents = np.asarray(exponents)
+        if np.any(exponents != np.round(exponents)):
+            raise ValueError("PowerTable needs integer exponents")
+        exponents = exponents.astype(int)
+        self.exponents = exponents
+        self.n_exponents = exponents.size
+
+        # Rows of the power table: 0 for exponent 0, then each sign's
+        # magnitudes in ascending order
+        self.plans = []
+        rows = {0: 0}
+        multiplications = 0
+        for sign in (1, -1):
+            magnitudes = np.unique(sign * exponents[sign * exponents > 0])
+            if magnitudes.size == 0:
+                continue
+            gaps = np.diff(magnitudes, prepend=0).tolist()
+            n_squares = max(gaps).bit_length()
+            distinct_gaps = sorted(set(gaps))
+            multiplications += (sign < 0) + (n_squares - 1)
+            multiplications += sum(bin(gap).count("1") - 1 for gap in distinct_gaps)
+            multiplications += magnitudes.size - 1
+            for m in magnitudes:
+                rows[sign * int(m)] = len(rows)
+            self.plans.append((sign, gaps, n_squares, distinct_gaps))
+
+        self.n_rows = len(rows)
+        self.index = np.array([rows[e] for e in exponents])
+        self.multiplications = multiplications
+
+    def powers(self, base):
+        """Array (n_exponents, ...) of base**exponents"""
+        base = np.asarray(base, dtype=float)
+        if base.ndim == 0:
+            return base ** self.exponents
+
+        table = np.empty((self.n_rows,) + base.shape)
+        table[0] = 1.0
+        row = 1
+        for sign, gaps, n_squares, distinct_gaps in self.plans:
+            squares = [base if sign > 0 else 1 / base]
+            for _ in range(n_squares - 1):
+                squares.append(squares[-1] * squares[-1])
+            gap_powers = {}
+            for gap in distinct_gaps:
+                bits = [squares[k] for k in range(n_squares) if gap >> k & 1]
+                gap_powers[gap] = bits[0]
+                for bit in bits[1:]:
+                    gap_powers[gap] = gap_powers[gap] * bit
+            table[row] = gap_powers[gaps[0]]
+            for gap in gaps[1:]:
+                np.multiply(table[row], gap_powers[gap], out=table[row + 1:row + 2])
+                row += 1
+            row += 1
+
+        if PowerTable.count_operations:
+            PowerTable.counts.update(states=base.size, multiplications=self.multiplications * base.size,
+                                     pow_calls_replaced=self.n_exponents * base.size)
+        return table[self.index]
+
+
+def term_sum(weights, terms):
+    """sum(weights * terms) over the leading (term) axis of exponent-major terms"""
+    if terms.ndim == 1:
+        return np.dot(weights, terms)  # a single state: skips tensordot's reshaping
+    return np.tensordot(weights, terms, axes=1)
+
+
+PROPERTY_KEYS = ('V', 'H', 'S', 'U', 'Cp', 'Cv', 'W')
+# Partial derivatives of V, H, S, U with respect to T [K] at constant p and
+# p [MPa] at constant T, e.g. dH_dT = Cp and dV_dP = -V * kappa_T
+DERIVATIVE_KEYS = tuple(f"d{prop}_d{var}" for prop in ('V', 'H', 'S', 'U') for var in ('T', 'P'))
+
+
 class SteamRegion:
+    R = 0.461526 # kJ kg-1 K-1.
+    P_crit = 22.064 # MPa
+    T_crit = 647.096 # K
+    rho_crit = 322 # kg m^-3
+
+    # Points per block in batch evaluation; bounds the (points x coefficients)
+    # temporaries to a few tens of MB however large the input is
+    CHUNK_SIZE = 65536
+
     def __init__(self, T: float, p: float):
         self.T = T  # temperature in K
         self.P = p  # pressure in MPa
-        self.R = 0.461526 # kJ kg-1 K-1.
-        self.P_crit = 22.064 # MPa
-        self.T_crit = 647.096 # K
-        self.rho_crit = 322 # kg m^-3
 
     def gamma(self):
         raise NotImplementedError
 
     def properties(self):
-        """Return dict with v, h, s, u, cp, w"""
+        """Return dict with V, H, S, U, Cp, Cv, W"""
+        # One state: straight to evaluate_block, without the broadcasting and
+        # blocking of batch_properties
+        return {key: float(value) for key, value in self.evaluate_block(float(self.T), float(self.P)).items()}
+
+    @classmethod
+    def reduced_state(cls, T, p):
+        """Return (pi, tau) for arrays of T [K] and p [MPa]"""
+        raise NotImplementedError
+
+    @classmethod
+    def gamma_derivatives(cls, pi, tau):
+        """
+        Return the total γ and its derivatives for arrays pi, tau, keyed
+        gamma, d_pi, d_tau, dpi2, dtau2, dpitau
+        """
         raise NotImplementedError
 
+    @classmethod
+    def properties_from_gamma(cls, T, p, pi, tau, g):
+        """
+        IF97 property relations of a Gibbs free energy region (Table 3 of
+        the release) for any γ(π, τ) and its derivatives.
+        """
+        RT = cls.R * T
+        tau2_dtau2 = tau ** 2 * g["dtau2"]
+        mixed = g["d_pi"] - tau * g["dpitau"]
+
+        return {
+            'V' : RT / (p * 1000) * pi * g["d_pi"],
+            'H' : RT * tau * g["d_tau"],
+            'S' : cls.R * (tau * g["d_tau"] - g["gamma"]),
+            'U' : RT * (tau * g["d_tau"] - pi * g["d_pi"]),
+            'Cp' : -cls.R * tau2_dtau2,
+            'Cv' : cls.R * (-tau2_dtau2 + mixed ** 2 / g["dpi2"]),
+            # R is in kJ, so 1000 R T is in m2 s-2
+            'W' : np.sqrt(1000 * RT * g["d_pi"] ** 2 / (mixed ** 2 / tau2_dtau2 - g["dpi2"])),
+        }
+
+    @classmethod
+    def derivatives_from_gamma(cls, T, p, pi, tau, g):
+        """
+        Partial derivatives of V, H, S, U in T and p (DERIVATIVE_KEYS) from
+        the same γ derivatives as properties_from_gamma. With π = p / p*
+        and τ = T* / T, d/dp = (π / p) d/dπ and d/dT = -(τ / T) d/dτ.
+        """
+        RT = cls.R * T
+        dpi_dp = pi / p
+        V = RT / (p * 1000) * pi * g["d_pi"]
+        cp = -cls.R * tau ** 2 * g["dtau2"]
+
+        dV_dT = cls.R / 1000 * dpi_dp * (g["d_pi"] - tau * g["dpitau"])
+        dV_dP = RT / 1000 * dpi_dp ** 2 * g["dpi2"]
+        # p V is in MPa m3 kg-1, i.e. kJ kg-1 per 1000
+        return {
+            'dV_dT' : dV_dT,
+            'dV_dP' : dV_dP,
+            'dH_dT' : cp,
+            'dH_dP' : RT * tau * dpi_dp * g["dpitau"],
+            'dS_dT' : cp / T,
+            'dS_dP' : -1000 * dV_dT,
+            'dU_dT' : cp - 1000 * p * dV_dT,
+            'dU_dP' : RT * tau * dpi_dp * g["dpitau"] - 1000 * (V + p * dV_dP),
+        }
+
+    @classmethod
+    def evaluate_block(cls, T, p):
+        """Properties for one block of 1-D T, p arrays"""
+        pi, tau = cls.reduced_state(T, p)
+        return cls.properties_from_gamma(T, p, pi, tau, cls.gamma_derivatives(pi, tau))
+
+    @classmethod
+    def evaluate_derivatives_block(cls, T, p):
+        """Properties and their partial derivatives for one block, from one γ evaluation"""
+        pi, tau = cls.reduced_state(T, p)
+        g = cls.gamma_derivatives(pi, tau)
+        return {**cls.properties_from_gamma(T, p, pi, tau, g), **cls.derivatives_from_gamma(T, p, pi, tau, g)}
+
+    @classmethod
+    def evaluate_in_blocks(cls, evaluate, T, p, keys):
+        """
+        Run evaluate(T, p) over blocks of CHUNK_SIZE points of the broadcast
+        T, p arrays and return its dict of arrays in the broadcast shape
+        """
+        T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+        shape = T.shape
+        T, p = T.ravel(), p.ravel()
+
+        out = None
+        for start in range(0, T.size, cls.CHUNK_SIZE):
+            block = slice(start, start + cls.CHUNK_SIZE)
+            props = evaluate(T[block], p[block])
+
+            if out is None:
+                out = {key: np.empty(T.size) for key in props}
+            for key, value in props.items():
+                out[key][block] = value
+
+        if out is None:
+            out = {key: np.empty(0) for key in keys}
+        return {key: value.reshape(shape) for key, value in out.items()}
+
+    @classmethod
+    def batch_properties(cls, T, p):
+        """
+        Properties for arrays of T [K] and p [MPa] (broadcast against each
+        other). Returns a dict of arrays V, H, S, U, Cp, Cv, W in the
+        broadcast shape. The caller is responsible for the states lying in
+        this region.
+        """
+        return cls.evaluate_in_blocks(cls.evaluate_block, T, p, PROPERTY_KEYS)
+
+    @classmethod
+    def batch_derivatives(cls, T, p):
+        """
+        batch_properties() together with the analytic partial derivatives
+        dV_dT, dV_dP, dH_dT, dH_dP, dS_dT, dS_dP, dU_dT, dU_dP [per K, per
+        MPa], all from a single evaluation per state, for Newton solvers
+        that would otherwise finite-difference the properties.
+        """
+        return cls.evaluate_in_blocks(cls.evaluate_derivatives_block, T, p, PROPERTY_KEYS + DERIVATIVE_KEYS)
+
     def in_region(self):
         """Return True if T and p fall within this region"""
         raise NotImplementedError
 
+    # Boundary between Regions 2 and 3 (B23 equation), P_star = 1 MPa, T_star = 1 K
+    B23_N = (0.34805185628969e3, -0.11671859879975e1, 0.10192970039326e-2,
+             0.57254459862746e3, 0.13918839778870e2)
+
+    @classmethod
+    def calc_P_B23(cls, T):
+        n1, n2, n3, n4, n5 = cls.B23_N
+        return n1 + n2 * T + n3 * T**2
+
+    @classmethod
+    def calc_T_B23(cls, P):
+        n1, n2, n3, n4, n5 = cls.B23_N
+        return n4 + ((P - n5) / n3)**0.5
+
     def region23_line(self, T: float = 1.0, P: float = 1.0):
-        P_star = 1 # [MPa]
-        T_star = 1 # [K]
-        n1 = 0.34805185628969e3
-        n2 = -0.11671859879975e1
-        n3 = 0.10192970039326e-2
-        n4 = 0.57254459862746e3
-        n5 = 0.13918839778870e2
-        
-        theta = T/T_star
-        P = (n1 + n2*theta + n3*theta**2) * P_star
-        
-        pi = P / P_star
-        T = (n4 + ((pi - n5) / n3)**0.5) * T_star
-        
+        P = self.calc_P_B23(T)
+        T = self.calc_T_B23(P)
         return (T, P)
 
 
 class Region1(SteamRegion):
-    COEFFICIENTS = []
-
-    @classmethod
-    def load_coefficients(cls, filename="region1_constants.csv"):
-        if not cls.COEFFICIENTS:  # Load only once
-            with open(filename, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    n = float(row['n'])
-                    I = int(row['I'])
-                    J = int(row['J'])
-                    cls.COEFFICIENTS.append((n, I, J))
+    # Coefficient table as arrays: gamma = sum(n * (7.1 - pi)**I * (tau - 1.222)**J)
+    n = COEFFICIENTS["region1"]["n"]
+    I = COEFFICIENTS["region1"]["I"]
+    J = COEFFICIENTS["region1"]["J"]
+    x_powers = PowerTable(I)
+    y_powers = PowerTable(J)
 
     def __init__(self, T: float, p: float):
         super().__init__(T, p)
         self.pi = p / 16.53
         self.tau = 1386 / T
-        self.load_coefficients()
-    
-    
-    def gamma(self):
-        # Compute γ and derivatives
-        gamma = sum(n * (7.1 - self.pi)**I * (self.tau - 1.222)**J
-                    for n, I, J in self.COEFFICIENTS)
-        
-        d_gamma_d_pi = sum(-n * I *(7.1 - self.pi) ** (I - 1) * (self.tau - 1.222) ** J
-                           for n, I, J in self.COEFFICIENTS)
-        
-        d2_gamma_d_tau = sum(n * (7.1 - self.pi) ** I * J * (self.tau - 1.222) ** (J - 1)
-                           for n, I, J in self.COEFFICIENTS)
-        
-        d2_gamma_d_pi2 = sum(n * I * (I - 1) * (7.1 - self.pi) ** (I - 2) * (self.tau - 1.222) ** J
-                           for n, I, J in self.COEFFICIENTS)
-        
-        d2_gamma_d_tau2 = sum(n * (7.1 - self.pi) ** I * J * (J-1) * (self.tau - 1.222) **(J - 2)
-                              for n, I, J in self.COEFFICIENTS)
-        
+
+    @classmethod
+    def gamma_terms(cls, pi, tau):
+        """
+        γ and its derivatives for scalar or array pi, tau in one pass over the
+        coefficients. The power terms n * (7.1 - pi)**I * (tau - 1.222)**J are
+        computed once, from the power tables of x = 7.1 - pi and
+        y = tau - 1.222; each derivative only rescales them by the exponents
+        and divides the sum by the base, e.g. dγ/dπ = -sum(n I x**I y**J) / x.
+        """
+        x = 7.1 - np.asarray(pi, dtype=float)
+        y = np.asarray(tau, dtype=float) - 1.222
+
+        terms = cls.n.reshape((-1,) + (1,) * x.ndim) * cls.x_powers.powers(x) * cls.y_powers.powers(y)
+
         return {
-                "gamma" : gamma,
-                "d_pi" : d_gamma_d_pi,
-                "d_tau" : d2_gamma_d_tau,
-                "dpi2" : d2_gamma_d_pi2,
-                "dtau2" : d2_gamma_d_tau2
+                "gamma" : terms.sum(axis=0),
+                "d_pi" : -term_sum(cls.I, terms) / x,
+                "d_tau" : term_sum(cls.J, terms) / y,
+                "dpi2" : term_sum(cls.I * (cls.I - 1), terms) / x ** 2,
+                "dtau2" : term_sum(cls.J * (cls.J - 1), terms) / y ** 2,
+                "dpitau" : -term_sum(cls.I * cls.J, terms) / (x * y)
                 }
 
-    def properties(self):
-        gammas = self.gamma()
-        
-        V = self.R * self.T /(self.P * 1000) * self.pi * gammas["d_pi"]
-        
-        U = self.R * self.T * (self.tau * gammas['d_tau'] - self.pi * gammas['d_pi'])
-        
-        S = self.R * (self.tau * gammas['d_tau'] - gammas['gamma'])
-        
-        H = self.R * self.T * self.tau * gammas['d_tau']
-        # Return v, h, s, u, cp, w
-        return {
-            'V' : V,
-            'H' : H,
-            'S' : S,
-            'U' : U
-        }
-    
+    def gamma(self):
+        # Compute γ and derivatives
+        return {key: float(value) for key, value in self.gamma_terms(self.pi, self.tau).items()}
+
+    @classmethod
+    def reduced_state(cls, T, p):
+        return p / 16.53, 1386 / T
+
+    @classmethod
+    def gamma_derivatives(cls, pi, tau):
+        return cls.gamma_terms(pi, tau)
+
+    @classmethod
+    def T_ph(cls, p, h):
+        """Backward equation T(p, h) [K] for arrays of p [MPa] and h [kJ kg-1]"""
+        return backward_sum(COEFFICIENTS["region1_T_ph"], p / 1, np.asarray(h) / 2500 + 1)
+
+    @classmethod
+    def T_ps(cls, p, s):
+        """Backward equation T(p, s) [K] for arrays of p [MPa] and s [kJ kg-1 K-1]"""
+        return backward_sum(COEFFICIENTS["region1_T_ps"], p / 1, np.asarray(s) / 1 + 2)
+
     def in_region(self):
         # Check Region 1 limits
-        return (273.15 <= self.T <= 623.15) and (self.P <= Region4.calc_P_sat(self.T))
+        return bool(classify_region(self.T, self.P) == 1)
 
 
 class Region2(SteamRegion):
-    IG_COEFFICIENTS = []
-    RESID_COEFFICIENTS = []
-
-    @classmethod
-    def load_ideal_gas_coefficients(cls, filename="region2_constants_ideal_gas.csv"):
-        if not cls.IG_COEFFICIENTS:  # Load only once
-            with open(filename, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    n = float(row['n'])
-                    J = int(row['J'])
-                    cls.IG_COEFFICIENTS.append((n, J))
-                    
-    @classmethod
-    def load_residual_coefficients(cls, filename="region2_constants_residuals.csv"):
-        if not cls.RESID_COEFFICIENTS:  # Load only once
-            with open(filename, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    n = float(row['n'])
-                    I = int(row['I'])
-                    J = int(row['J'])
-                    cls.RESID_COEFFICIENTS.append((n, I, J))
+    # Ideal-gas part: gamma_ig = ln(pi) + sum(n0 * tau**J0)
+    n0 = COEFFICIENTS["region2_ideal_gas"]["n"]
+    J0 = COEFFICIENTS["region2_ideal_gas"]["J"]
+    # Residual part: gamma_resid = sum(nr * pi**Ir * (tau - 0.5)**Jr)
+    nr = COEFFICIENTS["region2_residuals"]["n"]
+    Ir = COEFFICIENTS["region2_residuals"]["I"]
+    Jr = COEFFICIENTS["region2_residuals"]["J"]
+    ig_powers = PowerTable(J0)
+    pi_powers = PowerTable(Ir)
+    y_powers = PowerTable(Jr)
 
     def __init__(self, T, p):
         super().__init__(T, p)
         self.pi = p / 1
         self.tau = 540 / T
-        self.load_ideal_gas_coefficients()
-        self.load_residual_coefficients()
 
-    def gamma(self):
-        # Compute γ and derivatives
-        # gammas
-        gamma_ig = np.log(self.pi) + sum(n * self.tau ** J
-                    for n, J in self.IG_COEFFICIENTS)
-        
-        gamma_resid = sum(n * self.pi ** I * (self.tau - 0.5) ** J 
-                      for n, I, J in self.RESID_COEFFICIENTS)
-        
-        gamma = gamma_ig + gamma_resid
-        
-        # ideal gas gamma derivatives
-        d_gamma_ig_d_pi = 1 / self.pi
-        d2_gamma_ig_d_pi2 = -1 / (self.pi ** 2)
-        
-        d_gamma_ig_d_tau = sum(n * J * self.tau ** (J - 1)
-                                for n, J in self.IG_COEFFICIENTS)
-        d2_gamma_ig_d_tau2 = sum(n * J * (J - 1) * self.tau ** (J - 2)
-                                 for n, J in self.IG_COEFFICIENTS)
-        
-        # residual gamma derivatives
-        d_gamma_resid_d_pi = sum(n * I * self.pi ** (I - 1) * (self.tau - 0.5) ** J
-                                 for n, I, J in self.RESID_COEFFICIENTS)
-        d2_gamma_resid_d_pi2 = sum(n * I * (I - 1) * self.pi ** (I - 2) * (self.tau - 0.5) ** J
-                                   for n, I, J in self.RESID_COEFFICIENTS)
-        
-        d_gamma_resid_d_tau = sum(n * self.pi ** I * J * (self.tau - 0.5) ** (J - 1)
-                                  for n, I, J in self.RESID_COEFFICIENTS)
-        d2_gamma_resid_d_tau2 = sum(n * self.pi ** I * J * (J - 1) * (self.tau - 0.5) ** (J - 2)
-                                  for n, I, J in self.RESID_COEFFICIENTS)
-        
+    @classmethod
+    def gamma_terms(cls, pi, tau):
+        """
+        Ideal-gas and residual parts of γ and their derivatives for scalar or
+        array pi, tau. As in Region1.gamma_terms, the power terms of each part
+        are computed once and every derivative is a rescaled sum of them.
+        """
+        pi = np.asarray(pi, dtype=float)
+        tau = np.asarray(tau, dtype=float)
+        y = tau - 0.5
+        column = (-1,) + (1,) * pi.ndim
+
+        ig_terms = cls.n0.reshape(column) * cls.ig_powers.powers(tau)
+        resid_terms = cls.nr.reshape(column) * cls.pi_powers.powers(pi) * cls.y_powers.powers(y)
+
         return {
-                "gamma" : gamma,
-                "ig_dpi" : d_gamma_ig_d_pi,
-                "ig_dpi2" : d2_gamma_ig_d_pi2,
-                "ig_dtau" : d_gamma_ig_d_tau,
-                "ig_dtau2" : d2_gamma_ig_d_tau2,
-                "resid_dpi" : d_gamma_resid_d_pi,
-                "resid_dpi2" : d2_gamma_resid_d_pi2,
-                "resid_dtau" : d_gamma_resid_d_tau,
-                "resid_dtau2" : d2_gamma_resid_d_tau2
+                "gamma" : np.log(pi) + ig_terms.sum(axis=0) + resid_terms.sum(axis=0),
+                "ig_dpi" : 1 / pi,
+                "ig_dpi2" : -1 / pi ** 2,
+                "ig_dtau" : term_sum(cls.J0, ig_terms) / tau,
+                "ig_dtau2" : term_sum(cls.J0 * (cls.J0 - 1), ig_terms) / tau ** 2,
+                "resid_dpi" : term_sum(cls.Ir, resid_terms) / pi,
+                "resid_dpi2" : term_sum(cls.Ir * (cls.Ir - 1), resid_terms) / pi ** 2,
+                "resid_dtau" : term_sum(cls.Jr, resid_terms) / y,
+                "resid_dtau2" : term_sum(cls.Jr * (cls.Jr - 1), resid_terms) / y ** 2,
+                "resid_dpitau" : term_sum(cls.Ir * cls.Jr, resid_terms) / (pi * y)
                 }
 
-    def properties(self):
-        gammas = self.gamma()
-        
-        V = self.R * self.T /(self.P * 1000) * self.pi * (gammas["ig_dpi"] + gammas['resid_dpi'])
-        
-        U = self.R * self.T * (self.tau * (gammas['ig_dtau'] + gammas['resid_dtau']) - self.pi * (gammas['ig_dpi'] + gammas['resid_dpi']))
-        
-        S = self.R * (self.tau * (gammas['ig_dtau'] + gammas['resid_dtau']) - gammas['gamma'])
-        
-        H = self.R * self.T * self.tau * (gammas['ig_dtau'] + gammas['resid_dtau'])
-        
-        # Return v, h, s, u, cp, w
+    def gamma(self):
+        # Compute γ and derivatives
+        return {key: float(value) for key, value in self.gamma_terms(self.pi, self.tau).items()}
+
+    @classmethod
+    def reduced_state(cls, T, p):
+        return p / 1, 540 / T
+
+    # Boundary between subregions 2b and 2c of the backward equations (B2bc equation)
+    B2BC_N = (0.90584278514723e3, -0.67955786399241, 0.12809002730136e-3,
+              0.26526571908428e4, 0.45257578905948e1)
+
+    @classmethod
+    def calc_P_B2bc(cls, h):
+        n1, n2, n3, n4, n5 = cls.B2BC_N
+        return n1 + n2 * h + n3 * h**2
+
+    @classmethod
+    def calc_h_B2bc(cls, P):
+        n1, n2, n3, n4, n5 = cls.B2BC_N
+        return n4 + ((P - n5) / n3)**0.5
+
+    @classmethod
+    def T_ph(cls, p, h):
+        """
+        Backward equation T(p, h) [K] for arrays of p [MPa] and h [kJ kg-1].
+        Subregion 2a is p <= 4 MPa; above it, 2c lies on the high-pressure
+        side of the B2bc line and 2b on the other.
+        """
+        p, h = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(h, dtype=float))
+        eta = h / 2000
+        sub_a = p <= 4
+        sub_c = ~sub_a & (p > cls.calc_P_B2bc(h))
+        sub_b = ~sub_a & ~sub_c
+
+        T = np.empty(p.shape)
+        T[sub_a] = backward_sum(COEFFICIENTS["region2a_T_ph"], p[sub_a], eta[sub_a] - 2.1)
+        T[sub_b] = backward_sum(COEFFICIENTS["region2b_T_ph"], p[sub_b] - 2, eta[sub_b] - 2.6)
+        T[sub_c] = backward_sum(COEFFICIENTS["region2c_T_ph"], p[sub_c] + 25, eta[sub_c] - 1.8)
+        return T
+
+    @classmethod
+    def T_ps(cls, p, s):
+        """
+        Backward equation T(p, s) [K] for arrays of p [MPa] and s [kJ kg-1 K-1].
+        Subregion 2a is p <= 4 MPa; above it, 2b is s >= 5.85 and 2c the rest.
+        """
+        p, s = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(s, dtype=float))
+        sub_a = p <= 4
+        sub_b = ~sub_a & (s >= 5.85)
+        sub_c = ~sub_a & ~sub_b
+
+        T = np.empty(p.shape)
+        T[sub_a] = backward_sum(COEFFICIENTS["region2a_T_ps"], p[sub_a], s[sub_a] / 2 - 2)
+        T[sub_b] = backward_sum(COEFFICIENTS["region2b_T_ps"], p[sub_b], 10 - s[sub_b] / 0.7853)
+        T[sub_c] = backward_sum(COEFFICIENTS["region2c_T_ps"], p[sub_c], 2 - s[sub_c] / 2.9251)
+        return T
+
+    @classmethod
+    def gamma_derivatives(cls, pi, tau):
+        g = cls.gamma_terms(pi, tau)
         return {
-            'V' : V,
-            'H' : H,
-            'S' : S,
-            'U' : U
-        }
+                "gamma" : g["gamma"],
+                "d_pi" : g["ig_dpi"] + g["resid_dpi"],
+                "d_tau" : g["ig_dtau"] + g["resid_dtau"],
+                "dpi2" : g["ig_dpi2"] + g["resid_dpi2"],
+                "dtau2" : g["ig_dtau2"] + g["resid_dtau2"],
+                "dpitau" : g["resid_dpitau"]
+                }
 
     def in_region(self):
         # Check Region 2 limits
-        valid = False
-        
-        if (273.15 <= self.T <= 623.15) and (0 <= self.P <= Region4.calc_P_sat(self.T)):
-            valid = True
-        
-        if (623.15 <= self.T <= 863.15) and (0 <= self.P <= self.region23_line(self.T)[1]):
-            valid = True
-        
-        if (863.15 <= self.T <= 1073.15) and (0 <= self.P <= 100):
-            valid = True
-        
-        return valid
+        return bool(classify_region(self.T, self.P) == 2)
     
 
 class Region3(SteamRegion):
-    COEFFICIENTS = []
-    
-    @classmethod
-    def load_coefficients(cls, filename="region2_constants_ideal_gas.csv"):
-        if not cls.COEFFICIENTS:  # Load only once
-            with open(filename, mode='r') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    n = float(row['n'])
-                    J = int(row['J'])
-                    cls.COEFFICIENTS.append((n, J))
+    # phi = n1 * ln(delta) + sum(n * delta**I * tau**J); the first CSV row is n1
+    n1 = COEFFICIENTS["region3"]["n"][0]
+    n = COEFFICIENTS["region3"]["n"][1:]
+    I = COEFFICIENTS["region3"]["I"][1:]
+    J = COEFFICIENTS["region3"]["J"][1:]
+    delta_powers = PowerTable(I)
+    tau_powers = PowerTable(J)
 
-    def __init__(self, T, p, rho):
+    # Density bounds of the Newton solve [kg m^-3]; Region 3 spans roughly 100-765 and
+    # p(RHO_MAX, T) is above 100 MPa everywhere in it
+    RHO_MIN = 1.0
+    RHO_MAX = 800.0
+
+    # (T, p) grid of solved densities that seeds solve_density, built on first use
+    GUESS_T = np.linspace(623.15, 863.15, 97)
+    GUESS_P = np.linspace(16.5, 100.0, 168)
+    _guess_table = None
+
+    def __init__(self, T, p, rho=None):
         super().__init__(T, p)
+        if rho is None:
+            rho = float(self.solve_density(T, p))
         self.rho = rho
         self.delta = rho / self.rho_crit
         self.tau = self.T_crit / T
-        self.load_coefficients()
 
-    def phi(self):
+    @classmethod
+    def phi_terms(cls, delta, tau):
+        """
+        φ and its derivatives for scalar or array delta, tau, sharing the power
+        terms n * delta**I * tau**J across all of them.
+        """
+        delta = np.asarray(delta, dtype=float)
+        tau = np.asarray(tau, dtype=float)
 
-        n1 = 1.0658070028513
-        
-        phi = n1 * np.log(self.delta * sum(n * self.delta**I * self.tau**J
-                                                   for n, I, J in self.COEFFICIENTS)
-                                       )
-
-        d_phi_d_delta =  n1 / (self.delta + sum(n * I * self.delta**(I-1) * self.tau**J
-                                           for n, I, J in self.COEFFICIENTS))
-        
-        d_phi_d_tau = sum(n * self.delta**I * J * self.tau**(J-1)
-                                           for n, I, J in self.COEFFICIENTS)
-        
-        d2_phi_d_delta2 = -n1 / (self.delta**2 + sum(n * I * (I - 1) * self.delta**(I - 2) * self.tau**J
-                                           for n, I, J in self.COEFFICIENTS))
-        
-        d2_phi_d_tau2 = sum(n * self.delta**I * J * (J-1) * self.tau**(J-2)
-                                           for n, I, J in self.COEFFICIENTS)
+        terms = cls.n.reshape((-1,) + (1,) * delta.ndim) * cls.delta_powers.powers(delta) * cls.tau_powers.powers(tau)
 
         return {
-                "phi" : phi,
-                "d_phi_d_delta" : d_phi_d_delta,
-                "d_phi_d_tau" : d_phi_d_tau,
-                "d2_phi_d_delta2" : d2_phi_d_delta2,
-                "d2_phi_d_tau2" : d2_phi_d_tau2
+                "phi" : cls.n1 * np.log(delta) + terms.sum(axis=0),
+                "d_phi_d_delta" : (cls.n1 + term_sum(cls.I, terms)) / delta,
+                "d_phi_d_tau" : term_sum(cls.J, terms) / tau,
+                "d2_phi_d_delta2" : (-cls.n1 + term_sum(cls.I * (cls.I - 1), terms)) / delta ** 2,
+                "d2_phi_d_tau2" : term_sum(cls.J * (cls.J - 1), terms) / tau ** 2,
+                "d2_phi_d_delta_d_tau" : term_sum(cls.I * cls.J, terms) / (delta * tau)
                 }
-        
-    def properties(self):
-        phis = self.phi()
-        
-        P = self.delta * phis["d_phi_d_delta"] * self.rho * self.R * self.T
-        
-        U = self.tau * phis["d_phi_d_tau"] * self.R * self.T
-        
-        S = (self.tau*phis["d_phi_d_tau"] - phis["phi"]) * self.R
-        
-        H = (self.tau*phis["d_phi_d_tau"] + self.delta * phis["d_phi_d_delta"]) * self.R * self.T
 
-                # Return v, h, s, u, cp, w
+    def phi(self):
+        return {key: float(value) for key, value in self.phi_terms(self.delta, self.tau).items()}
+
+    @classmethod
+    def isotherm_coefficients(cls, T):
+        """
+        Along an isotherm the sum in φ is a polynomial in δ: the coefficient
+        of δ**k is c_k = sum(n * tau**J) over the terms with I = k. Returns c
+        with shape (..., max(I) + 1) for arrays of T.
+        """
+        tau = cls.T_crit / np.asarray(T, dtype=float)
+        degree = np.arange(cls.I.max() + 1)
+        tau_terms = cls.n.reshape((-1,) + (1,) * tau.ndim) * cls.tau_powers.powers(tau)
+        return np.moveaxis(term_sum((cls.I[:, None] == degree).astype(float).T, tau_terms), 0, -1)
+
+    @classmethod
+    def pressure(cls, rho, T, coefficients=None):
+        """
+        Return p [MPa] and dp/drho [MPa m^3 kg^-1] at density rho and
+        temperature T. Only the δ-derivatives of φ are needed, so with the
+        isotherm_coefficients of T (passed in when the same temperatures are
+        evaluated repeatedly) this is a degree-11 polynomial in δ.
+        """
+        rho = np.asarray(rho, dtype=float)
+        delta = rho / cls.rho_crit
+        if coefficients is None:
+            coefficients = cls.isotherm_coefficients(T)
+        degree = np.arange(coefficients.shape[-1])
+
+        delta_powers = np.ones(delta.shape + degree.shape)
+        delta_powers[..., 1:] = np.cumprod(
+            np.broadcast_to(delta[..., None], delta.shape + (degree.size - 1,)), axis=-1)
+        terms = coefficients * delta_powers
+
+        delta_d = cls.n1 + terms @ degree                     # δ φ_δ
+        delta2_dd = -cls.n1 + terms @ (degree * (degree - 1))  # δ² φ_δδ
+
+        RT = cls.R * np.asarray(T, dtype=float) / 1000  # MPa m^3 kg^-1
+        return rho * RT * delta_d, RT * (2 * delta_d + delta2_dd)
+
+    @classmethod
+    def density_bracket(cls, T, p, guess: bool = True):
+        """
+        Starting density and bracket [lo, hi] of the physical root of
+        p(rho, T) = p for solve_density.
+
+        Below T_crit p(rho) has a van der Waals loop between the saturated
+        densities, and p(rho_crit, T) lies below p_sat(T). Liquid-like states
+        (p >= p_sat) therefore have exactly one root in [rho_crit, RHO_MAX]:
+        they start from RHO_MAX and close in from above. Vapour-like states
+        start from the ideal-gas density, which lies below the root since
+        Z < 1 here; p(rho) is concave up to the vapour spinodal, so Newton
+        steps from there approach the root from below without passing it.
+        Above T_crit p(rho) is monotonic and [ideal-gas density, RHO_MAX]
+        brackets the only root.
+
+        With guess, liquid-like and supercritical states instead start from a
+        density interpolated in a precomputed grid, a few Newton steps from
+        the root.
+        """
+        rho_ideal = np.maximum(p * 1000 / (cls.R * T), cls.RHO_MIN)
+        subcritical = T < cls.T_crit
+        liquid = subcritical & (p >= Region4.P_sat(np.clip(T, 273.15, cls.T_crit)))
+        vapour = subcritical & ~liquid
+
+        rho = np.where(liquid, cls.RHO_MAX, rho_ideal)
+        lo = np.where(liquid, float(cls.rho_crit), rho_ideal)
+        hi = np.where(vapour, float(cls.rho_crit), cls.RHO_MAX)
+
+        if guess:
+            # Bilinear guess from the density grid wherever the bracket holds a
+            # single root, so any start inside it is safe; cells touching a
+            # vapour-like node would interpolate across the saturation line
+            rho_grid, vapour_grid = cls.density_guess_table()
+            Tg, pg = cls.GUESS_T, cls.GUESS_P
+            i = np.clip(np.searchsorted(Tg, T) - 1, 0, Tg.size - 2)
+            j = np.clip(np.searchsorted(pg, p) - 1, 0, pg.size - 2)
+            x = np.clip((T - Tg[i]) / (Tg[i + 1] - Tg[i]), 0, 1)
+            y = np.clip((p - pg[j]) / (pg[j + 1] - pg[j]), 0, 1)
+
+            interpolated = ((1 - x) * (1 - y) * rho_grid[i, j] + x * (1 - y) * rho_grid[i + 1, j]
+                            + (1 - x) * y * rho_grid[i, j + 1] + x * y * rho_grid[i + 1, j + 1])
+            usable = ~vapour & ~(vapour_grid[i, j] | vapour_grid[i + 1, j]
+                                 | vapour_grid[i, j + 1] | vapour_grid[i + 1, j + 1])
+            rho = np.where(usable, np.clip(interpolated, lo, hi), rho)
+
+        return rho, lo, hi
+
+    @classmethod
+    def density_guess_table(cls):
+        """Densities on the GUESS_T x GUESS_P grid and whether each node is vapour-like"""
+        if cls._guess_table is None:
+            T, p = np.meshgrid(cls.GUESS_T, cls.GUESS_P, indexing='ij')
+            rho = cls.solve_density(T, p, guess=False)
+            vapour = (T < cls.T_crit) & (p < Region4.P_sat(np.clip(T, 273.15, cls.T_crit)))
+            rho.setflags(write=False)
+            cls._guess_table = (rho, vapour)
+        return cls._guess_table
+
+    @classmethod
+    def solve_density(cls, T, p, tol: float = 1e-13, max_iter: int = 100, guess: bool = True,
+                      return_iterations: bool = False):
+        """
+        Density [kg m^-3] for arrays of T [K] and p [MPa] in Region 3 by a
+        vectorized, safeguarded Newton iteration on p(rho, T) = p.
+
+        Each point starts from density_bracket's guess and keeps a bracket
+        around the root; a step that leaves it or meets dp/drho <= 0 is
+        replaced by bisection. The isotherm coefficients are computed once per
+        point, and converged points drop out of the iteration.
+        """
+        T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+        shape = T.shape
+        T, p = T.ravel(), p.ravel()
+
+        rho, lo, hi = cls.density_bracket(T, p, guess)
+        coefficients = cls.isotherm_coefficients(T)
+        iterations = np.zeros(T.size, dtype=int)
+
+        active = np.arange(T.size)
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            r, pa = rho[active], p[active]
+            p_calc, dp_drho = cls.pressure(r, T[active], coefficients[active])
+            residual = p_calc - pa
+
+            lo_a = np.where(residual < 0, r, lo[active])
+            hi_a = np.where(residual > 0, r, hi[active])
+            lo[active], hi[active] = lo_a, hi_a
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r_new = r - residual / dp_drho
+            bad = ~np.isfinite(r_new) | (dp_drho <= 0) | (r_new < lo_a) | (r_new > hi_a)
+            r_new = np.where(bad, (lo_a + hi_a) / 2, r_new)
+
+            rho[active] = r_new
+            iterations[active] += 1
+            done = (np.abs(residual) <= tol * pa) | (np.abs(r_new - r) <= tol * r)
+            active = active[~done]
+
+        rho = rho.reshape(shape)
+        if return_iterations:
+            return rho, iterations.reshape(shape)
+        return rho
+
+    @classmethod
+    def properties_from_density(cls, rho, T, f=None):
+        """
+        IF97 property relations of Region 3 (Table 31 of the release) at
+        density rho [kg m^-3] and temperature T [K], from phi_terms f if
+        given. Returns P [MPa] along with V, H, S, U, Cp, Cv, W.
+        """
+        delta = rho / cls.rho_crit
+        tau = cls.T_crit / T
+        f = cls.phi_terms(delta, tau) if f is None else f
+        RT = cls.R * T
+
+        delta_d = delta * f["d_phi_d_delta"]
+        tau_d = tau * f["d_phi_d_tau"]
+        tau2_dtau2 = tau ** 2 * f["d2_phi_d_tau2"]
+        mixed = delta_d - delta * tau * f["d2_phi_d_delta_d_tau"]
+        compress = 2 * delta_d + delta ** 2 * f["d2_phi_d_delta2"]
+
         return {
-            'P' : P,
-            'H' : H,
-            'S' : S,
-            'U' : U
+            'P' : rho * RT * delta_d / 1000,
+            'V' : 1 / rho,
+            'H' : RT * (tau_d + delta_d),
+            'S' : cls.R * (tau_d - f["phi"]),
+            'U' : RT * tau_d,
+            'Cp' : cls.R * (-tau2_dtau2 + mixed ** 2 / compress),
+            'Cv' : -cls.R * tau2_dtau2,
+            'W' : np.sqrt(1000 * RT * (compress - mixed ** 2 / tau2_dtau2)),
+        }
+
+    @classmethod
+    def derivatives_from_density(cls, rho, T, f):
+        """
+        Partial derivatives of V, H, S, U in T and p (DERIVATIVE_KEYS) from
+        phi_terms f. φ gives them in rho and T; at constant p,
+        d/dT = d/dT|rho + (drho/dT|p) d/drho with drho/dT|p = -(dp/dT|rho) / (dp/drho|T).
+        """
+        delta = rho / cls.rho_crit
+        tau = cls.T_crit / T
+        RT = cls.R * T
+
+        delta_d = delta * f["d_phi_d_delta"]
+        tau2_dtau2 = tau ** 2 * f["d2_phi_d_tau2"]
+        mixed = delta_d - delta * tau * f["d2_phi_d_delta_d_tau"]
+        compress = 2 * delta_d + delta ** 2 * f["d2_phi_d_delta2"]
+
+        # p [MPa] in rho and T
+        dp_drho = RT * compress / 1000
+        dp_dT = rho * cls.R * mixed / 1000
+        drho_dP = 1 / dp_drho
+        drho_dT = -dp_dT / dp_drho
+
+        # (d/dT at constant rho, d/drho at constant T) of V, H, S, U
+        partials = {
+            'V' : (0, -1 / rho ** 2),
+            'H' : (cls.R * (mixed - tau2_dtau2), RT / rho * (compress - mixed)),
+            'S' : (-cls.R * tau2_dtau2 / T, -cls.R * mixed / rho),
+            'U' : (-cls.R * tau2_dtau2, RT / rho * (delta_d - mixed)),
         }
+        out = {}
+        for prop, (d_dT, d_drho) in partials.items():
+            out[f"d{prop}_dT"] = d_dT + d_drho * drho_dT
+            out[f"d{prop}_dP"] = d_drho * drho_dP
+        return out
+
+    @classmethod
+    def evaluate_block(cls, T, p):
+        props = cls.properties_from_density(cls.solve_density(T, p), T)
+        del props['P']
+        return props
+
+    @classmethod
+    def evaluate_derivatives_block(cls, T, p):
+        rho = cls.solve_density(T, p)
+        f = cls.phi_terms(rho / cls.rho_crit, cls.T_crit / T)
+        props = cls.properties_from_density(rho, T, f)
+        del props['P']
+        return {**props, **cls.derivatives_from_density(rho, T, f)}
+
+    def properties(self):
+        """Return dict with P, V, H, S, U, Cp, Cv, W at this state's density"""
+        return {key: float(value) for key, value in self.properties_from_density(self.rho, self.T).items()}
 
     def in_region(self):
-        # Check Region 1 limits
-        T_limit, P_limit = self.region23_line(self.T, self.P)
-        return (623.15 <= self.T <= T_limit) and (P_limit <= self.P <= 100)
+        # Check Region 3 limits
+        return bool(classify_region(self.T, self.P) == 3)
 
 
 class Region4(SteamRegion):
@@ -341,6 +877,26 @@ class Region4(SteamRegion):
         
         return T_sat
 
+    # Saturation service: P_sat(T) and T_sat(P) take scalars or arrays.
+    # Scalar calls, which the table generator and in_region checks repeat for
+    # the same values, are memoized in bounded LRU caches; arrays go straight
+    # to the closed-form equations
+    MEMO_SIZE = 4096
+
+    @classmethod
+    def P_sat(cls, T):
+        """Saturation pressure [MPa] for a scalar or array T [K]"""
+        if np.ndim(T) == 0:
+            return cached_P_sat(float(T))
+        return cls.calc_P_sat(np.asarray(T, dtype=float))
+
+    @classmethod
+    def T_sat(cls, P):
+        """Saturation temperature [K] for a scalar or array P [MPa]"""
+        if np.ndim(P) == 0:
+            return cached_T_sat(float(P))
+        return cls.calc_T_sat(np.asarray(P, dtype=float))
+
     def in_region(self):
         valid = False
         if 273.15 <= self.T <= 647.096:
@@ -353,6 +909,215 @@ class Region4(SteamRegion):
 
 
 
+@lru_cache(maxsize=Region4.MEMO_SIZE)
+def cached_P_sat(T: float) -> float:
+    return float(Region4.calc_P_sat(T))
+
+
+@lru_cache(maxsize=Region4.MEMO_SIZE)
+def cached_T_sat(P: float) -> float:
+    return float(Region4.calc_T_sat(P))
+
+
+# ===========================================================================
+# Region dispatch
+# ===========================================================================
+# Batch evaluators by region number
+REGIONS = {1: Region1, 2: Region2, 3: Region3}
+
+
+def classify_region(T, p):
+    """
+    IF97 region number (1, 2 or 3) for arrays of T [K] and p [MPa], 0 where
+    the state is outside Regions 1-3. States exactly on the saturation line
+    are taken as liquid (Region 1).
+    """
+    T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+
+    low = (273.15 <= T) & (T <= 623.15)
+    mid = (623.15 < T) & (T <= 863.15)
+    high = (863.15 < T) & (T <= 1073.15)
+    valid_p = (0 < p) & (p <= 100)
+
+    # Boundary pressures, each only meaningful inside its temperature band
+    P_sat = Region4.P_sat(np.clip(T, 273.15, 623.15))
+    P_B23 = SteamRegion.calc_P_B23(np.clip(T, 623.15, 863.15))
+
+    region = np.zeros(T.shape, dtype=np.int8)
+    region[valid_p & low & (p >= P_sat)] = 1
+    region[valid_p & ((low & (p < P_sat)) | (mid & (p <= P_B23)) | high)] = 2
+    region[valid_p & mid & (p > P_B23)] = 3
+    return region
+
+
+def properties(T, p):
+    """
+    Properties for arrays of T [K] and p [MPa] (broadcast against each
+    other) in any mix of regions. Each state is classified, every region's
+    states are evaluated in one batch and the results are scattered back in
+    input order. Returns a dict of arrays V, H, S, U, Cp, Cv, W and Region;
+    states outside Regions 1-3 are NaN.
+    """
+    T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+    region = classify_region(T, p)
+
+    if T.ndim == 0:
+        # One state: evaluate its region directly, without masking
+        cls = REGIONS.get(int(region))
+        props = cls.evaluate_block(float(T), float(p)) if cls else dict.fromkeys(PROPERTY_KEYS, np.nan)
+        out = {key: np.asarray(props[key], dtype=float) for key in PROPERTY_KEYS}
+        out['Region'] = region
+        return out
+
+    out = {key: np.full(T.shape, np.nan) for key in PROPERTY_KEYS}
+    for number, cls in REGIONS.items():
+        mask = region == number
+        if not mask.any():
+            continue
+        for key, value in cls.batch_properties(T[mask], p[mask]).items():
+            out[key][mask] = value
+
+    out['Region'] = region
+    return out
+
+
+def property_derivatives(T, p):
+    """
+    properties(T, p) together with the analytic partial derivatives
+    DERIVATIVE_KEYS of V, H, S, U in T [K] at constant p and in p [MPa] at
+    constant T, from one evaluation per state. States outside Regions 1-3
+    are NaN.
+    """
+    T, p = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(p, dtype=float))
+    region = classify_region(T, p)
+
+    out = {key: np.full(T.shape, np.nan) for key in PROPERTY_KEYS + DERIVATIVE_KEYS}
+    for number, cls in REGIONS.items():
+        mask = region == number
+        if not mask.any():
+            continue
+        for key, value in cls.batch_derivatives(T[mask], p[mask]).items():
+            out[key][mask] = value
+
+    out['Region'] = region
+    return out
+
+
+# ===========================================================================
+# Flash calculations
+# ===========================================================================
+# Permissible differences of the backward equations from the forward
+# equations [K]. IF97 gives 25 mK for Region 1 and 10 mK for subregions 2a
+# and 2b; the 2c equations reach 24 mK next to the saturation line, so
+# Region 2 is checked at 25 mK as well
+BACKWARD_TOLERANCE = {1: 0.025, 2: 0.025}
+
+# The backward equations are fitted down to the triple-point pressure; below
+# it their T is only a starting point for the Newton steps
+P_TRIPLE = 0.000611657
+REFINE_MAX_STEPS = 8
+
+# Above this pressure the saturation line lies in Region 3
+P_SAT_623 = Region4.P_sat(623.15)
+
+
+def flash(p, h=None, s=None, refine: bool = True):
+    """
+    State from arrays of p [MPa] and either h [kJ kg-1] or s [kJ kg-1 K-1].
+
+    Each state is placed in Region 1 (liquid), Region 2 (vapour) or the
+    two-phase region by comparing h or s with the forward equations at the
+    region boundaries. Single-phase temperatures come from the IF97
+    backward equations. Each is checked against the forward equations,
+    through one Newton step on h(T) or s(T), and a ValueError is raised if
+    it is off by more than the IF97 consistency tolerance. With refine,
+    further steps make T consistent with the forward equations to machine
+    precision.
+
+    Returns a dict of arrays T, P, Region (1, 2, 4, or 0 where the state
+    is outside Regions 1, 2 and 4 or in the part of the two-phase region
+    that lies in Region 3), Phase, Quality (0 for liquid, 1 for vapour) and
+    V, H, S, U, Cp, Cv, W. Two-phase V, H, S and U are quality-weighted;
+    Cp, Cv and W are NaN there.
+    """
+    if (h is None) == (s is None):
+        raise ValueError("Pass exactly one of h or s")
+    key, value = ('H', h) if h is not None else ('S', s)
+    p, value = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(value, dtype=float))
+    shape = p.shape
+    p, value = p.ravel(), value.ravel()
+
+    # Region boundaries at each pressure, as temperatures and then as h or s
+    valid_p = (0 < p) & (p <= 100)
+    p_eval = np.where(valid_p, p, 1.0)
+    low = p_eval <= P_SAT_623
+    T_sat = np.where(p_eval >= P_TRIPLE, Region4.T_sat(np.clip(p_eval, P_TRIPLE, P_SAT_623)), 273.15)
+    T_liquid_max = np.where(low, T_sat, 623.15)
+    T_vapour_min = np.where(low, T_sat, SteamRegion.calc_T_B23(np.maximum(p_eval, P_SAT_623)))
+
+    liquid_min = Region1.batch_properties(273.15, p_eval)[key]
+    liquid_max = Region1.batch_properties(T_liquid_max, p_eval)[key]
+    vapour_min = Region2.batch_properties(T_vapour_min, p_eval)[key]
+    vapour_max = Region2.batch_properties(1073.15, p_eval)[key]
+
+    region = np.zeros(p.shape, dtype=np.int8)
+    region[valid_p & (liquid_min <= value) & (value <= liquid_max)] = 1
+    region[valid_p & (vapour_min <= value) & (value <= vapour_max)] = 2
+    region[valid_p & low & (p >= P_TRIPLE) & (liquid_max < value) & (value < vapour_min)] = 4
+
+    out = {k: np.full(p.shape, np.nan) for k in ('T', 'V', 'H', 'S', 'U', 'Cp', 'Cv', 'W', 'Quality')}
+
+    backward = 'T_ph' if key == 'H' else 'T_ps'
+    for number, cls, T_min, T_max in ((1, Region1, 273.15, T_liquid_max), (2, Region2, T_vapour_min, 1073.15)):
+        mask = region == number
+        if not mask.any():
+            continue
+        pm, vm = p[mask], value[mask]
+        T = np.clip(getattr(cls, backward)(pm, vm), T_min if np.isscalar(T_min) else T_min[mask],
+                    T_max if np.isscalar(T_max) else T_max[mask])
+
+        for step in range(REFINE_MAX_STEPS + 1 if refine else 1):
+            props = cls.batch_properties(T, pm)
+            # Newton step on h(T) (dh/dT = cp) or s(T) (ds/dT = cp/T)
+            slope = props['Cp'] if key == 'H' else props['Cp'] / T
+            dT = (vm - props[key]) / slope
+            if step == 0:
+                off = np.where(pm >= P_TRIPLE, np.abs(dT), 0)
+                if np.any(off > BACKWARD_TOLERANCE[number]):
+                    worst = np.argmax(off)
+                    raise ValueError("Region {} backward equation {} is {:.4f} K off the forward "
+                                     "equations at p = {} MPa".format(number, backward, dT[worst], pm[worst]))
+            if not refine or step == REFINE_MAX_STEPS or np.all(np.abs(dT) <= 1e-12 * T):
+                break
+            T = T + dT
+
+        out['T'][mask] = T
+        for k, v in props.items():
+            out[k][mask] = v
+        out['Quality'][mask] = 0 if number == 1 else 1
+
+    mask = region == 4
+    if mask.any():
+        T, pm = T_sat[mask], p[mask]
+        liquid = Region1.batch_properties(T, pm)
+        vapour = Region2.batch_properties(T, pm)
+        x = (value[mask] - liquid[key]) / (vapour[key] - liquid[key])
+        out['T'][mask] = T
+        out['Quality'][mask] = x
+        for k in ('V', 'H', 'S', 'U'):
+            out[k][mask] = (1 - x) * liquid[k] + x * vapour[k]
+
+    phase = np.full(p.shape, 'unsupported', dtype=object)
+    phase[region == 1] = 'liquid'
+    phase[region == 2] = 'vapour'
+    phase[region == 4] = 'two-phase'
+
+    out = {k: v.reshape(shape) for k, v in out.items()}
+    out['P'] = p.reshape(shape)
+    out['Region'] = region.reshape(shape)
+    out['Phase'] = phase.reshape(shape)
+    return out
+
 
 if __name__ == "__main__":
     a = Region2(100+273.15, 0.10141797792131013)
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The modules import each other as top-level modules, as when run from steam_table_program/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from property_tables import PropertyTables  # noqa: E402
+from steam_table_generator import Region4  # noqa: E402
+
+
+def liquid_states(n: int, seed: int = 0):
+    """Random Region 1 states: T in 280-620 K, p between p_sat(T) and 100 MPa"""
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(280, 620, n)
+    p = Region4.P_sat(T) * 1.01 + rng.uniform(0, 1, n) * (100 - Region4.P_sat(T) * 1.01)
+    return T, p
+
+
+def vapour_states(n: int, seed: int = 0):
+    """Random Region 2 states: T in 300-620 K below p_sat(T), and 870-1070 K at 0.01-100 MPa"""
+    rng = np.random.default_rng(seed)
+    T_low = rng.uniform(300, 620, n // 2)
+    p_low = Region4.P_sat(T_low) * rng.uniform(0.05, 0.99, T_low.size)
+    T_high = rng.uniform(870, 1070, n - n // 2)
+    p_high = rng.uniform(0.01, 100, T_high.size)
+    return np.concatenate([T_low, T_high]), np.concatenate([p_low, p_high])
+
+
+def mixed_states(n: int, seed: int = 0):
+    """Random states over the whole T, p range of Regions 1-3"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(273.15, 1073.15, n), rng.uniform(0.001, 100, n)
+
+
+@pytest.fixture(scope="session")
+def property_tables(tmp_path_factory):
+    # Built from scratch in a tmp directory, not read from the module's directory
+    return PropertyTables(tmp_path_factory.mktemp("property_tables"))
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import liquid_states, mixed_states  # noqa: E402
+from parallel_evaluation import ParallelEvaluator  # noqa: E402
+from steam_table_generator import Region1, flash, properties, property_derivatives  # noqa: E402
+from verify_if97 import verify  # noqa: E402
+
+# ===========================================================================
+# Benchmarks (pytest-benchmark)
+#
+# Skipped when pytest-benchmark is not installed, and only run once the
+# IF97 verification tables pass. Save a baseline and gate later runs on it:
+#
+#   python -m pytest tests/test_benchmarks.py --benchmark-autosave
+#   python -m pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=median:10%
+# ===========================================================================
+N_POINTS = 100_000
+# Few enough workers for CI runners; compare with test_properties_batch
+PARALLEL_WORKERS = 2
+
+
+@pytest.fixture(scope="module", autouse=True)
+def verified():
+    failures = verify(verbose=False)
+    if failures:
+        pytest.fail(f"IAPWS-IF97 verification failed for {len(failures)} values, not benchmarking")
+
+
+@pytest.mark.benchmark(group="scalar")
+def test_region1_scalar(benchmark):
+    state = Region1(300.0, 3.0)
+    assert benchmark(state.properties)['V'] == pytest.approx(0.100215168e-2, rel=1e-8)
+
+
+@pytest.mark.benchmark(group="scalar")
+def test_properties_scalar(benchmark):
+    assert benchmark(properties, 300.0, 3.0)['Region'] == 1
+
+
+@pytest.mark.benchmark(group="batch")
+def test_properties_batch(benchmark):
+    T, p = mixed_states(N_POINTS)
+    out = benchmark(properties, T, p)
+    assert np.isfinite(out['H'][out['Region'] > 0]).all()
+
+
+@pytest.mark.benchmark(group="batch")
+def test_properties_parallel(benchmark):
+    T, p = mixed_states(N_POINTS)
+    with ParallelEvaluator(workers=PARALLEL_WORKERS) as evaluator:
+        evaluator.properties(T[:2], p[:2])  # start the workers outside the timing
+        out = benchmark(evaluator.properties, T, p)
+    np.testing.assert_array_equal(out['Region'], properties(T, p)['Region'])
+
+
+@pytest.mark.benchmark(group="batch")
+def test_property_derivatives_batch(benchmark):
+    T, p = mixed_states(N_POINTS)
+    out = benchmark(property_derivatives, T, p)
+    assert np.isfinite(out['dH_dP'][out['Region'] > 0]).all()
+
+
+@pytest.mark.benchmark(group="batch")
+def test_flash_batch(benchmark):
+    T, p = liquid_states(N_POINTS)
+    h = properties(T, p)['H']
+    out = benchmark(flash, p, h=h)
+    assert np.max(np.abs(out['T'] - T)) < 1e-6
+
+
+@pytest.mark.benchmark(group="batch")
+def test_property_tables_lookup(benchmark, property_tables):
+    T, p = mixed_states(N_POINTS)
+    out = benchmark(property_tables.lookup, T, p)
+    assert out['H'].shape == T.shape
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from conftest import liquid_states, mixed_states, vapour_states
+from steam_table_generator import DERIVATIVE_KEYS, PROPERTY_KEYS, properties, property_derivatives
+
+
+def central_difference(T, p, prop: str, var: str) -> np.ndarray:
+    """d prop / d var by a central difference with a relative step of 1e-6"""
+    if var == 'T':
+        step = 1e-6 * T
+        return (properties(T + step, p)[prop] - properties(T - step, p)[prop]) / (2 * step)
+    step = 1e-6 * p
+    return (properties(T, p + step)[prop] - properties(T, p - step)[prop]) / (2 * step)
+
+
+@pytest.mark.parametrize("states, region", [(liquid_states, 1), (vapour_states, 2)])
+def test_match_finite_differences(states, region):
+    T, p = states(200, seed=1)
+    out = property_derivatives(T, p)
+    assert (out['Region'] == region).all()
+
+    for key in DERIVATIVE_KEYS:
+        prop, var = key[1], key[-1]
+        expected = central_difference(T, p, prop, var)
+        # Relative to the largest magnitude, as U and dU_dP cross zero
+        scale = np.max(np.abs(expected))
+        np.testing.assert_allclose(out[key], expected, rtol=1e-5, atol=1e-6 * scale, err_msg=key)
+
+
+def test_match_finite_differences_region3():
+    T = np.array([650.0, 700.0, 750.0])
+    p = np.array([25.0, 40.0, 80.0])
+    out = property_derivatives(T, p)
+    assert (out['Region'] == 3).all()
+    for key in DERIVATIVE_KEYS:
+        expected = central_difference(T, p, key[1], key[-1])
+        np.testing.assert_allclose(out[key], expected, rtol=1e-5, err_msg=key)
+
+
+def test_properties_match_and_identities():
+    T, p = mixed_states(1000, seed=2)
+    out = property_derivatives(T, p)
+    plain = properties(T, p)
+
+    np.testing.assert_array_equal(out['Region'], plain['Region'])
+    for key in PROPERTY_KEYS:
+        np.testing.assert_allclose(out[key], plain[key], rtol=1e-12)
+
+    inside = out['Region'] != 3
+    np.testing.assert_allclose(out['dH_dT'][inside], out['Cp'][inside], rtol=1e-12)
+    np.testing.assert_allclose(out['dS_dT'], out['dH_dT'] / T, rtol=1e-10)
+    np.testing.assert_allclose(out['dS_dP'], -1000 * out['dV_dT'], rtol=1e-10)
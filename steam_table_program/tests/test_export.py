@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from steam_table_export import EXPORT_DTYPE, export_table
+from steam_table_generator import properties
+
+T_VALUES = np.linspace(273.15, 1073.15, 7)
+P_VALUES = np.linspace(0.01, 100, 5)
+
+
+def expected_rows() -> pd.DataFrame:
+    # Rows ordered by T, then p
+    T, p = np.repeat(T_VALUES, P_VALUES.size), np.tile(P_VALUES, T_VALUES.size)
+    props = properties(T, p)
+    return pd.DataFrame({"T": T, "P": p, **{name: props[name] for name in EXPORT_DTYPE.names[2:]}})
+
+
+def read_back(path) -> pd.DataFrame:
+    if path.suffix == ".csv":
+        return pd.read_csv(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.DataFrame(np.load(path))
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".npy", ".parquet"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_matches_properties(tmp_path, suffix, workers):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"table{suffix}"
+
+    n_rows = export_table(path, T_VALUES, P_VALUES, chunk_size=8, workers=workers)
+    table, expected = read_back(path), expected_rows()
+
+    assert n_rows == len(table) == T_VALUES.size * P_VALUES.size
+    assert list(table.columns) == list(EXPORT_DTYPE.names)
+    np.testing.assert_array_equal(table["Region"], expected["Region"])
+    # CSV keeps 10 significant figures; chunks of other lengths than the
+    # expected values' single block agree to rounding
+    rtol = 1e-9 if suffix == ".csv" else 1e-10
+    for name in EXPORT_DTYPE.names:
+        np.testing.assert_allclose(table[name], expected[name], rtol=rtol, err_msg=name)
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_table(tmp_path / "table.xlsx", T_VALUES, P_VALUES, workers=1)
+
+
+@pytest.mark.parametrize("chunk_size", [0, -8])
+def test_chunk_size_below_one(tmp_path, chunk_size):
+    with pytest.raises(ValueError, match="chunk_size"):
+        export_table(tmp_path / "table.npy", T_VALUES, P_VALUES, chunk_size=chunk_size, workers=1)
+    assert not (tmp_path / "table.npy").exists()
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from conftest import liquid_states, vapour_states
+from steam_table_generator import Region1, Region2, Region4, flash, properties
+
+
+@pytest.mark.parametrize("states, region", [(liquid_states, 1), (vapour_states, 2)])
+@pytest.mark.parametrize("key", ["H", "S"])
+def test_round_trip(states, region, key):
+    T, p = states(500)
+    forward = properties(T, p)
+    assert (forward['Region'] == region).all()
+
+    out = flash(p, **{key.lower(): forward[key]})
+    assert (out['Region'] == region).all()
+    np.testing.assert_allclose(out['T'], T, rtol=1e-10)
+    np.testing.assert_allclose(out[key], forward[key], rtol=1e-10)
+    np.testing.assert_allclose(out['Quality'], region - 1)
+
+
+def test_unrefined_within_backward_tolerance():
+    T, p = liquid_states(200)
+    out = flash(p, h=properties(T, p)['H'], refine=False)
+    assert np.max(np.abs(out['T'] - T)) < 0.025
+
+
+def test_two_phase_quality():
+    p = np.array([0.1, 1.0, 10.0])
+    T_sat = Region4.T_sat(p)
+    h_liquid = Region1.batch_properties(T_sat, p)['H']
+    h_vapour = Region2.batch_properties(T_sat, p)['H']
+
+    out = flash(p, h=0.25 * h_liquid + 0.75 * h_vapour)
+    assert (out['Region'] == 4).all()
+    np.testing.assert_allclose(out['T'], T_sat, rtol=1e-12)
+    np.testing.assert_allclose(out['Quality'], 0.75, rtol=1e-10)
+    assert np.isnan(out['Cp']).all()
+
+
+def test_outside_range():
+    out = flash(np.array([-1.0, 1.0]), h=np.array([1000.0, 1e5]))
+    assert out['Region'].tolist() == [0, 0]
+    assert np.isnan(out['T']).all()
+
+
+def test_needs_exactly_one_of_h_and_s():
+    with pytest.raises(ValueError):
+        flash(1.0)
+    with pytest.raises(ValueError):
+        flash(1.0, h=1000.0, s=3.0)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from steam_table_generator import PROPERTY_KEYS, Region1, Region2, Region3, properties
+from verify_if97 import verify
+
+
+def test_verification_tables():
+    assert verify(verbose=False) == []
+
+
+@pytest.mark.parametrize("region, T, p", [(Region1, 300.0, 3.0), (Region1, 500.0, 80.0),
+                                          (Region2, 700.0, 30.0), (Region2, 300.0, 0.0035)])
+def test_scalar_path_matches_batch(region, T, p):
+    scalar = region(T, p).properties()
+    batch = region.batch_properties(np.array([T]), np.array([p]))
+    for key in PROPERTY_KEYS:
+        assert isinstance(scalar[key], float)
+        assert scalar[key] == pytest.approx(batch[key][0], rel=1e-13)
+
+
+def test_properties_of_one_state_match_array():
+    T, p = np.array([300.0, 700.0, 650.0, 200.0]), np.array([3.0, 30.0, 25.0, 3.0])
+    batch = properties(T, p)
+    for i in range(T.size):
+        one = properties(T[i], p[i])
+        assert one['Region'].shape == () and one['Region'] == batch['Region'][i]
+        for key in PROPERTY_KEYS:
+            assert one[key].shape == ()
+            np.testing.assert_allclose(one[key], batch[key][i], rtol=1e-13)
+    assert batch['Region'].tolist() == [1, 2, 3, 0]
+    assert np.isnan(properties(200.0, 3.0)['V'])
+
+
+def test_region3_scalar_at_solved_density():
+    props = properties(650.0, 25.5837018)
+    assert props['Region'] == 3
+    np.testing.assert_allclose(1 / props['V'], 500, rtol=1e-7)
+    np.testing.assert_allclose(Region3(650.0, 25.5837018, rho=500).properties()['H'], 1863.43019, rtol=1e-8)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from conftest import mixed_states
+from parallel_evaluation import OUTPUT_KEYS, ParallelEvaluator, parallel_properties
+from steam_table_generator import properties
+
+
+def test_matches_properties():
+    T, p = mixed_states(5000, seed=4)
+    serial = properties(T, p)
+    with ParallelEvaluator(workers=2) as evaluator:
+        first = evaluator.properties(T, p)
+        second = evaluator.properties(T[:10], p[:10])
+
+    np.testing.assert_array_equal(first['Region'], serial['Region'])
+    assert first['Region'].dtype == np.int8
+    for key in OUTPUT_KEYS:
+        # Shards are evaluated in different block lengths: equal to rounding
+        np.testing.assert_allclose(first[key], serial[key], rtol=1e-10, err_msg=key)
+        np.testing.assert_allclose(second[key], serial[key][:10], rtol=1e-10, err_msg=key)
+
+
+def test_keeps_shape_and_broadcasts():
+    T = np.linspace(300, 1000, 6)
+    p = np.linspace(0.1, 90, 5)[:, None]
+    out = parallel_properties(T, p, workers=2)
+    serial = properties(T, p)
+    assert out['H'].shape == (5, 6)
+    np.testing.assert_allclose(out['H'], serial['H'], rtol=1e-12)
+
+
+@pytest.mark.parametrize("T, p", [(np.empty(0), np.empty(0)), (np.array([300.0]), np.array([3.0]))])
+def test_single_worker_and_empty_input(T, p):
+    out = ParallelEvaluator(workers=1).properties(T, p)
+    expected = properties(T, p)
+    for key in OUTPUT_KEYS:
+        np.testing.assert_array_equal(out[key], expected[key])
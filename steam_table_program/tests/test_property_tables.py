@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from conftest import liquid_states
+from property_tables import RELATIVE_ERROR, TABLE_PROPERTIES
+from steam_table_generator import Region4, properties
+
+
+def table_error(looked_up: dict, exact: dict, key: str) -> np.ndarray:
+    error = np.abs(looked_up[key] - exact[key])
+    return error / np.abs(exact[key]) if RELATIVE_ERROR[key] else error
+
+
+@pytest.mark.parametrize("phase", ["liquid", "vapour", "vapour_B23", "vapour_high"])
+def test_lookup_within_error_bounds(property_tables, phase):
+    rng = np.random.default_rng(3)
+    if phase == "liquid":
+        T, p = liquid_states(2000, seed=3)
+    elif phase == "vapour":
+        T = rng.uniform(274, 622, 2000)
+        p = Region4.P_sat(T) * rng.uniform(0.01, 0.99, T.size)
+    elif phase == "vapour_B23":
+        T = rng.uniform(624, 862, 2000)
+        p = rng.uniform(0.01, 16, T.size)
+    else:
+        T = rng.uniform(864, 1072, 2000)
+        p = rng.uniform(0.01, 99, T.size)
+
+    looked_up = property_tables.lookup(T, p)
+    exact = properties(T, p)
+    np.testing.assert_array_equal(looked_up['Region'], exact['Region'])
+
+    bounds = property_tables.error_bounds[phase]
+    for key in TABLE_PROPERTIES:
+        assert table_error(looked_up, exact, key).max() <= bounds[key], key
+
+
+def test_lookup_outside_tables(property_tables):
+    out = property_tables.lookup(np.array([650.0, 200.0, 500.0]), np.array([25.0, 1.0, 120.0]))
+    assert out['Region'].tolist() == [0, 0, 0]
+    assert np.isnan(out['H']).all()
+
+
+def test_lookup_keeps_shape(property_tables):
+    T, p = np.meshgrid(np.linspace(300, 900, 4), np.linspace(0.01, 50, 3))
+    out = property_tables.lookup(T, p)
+    assert all(out[key].shape == (3, 4) for key in TABLE_PROPERTIES + ('Region',))
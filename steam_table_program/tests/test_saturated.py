@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from saturated_steam_tables import (LATENT_PROPERTIES, PHASES, SATURATED_PROPERTIES,
+                                    generate_saturated_steam_table, saturated_properties)
+
+
+def test_saturation_states_from_T_and_p():
+    by_T = saturated_properties(T_range=[300, 500, 600])
+    np.testing.assert_allclose(by_T["Pressure"], [0.353658941e-2, 0.263889776e1, 0.123443146e2], rtol=1e-8)
+
+    by_p = saturated_properties(P_range=by_T["Pressure"])
+    np.testing.assert_allclose(by_p["Temperature"], [300, 500, 600], rtol=1e-8)
+    for prop in LATENT_PROPERTIES:
+        np.testing.assert_allclose(by_T[f"{prop}_Evap"], by_T[f"{prop}_Vap"] - by_T[f"{prop}_Liq"])
+    assert (by_T["H_Evap"] > 0).all() and (by_T["V_Evap"] > 0).all()
+
+
+def test_wide_layout():
+    table = generate_saturated_steam_table(np.linspace(300, 600, 4), layout="wide")
+    expected = ["Temperature", "Pressure"] + [f"{prop}_{phase}" for prop in SATURATED_PROPERTIES
+                                               for phase in ("Liq", "Vap")]
+    expected += [f"{prop}_Evap" for prop in LATENT_PROPERTIES]
+    assert list(table.columns) == expected
+    assert len(table) == 4
+
+
+def test_long_layout_matches_wide():
+    T = np.linspace(300, 600, 4)
+    wide = generate_saturated_steam_table(T, layout="wide")
+    long = generate_saturated_steam_table(T)
+
+    assert list(long.columns) == ["Temperature", "Pressure", "Property", "Phase", "Value"]
+    assert len(long) == 4 * (2 * len(SATURATED_PROPERTIES) + len(LATENT_PROPERTIES))
+    assert list(long["Phase"].cat.categories) == list(PHASES)
+    # Rows by state, then property, then phase
+    assert long["Property"].iloc[:3].tolist() == ["V"] * 3
+    assert long["Phase"].iloc[:3].tolist() == list(PHASES)
+
+    for _, row in long.sample(20, random_state=0).iterrows():
+        state = wide[wide["Temperature"] == row["Temperature"]].iloc[0]
+        assert row["Value"] == state[f"{row['Property']}_{row['Phase']}"]
+
+
+def test_empty_and_invalid_arguments():
+    assert generate_saturated_steam_table().empty
+    with pytest.raises(KeyError):
+        saturated_properties(T_range=[300], P_range=[1])
+    with pytest.raises(ValueError):
+        saturated_properties(T_range=[300, 700])
+    with pytest.raises(ValueError):
+        saturated_properties(P_range=[50])
+    with pytest.raises(ValueError):
+        generate_saturated_steam_table([300], layout="tall")
@@ -0,0 +1,171 @@
+import sys
+
+import numpy as np
+
+from steam_table_generator import Region1, Region2, Region3, Region4, SteamRegion, properties
+
+# ===========================================================================
+# IAPWS-IF97 verification
+#
+# Reproduces the computer-program verification values published in the
+# IAPWS-IF97 release for Regions 1-4, the backward equations and the
+# region boundaries. The values are checked through each evaluation path:
+# the scalar region objects, the batch classmethods and the properties()
+# dispatcher. Run from this directory: python verify_if97.py; the exit
+# status is 1 if any value is out of tolerance, else 0.
+# ===========================================================================
+
+# The published values have 9 significant figures
+RTOL = 1e-8
+
+# Table 5: Region 1 at (T [K], p [MPa])
+REGION1_VALUES = (
+    ((300, 3), {'V': 0.100215168e-2, 'H': 0.115331273e3, 'U': 0.112324818e3,
+                'S': 0.392294792, 'Cp': 0.417301218e1, 'W': 0.150773921e4}),
+    ((300, 80), {'V': 0.971180894e-3, 'H': 0.184142828e3, 'U': 0.106448356e3,
+                 'S': 0.368563852, 'Cp': 0.401008987e1, 'W': 0.163469054e4}),
+    ((500, 3), {'V': 0.120241800e-2, 'H': 0.975542239e3, 'U': 0.971934985e3,
+                'S': 0.258041912e1, 'Cp': 0.465580682e1, 'W': 0.124071337e4}),
+)
+
+# Table 15: Region 2 at (T [K], p [MPa])
+REGION2_VALUES = (
+    ((300, 0.0035), {'V': 0.394913866e2, 'H': 0.254991145e4, 'U': 0.241169160e4,
+                     'S': 0.852238967e1, 'Cp': 0.191300162e1, 'W': 0.427920172e3}),
+    ((700, 0.0035), {'V': 0.923015898e2, 'H': 0.333568375e4, 'U': 0.301262819e4,
+                     'S': 0.101749996e2, 'Cp': 0.208141274e1, 'W': 0.644289068e3}),
+    ((700, 30), {'V': 0.542946619e-2, 'H': 0.263149474e4, 'U': 0.246861076e4,
+                 'S': 0.517540298e1, 'Cp': 0.103505092e2, 'W': 0.480386523e3}),
+)
+
+# Table 33: Region 3 at (rho [kg m^-3], T [K])
+REGION3_VALUES = (
+    ((500, 650), {'P': 0.255837018e2, 'H': 0.186343019e4, 'U': 0.181226279e4,
+                  'S': 0.405427273e1, 'Cp': 0.138935717e2, 'W': 0.502005554e3}),
+    ((200, 650), {'P': 0.222930643e2, 'H': 0.237512401e4, 'U': 0.226365868e4,
+                  'S': 0.485438792e1, 'Cp': 0.446579342e2, 'W': 0.383444594e3}),
+    ((500, 750), {'P': 0.783095639e2, 'H': 0.225868845e4, 'U': 0.210206932e4,
+                  'S': 0.446971906e1, 'Cp': 0.634165359e1, 'W': 0.760696041e3}),
+)
+
+# Tables 35 and 36: saturation pressure [MPa] at T [K] and temperature [K] at p [MPa]
+SATURATION_PRESSURE_VALUES = ((300, 0.353658941e-2), (500, 0.263889776e1), (600, 0.123443146e2))
+SATURATION_TEMPERATURE_VALUES = ((0.1, 0.372755919e3), (1, 0.453035632e3), (10, 0.584149488e3))
+
+# Tables 7, 9, 24 and 29: backward equations, T [K] at (p [MPa], h or s)
+BACKWARD_VALUES = {
+    (Region1, 'T_ph'): (((3, 500), 0.391798509e3), ((80, 500), 0.378108626e3), ((80, 1500), 0.611041229e3)),
+    (Region1, 'T_ps'): (((3, 0.5), 0.307842258e3), ((80, 0.5), 0.309979785e3), ((80, 3), 0.565899909e3)),
+    (Region2, 'T_ph'): (((0.001, 3000), 0.534433241e3), ((3, 3000), 0.575373370e3), ((3, 4000), 0.101077577e4),
+                        ((5, 3500), 0.801299102e3), ((5, 4000), 0.101531583e4), ((25, 3500), 0.875279054e3),
+                        ((40, 2700), 0.743056411e3), ((60, 2700), 0.791137067e3), ((60, 3200), 0.882756860e3)),
+    (Region2, 'T_ps'): (((0.1, 7.5), 0.399517097e3), ((0.1, 8), 0.514127081e3), ((2.5, 8), 0.103984917e4),
+                        ((8, 6), 0.600484040e3), ((8, 7.5), 0.106495556e4), ((90, 6), 0.103801126e4),
+                        ((20, 5.75), 0.697992849e3), ((80, 5.25), 0.854011484e3), ((80, 5.75), 0.949017998e3)),
+}
+
+# Section 4 and 5.2.1: the B23 and B2bc boundary equations
+B23_VALUES = ((0.62315e3, 0.165291643e2),)  # T [K], p [MPa]
+B2BC_VALUES = ((0.1e3, 0.3516004323e4),)  # p [MPa], h [kJ kg-1]
+
+
+def compare(label: str, computed, expected, rtol: float = RTOL) -> list:
+    """Return [(label, computed, expected, relative error)] for every value out of tolerance"""
+    computed = np.asarray(computed, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    error = np.abs(computed / expected - 1)
+    return [(label, c, e, err) for c, e, err in zip(computed.ravel(), expected.ravel(), error.ravel())
+            if not err <= rtol]
+
+
+def forward_failures(region, values, label: str) -> list:
+    """Check a Gibbs free energy region through its objects, batch_properties() and properties()"""
+    T, p = np.array([state for state, _ in values], dtype=float).T
+    batch = region.batch_properties(T, p)
+    dispatched = properties(T, p)
+
+    failures = compare(f"{label} region", dispatched['Region'], np.full(T.size, int(label[-1])))
+    for i, (state, expected) in enumerate(values):
+        scalar = region(*state).properties()
+        for key, value in expected.items():
+            failures += compare(f"{label} {state} {key} scalar", scalar[key], value)
+            failures += compare(f"{label} {state} {key} batch", batch[key][i], value)
+            failures += compare(f"{label} {state} {key} properties()", dispatched[key][i], value)
+    return failures
+
+
+def region3_failures() -> list:
+    """
+    Check Region 3 at the published densities, and through the density
+    solve of properties() at the published pressures. The published P has
+    9 figures, so the solved density is only as good as dp/drho allows.
+    """
+    rho, T = np.array([state for state, _ in REGION3_VALUES], dtype=float).T
+    batch = Region3.properties_from_density(rho, T)
+    P = np.array([expected['P'] for _, expected in REGION3_VALUES])
+    dispatched = properties(T, P)
+    # d ln(rho) / d ln(p) at constant T = p Cp / (rho w^2 Cv), p in Pa
+    sensitivity = 1e6 * batch['P'] * batch['Cp'] / (rho * batch['W'] ** 2 * batch['Cv'])
+
+    failures = compare("Region 3 region", dispatched['Region'], np.full(T.size, 3))
+    failures += compare("Region 3 solved density", 1 / dispatched['V'], rho, RTOL * max(1, np.max(sensitivity)))
+    for i, (state, expected) in enumerate(REGION3_VALUES):
+        scalar = Region3(state[1], expected['P'], rho=state[0]).properties()
+        for key, value in expected.items():
+            failures += compare(f"Region 3 {state} {key} scalar", scalar[key], value)
+            failures += compare(f"Region 3 {state} {key} batch", batch[key][i], value)
+    return failures
+
+
+def region4_failures() -> list:
+    """Saturation line through the memoized scalar path and the array path"""
+    T, P_expected = np.array(SATURATION_PRESSURE_VALUES).T
+    P, T_expected = np.array(SATURATION_TEMPERATURE_VALUES).T
+    failures = compare("Region 4 P_sat(T) array", Region4.P_sat(T), P_expected)
+    failures += compare("Region 4 T_sat(p) array", Region4.T_sat(P), T_expected)
+    for T_i, P_i in SATURATION_PRESSURE_VALUES:
+        failures += compare(f"Region 4 P_sat({T_i})", Region4.P_sat(float(T_i)), P_i)
+    for P_i, T_i in SATURATION_TEMPERATURE_VALUES:
+        failures += compare(f"Region 4 T_sat({P_i})", Region4.T_sat(float(P_i)), T_i)
+    return failures
+
+
+def backward_failures() -> list:
+    """Backward equations T(p, h), T(p, s) and the B23 and B2bc boundaries"""
+    failures = []
+    for (region, name), values in BACKWARD_VALUES.items():
+        p, x = np.array([state for state, _ in values]).T
+        expected = np.array([T for _, T in values])
+        failures += compare(f"{region.__name__}.{name}", getattr(region, name)(p, x), expected)
+
+    T, p = np.array(B23_VALUES).T
+    failures += compare("B23 p(T)", SteamRegion.calc_P_B23(T), p)
+    failures += compare("B23 T(p)", SteamRegion.calc_T_B23(p), T)
+    p, h = np.array(B2BC_VALUES).T
+    failures += compare("B2bc h(p)", Region2.calc_h_B2bc(p), h)
+    failures += compare("B2bc p(h)", Region2.calc_P_B2bc(h), p)
+    return failures
+
+
+def verify(verbose: bool = True) -> list:
+    """Run every verification table; returns the failures (empty when all values match)"""
+    checks = (("Region 1, Table 5", lambda: forward_failures(Region1, REGION1_VALUES, "Region 1")),
+              ("Region 2, Table 15", lambda: forward_failures(Region2, REGION2_VALUES, "Region 2")),
+              ("Region 3, Table 33", region3_failures),
+              ("Region 4, Tables 35-36", region4_failures),
+              ("Backward and boundary equations", backward_failures))
+
+    failures = []
+    for name, check in checks:
+        found = check()
+        failures += found
+        if verbose:
+            print(f"[IF97] {name:<32} {'ok' if not found else f'{len(found)} FAILED'}")
+            for label, computed, expected, error in found:
+                print(f"[IF97]     {label}: {computed:.9e} != {expected:.9e} (rel error {error:.1e})")
+    return failures
+
+
+if __name__ == "__main__":
+    failures = verify()
+    sys.exit(1 if failures else 0)